@@ -0,0 +1,54 @@
+"""Indexes for hot query paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Indexes are built CONCURRENTLY so the migration does not lock writes on
+large tables; that requires running outside a transaction.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # /recent and per-key stats: WHERE api_key = ? ORDER BY created_at DESC
+        op.create_index(
+            "ix_tickets_api_key_created_at",
+            "tickets",
+            ["api_key", sa.text("created_at DESC")],
+            postgresql_concurrently=True
+        )
+        # Retention: WHERE created_at < ?
+        op.create_index("ix_tickets_created_at", "tickets", ["created_at"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_webhook_logs_provider_created_at",
+            "webhook_logs",
+            ["provider", "created_at"],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_api_keys_active_key",
+            "api_keys",
+            ["key"],
+            postgresql_where=sa.text("is_active = true"),
+            postgresql_concurrently=True
+        )
+        # Superseded by the (api_key, created_at) index
+        op.drop_index("ix_tickets_api_key", table_name="tickets", postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_tickets_api_key", "tickets", ["api_key"], postgresql_concurrently=True)
+        op.drop_index("ix_api_keys_active_key", table_name="api_keys", postgresql_concurrently=True)
+        op.drop_index("ix_webhook_logs_provider_created_at", table_name="webhook_logs", postgresql_concurrently=True)
+        op.drop_index("ix_tickets_created_at", table_name="tickets", postgresql_concurrently=True)
+        op.drop_index("ix_tickets_api_key_created_at", table_name="tickets", postgresql_concurrently=True)
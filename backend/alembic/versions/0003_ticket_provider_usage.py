@@ -0,0 +1,38 @@
+"""Provider, model, token usage, cost and latency per ticket
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+All columns are nullable, so adding them is a metadata-only change that
+does not rewrite the tickets table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    sa.Column("provider", sa.String(), nullable=True),
+    sa.Column("model", sa.String(), nullable=True),
+    sa.Column("prompt_version", sa.String(), nullable=True),
+    sa.Column("input_tokens", sa.Integer(), nullable=True),
+    sa.Column("output_tokens", sa.Integer(), nullable=True),
+    sa.Column("cost_usd", sa.Float(), nullable=True),
+    sa.Column("provider_ttfb", sa.Float(), nullable=True),
+    sa.Column("provider_latency", sa.Float(), nullable=True),
+]
+
+
+def upgrade():
+    for column in COLUMNS:
+        op.add_column("tickets", column)
+
+
+def downgrade():
+    for column in reversed(COLUMNS):
+        op.drop_column("tickets", column.name)
@@ -0,0 +1,24 @@
+"""Cascade tier that answered each ticket
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Nullable, so adding it is a metadata-only change.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("tickets", sa.Column("cascade_tier", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("tickets", "cascade_tier")
@@ -0,0 +1,28 @@
+"""Keyset pagination index on audit_logs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Built CONCURRENTLY so writers are not blocked on a populated table.
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_audit_logs_created_at_id", "audit_logs", ["created_at", "id"],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_audit_logs_created_at_id", table_name="audit_logs", postgresql_concurrently=True)
@@ -0,0 +1,136 @@
+"""Move webhook bodies out of webhook_logs into a compressed, deduplicated store
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Existing payload and response columns are copied into webhook_payloads
+(gzip, keyed by the sha256 of the body) before they are dropped.
+webhook_logs is kept short by the log_cleanup job, so the backfill runs
+in the migration transaction.
+"""
+import gzip
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+webhook_logs = sa.table(
+    "webhook_logs",
+    sa.column("id", sa.Integer),
+    sa.column("payload", sa.Text),
+    sa.column("response", sa.Text),
+    sa.column("payload_hash", sa.String),
+    sa.column("response_hash", sa.String),
+)
+webhook_payloads = sa.table(
+    "webhook_payloads",
+    sa.column("hash", sa.String),
+    sa.column("encoding", sa.String),
+    sa.column("data", sa.LargeBinary),
+    sa.column("size", sa.Integer),
+    sa.column("created_at", sa.DateTime),
+    sa.column("last_seen_at", sa.DateTime),
+)
+
+
+def upgrade():
+    op.create_table(
+        "webhook_payloads",
+        sa.Column("hash", sa.String(64), primary_key=True),
+        sa.Column("encoding", sa.String(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_seen_at", sa.DateTime(), nullable=True),
+    )
+    with op.batch_alter_table("webhook_logs") as batch:
+        batch.add_column(sa.Column("payload_hash", sa.String(64), nullable=True))
+        batch.add_column(sa.Column("response_hash", sa.String(64), nullable=True))
+        batch.create_foreign_key("fk_webhook_logs_payload_hash", "webhook_payloads", ["payload_hash"], ["hash"])
+        batch.create_foreign_key("fk_webhook_logs_response_hash", "webhook_payloads", ["response_hash"], ["hash"])
+    op.create_index("ix_webhook_logs_payload_hash", "webhook_logs", ["payload_hash"])
+    op.create_index("ix_webhook_logs_response_hash", "webhook_logs", ["response_hash"])
+
+    bind = op.get_bind()
+    now = sa.func.now()
+    stored = set()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(webhook_logs.c.id, webhook_logs.c.payload, webhook_logs.c.response)
+            .where(webhook_logs.c.id > last_id)
+            .order_by(webhook_logs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        new_payloads, updates = [], []
+        for log_id, payload, response in rows:
+            hashes = []
+            for body in (payload, response):
+                if body is None:
+                    hashes.append(None)
+                    continue
+                raw = body.encode()
+                digest = hashlib.sha256(raw).hexdigest()
+                hashes.append(digest)
+                if digest not in stored:
+                    stored.add(digest)
+                    new_payloads.append({
+                        "hash": digest, "encoding": "gzip", "data": gzip.compress(raw, mtime=0), "size": len(raw)
+                    })
+            updates.append({"log_id": log_id, "new_payload_hash": hashes[0], "new_response_hash": hashes[1]})
+
+        # Payload rows must exist before the foreign keys point at them
+        if new_payloads:
+            bind.execute(webhook_payloads.insert().values(created_at=now, last_seen_at=now), new_payloads)
+        bind.execute(
+            webhook_logs.update().where(webhook_logs.c.id == sa.bindparam("log_id")).values(
+                payload_hash=sa.bindparam("new_payload_hash"), response_hash=sa.bindparam("new_response_hash")
+            ),
+            updates
+        )
+
+    with op.batch_alter_table("webhook_logs") as batch:
+        batch.drop_column("payload")
+        batch.drop_column("response")
+
+
+def downgrade():
+    with op.batch_alter_table("webhook_logs") as batch:
+        batch.add_column(sa.Column("payload", sa.Text(), nullable=True))
+        batch.add_column(sa.Column("response", sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    bodies = sa.select(webhook_payloads.c.data).where(webhook_payloads.c.hash == sa.bindparam("digest"))
+    rows = bind.execute(
+        sa.select(webhook_logs.c.id, webhook_logs.c.payload_hash, webhook_logs.c.response_hash).where(
+            sa.or_(webhook_logs.c.payload_hash.isnot(None), webhook_logs.c.response_hash.isnot(None))
+        )
+    ).all()
+    for log_id, payload_hash, response_hash in rows:
+        values = {}
+        for column, digest in (("payload", payload_hash), ("response", response_hash)):
+            if digest is not None:
+                values[column] = gzip.decompress(bind.execute(bodies, {"digest": digest}).scalar()).decode()
+        bind.execute(webhook_logs.update().where(webhook_logs.c.id == log_id).values(**values))
+
+    op.drop_index("ix_webhook_logs_response_hash", table_name="webhook_logs")
+    op.drop_index("ix_webhook_logs_payload_hash", table_name="webhook_logs")
+    with op.batch_alter_table("webhook_logs") as batch:
+        batch.drop_constraint("fk_webhook_logs_response_hash", type_="foreignkey")
+        batch.drop_constraint("fk_webhook_logs_payload_hash", type_="foreignkey")
+        batch.drop_column("response_hash")
+        batch.drop_column("payload_hash")
+    op.drop_table("webhook_payloads")
@@ -0,0 +1,44 @@
+"""Full-text and trigram indexes for ticket search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Expression indexes over ticket_text and summary, built CONCURRENTLY so
+the tickets table is neither rewritten nor write-locked. The expressions
+must stay identical to app.models.ticket_search_document and
+ticket_search_vector, or queries stop using them. PostgreSQL only; other
+databases search without an index.
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+SEARCH_DOCUMENT = "ticket_text || ' ' || coalesce(summary, '')"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_search_vector ON tickets "
+            f"USING gin (to_tsvector('english'::regconfig, {SEARCH_DOCUMENT}))"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_search_trigram ON tickets "
+            f"USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tickets_search_trigram")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tickets_search_vector")
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import Depends, Request
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+
+from .auth import get_client_ip, get_current_api_key
+from .config import settings
+from .database import SessionLocal
+from .metrics import AUDIT_EVENTS, AUDIT_BUFFER_DEPTH, AUDIT_FLUSH_DURATION, AUDIT_FLUSH_ERRORS
+from .models import AuditLog
+from .serialization import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogger:
+    """
+    Buffered audit trail.
+
+    record() only appends to an in-memory ring buffer; a background task
+    writes the buffer in multi-row INSERTs every flush_interval, or sooner
+    once a full batch is waiting. Under backpressure, once the buffer is
+    past sample_watermark, routine events are sampled at sample_rate; when
+    it is full, routine events are dropped and critical events evict the
+    oldest entry. Every outcome is counted in audit_events_total.
+
+    record() must be called from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        sample_watermark: float = 0.8,
+        sample_rate: float = 0.1,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_watermark = sample_watermark
+        self.sample_rate = sample_rate
+        self.session_factory = session_factory
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(
+        self,
+        action: str,
+        resource: str,
+        resource_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        request: Optional[Request] = None,
+        user_id: Optional[int] = None,
+        critical: bool = False
+    ):
+        """Queue one audit event; never blocks and never raises on a full buffer"""
+        if not self.enabled:
+            return
+        depth = len(self._buffer)
+        if depth >= self.capacity:
+            if not critical:
+                AUDIT_EVENTS.labels("dropped").inc()
+                return
+            self._buffer.popleft()
+            AUDIT_EVENTS.labels("dropped").inc()
+        elif not critical and depth >= self.capacity * self.sample_watermark and random.random() >= self.sample_rate:
+            AUDIT_EVENTS.labels("sampled_out").inc()
+            return
+
+        self._buffer.append({
+            "user_id": user_id,
+            "action": action,
+            "resource": resource,
+            "resource_id": resource_id,
+            "details": orjson.dumps(details).decode() if details is not None else None,
+            "ip_address": get_client_ip(request) if request is not None else None,
+            "user_agent": request.headers.get("User-Agent") if request is not None else None,
+            # Time of the event, not of the flush
+            "created_at": datetime.utcnow()
+        })
+        AUDIT_EVENTS.labels("queued").inc()
+        AUDIT_BUFFER_DEPTH.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        # Bound to the running loop on first wait, so created here rather than at import
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered events batch by batch; returns the number written"""
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                AUDIT_FLUSH_ERRORS.inc()
+                logger.error(f"Audit flush of {len(batch)} events failed: {e}")
+                self._requeue(batch)
+                break
+            finally:
+                AUDIT_FLUSH_DURATION.observe(time.perf_counter() - start)
+            written += len(batch)
+        AUDIT_BUFFER_DEPTH.set(len(self._buffer))
+        return written
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            # One multi-row INSERT ... VALUES per batch
+            db.execute(insert(AuditLog).values(rows))
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        """Put a failed batch back at the head of the buffer, dropping what no longer fits"""
+        room = self.capacity - len(self._buffer)
+        kept = batch[:max(room, 0)]
+        self._buffer.extendleft(reversed(kept))
+        if len(batch) > len(kept):
+            AUDIT_EVENTS.labels("dropped").inc(len(batch) - len(kept))
+
+
+AUDIT_LOG_COLUMNS = (
+    AuditLog.id,
+    AuditLog.created_at,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.resource,
+    AuditLog.resource_id,
+    AuditLog.details,
+    AuditLog.ip_address,
+    AuditLog.user_agent
+)
+
+
+def list_audit_logs(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    resource: Optional[str] = None,
+    user_id: Optional[int] = None
+) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Newest-first page of audit rows and the cursor for the next page.
+
+    Pages are keyset-paginated on (created_at, id), so deep pages cost the
+    same as the first and rows inserted meanwhile do not shift the pages.
+    """
+    query = db.query(*AUDIT_LOG_COLUMNS)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if resource:
+        query = query.filter(AuditLog.resource == resource)
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if cursor:
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*decode_cursor(cursor)))
+
+    rows = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def audited_api_key(request: Request, api_key: str = Depends(get_current_api_key)) -> str:
+    """
+    get_current_api_key that also records the key's use in the audit trail.
+
+    Async so FastAPI runs it on the event loop, as record() requires, rather
+    than in the threadpool it uses for plain def dependencies.
+    """
+    audit_logger.record(
+        "api_key.use", "api_key", api_key[:8],
+        details={"method": request.method, "path": request.url.path},
+        request=request
+    )
+    return api_key
+
+
+# Global instance
+audit_logger = AuditLogger(
+    capacity=settings.audit_buffer_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+    sample_watermark=settings.audit_sample_watermark,
+    sample_rate=settings.audit_sample_rate,
+    enabled=settings.audit_enabled
+)
@@ -54,16 +54,20 @@ def validate_admin_key(request: Request) -> bool:
 def get_client_ip(request: Request) -> str:
     """
     Get client IP address from request
-    """
-    # Check for forwarded headers first
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
 
-    # Check for real IP header
+    Only trusts what the reverse proxy wrote: nginx sets X-Real-IP from
+    $remote_addr and appends the peer to X-Forwarded-For. Earlier
+    X-Forwarded-For entries come from the client and can be anything.
+    """
+    # Set by the proxy, replacing any value the client sent
     real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip
+        return real_ip.strip()
+
+    # The right-most entry is the one the nearest proxy appended
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded:
+        return forwarded.rsplit(",", 1)[-1].strip()
 
     # Fallback to request client
     if request.client:
@@ -1,18 +1,96 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .config import settings
+from .metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_TIMEOUTS, DB_POOL_IN_USE, DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection"""
+
+    role = "primary"
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.role).inc()
+            logger.error(f"Database pool ({self.role}) exhausted after {settings.db_pool_timeout}s")
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.role).observe(time.perf_counter() - start_time)
+
+
+def _make_engine(url: str, role: str):
+    """Create an engine with a sized, instrumented pool for the given role"""
+    connect_args = {}
+    if url.startswith("postgresql") and settings.db_statement_timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
+    # A subclass per role survives pool.recreate() on dispose
+    pool_class = type(f"{role.title()}QueuePool", (InstrumentedQueuePool,), {"role": role})
+    new_engine = create_engine(
+        url,
+        poolclass=pool_class,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+        echo=settings.log_level == "DEBUG"
+    )
+    _instrument(new_engine, role)
+    return new_engine
+
+
+def _instrument(target_engine, role: str):
+    @event.listens_for(target_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_IN_USE.labels(role).inc()
+
+    @event.listens_for(target_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_IN_USE.labels(role).dec()
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "handle_error")
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        # so later statements are not timed against it
+        connection = exception_context.connection
+        if connection is not None and exception_context.execution_context is not None:
+            starts = connection.info.get("query_start_time")
+            if starts:
+                starts.pop()
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        if elapsed_ms >= settings.db_slow_query_ms:
+            DB_SLOW_QUERIES.labels(role).inc()
+            logger.warning(f"Slow query on {role} ({elapsed_ms:.0f} ms): {statement[:500]}")
+
 
 # Create engine with connection pooling
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.log_level == "DEBUG"
-)
+engine = _make_engine(settings.database_url, "primary")
+
+# Read-only paths use the replica when configured, otherwise the primary
+read_engine = _make_engine(settings.database_replica_url, "replica") if settings.database_replica_url else engine
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create Base class
 Base = declarative_base()
@@ -27,6 +105,30 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency to get a read-only session, routed to the replica when configured"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def warm_pool(size: int):
+    """Open up to size pooled connections so the first requests skip connect latency"""
+    for target_engine in {engine, read_engine}:
+        connections = []
+        try:
+            for _ in range(size):
+                connection = target_engine.connect()
+                connection.execute(text("SELECT 1"))
+                connections.append(connection)
+        finally:
+            # Returned connections stay open in the pool
+            for connection in connections:
+                connection.close()
+
+
 def create_tables():
     """Create all tables"""
     Base.metadata.create_all(bind=engine)
@@ -34,4 +136,4 @@ def create_tables():
 
 def drop_tables():
     """Drop all tables"""
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import orjson
+
+from .config import settings
+from .metrics import IDEMPOTENCY_REQUESTS
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+
+
+class IdempotencyConflict(Exception):
+    """The Idempotency-Key was already used for a different request body"""
+
+
+class IdempotencyInProgress(Exception):
+    """The original request for this key is still running after the wait timeout"""
+
+
+def request_fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key handling with single-flight semantics.
+
+    The first request for a key claims it (SET NX in Redis) and runs the
+    action; concurrent duplicates in the same process await the same future,
+    and duplicates on other workers/pods poll the stored record. Successful
+    results are kept for the TTL and replayed. Failures release the key so a
+    retry can run again. While Redis is unreachable, keys are claimed in the
+    in-process store instead, so deduplication narrows to this worker rather
+    than failing the request. The in-process store holds at most
+    max_local_entries records; expired ones are swept on every write and
+    the least recently written are evicted beyond that.
+    """
+
+    def __init__(self, ttl: int, lock_ttl: int, wait_timeout: float, use_redis: bool = True,
+                 max_local_entries: int = 10000):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.use_redis = use_redis
+        self.max_local_entries = max_local_entries
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Oldest write first, so expired and evicted records come off the front
+        self._local: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        # Keys claimed in _local because Redis failed at claim time
+        self._local_keys: Set[str] = set()
+
+    async def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        action: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Run action once per key; returns (result, replayed)"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            IDEMPOTENCY_REQUESTS.labels("coalesced").inc()
+            stored_fingerprint, result = await asyncio.shield(inflight)
+            self._check_fingerprint(stored_fingerprint, fingerprint)
+            return result, True
+
+        record = await self._claim(key, fingerprint)
+        if record is not None:
+            self._check_fingerprint(record["fp"], fingerprint)
+            if record["state"] == PENDING:
+                record = await self._wait_for(key)
+            IDEMPOTENCY_REQUESTS.labels("replayed").inc()
+            return record["response"], True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await action()
+        except BaseException as e:
+            await self._release(key)
+            if isinstance(e, Exception):
+                # Waiters re-raise the same error; mark it retrieved for the owner
+                future.set_exception(e)
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        else:
+            await self._store(key, {"state": DONE, "fp": fingerprint, "response": result})
+            future.set_result((fingerprint, result))
+            IDEMPOTENCY_REQUESTS.labels("executed").inc()
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str):
+        if stored != fingerprint:
+            IDEMPOTENCY_REQUESTS.labels("conflict").inc()
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+
+    async def _claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Claim key for this request; returns the existing record if already claimed"""
+        pending = {"state": PENDING, "fp": fingerprint}
+        # A key claimed locally during an outage stays local until it expires
+        if self.use_redis and key not in self._local_keys:
+            try:
+                redis = get_redis()
+                # SET NX and GET in one round trip; GET sees our own value if we won
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.set(key, orjson.dumps(pending), nx=True, px=self.lock_ttl * 1000)
+                    pipe.get(key)
+                    claimed, value = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Idempotency backend unavailable, deduplicating in this process only: {e}")
+            else:
+                if claimed:
+                    return None
+                return orjson.loads(value) if value else None
+
+        record = self._get_local(key)
+        if record is None:
+            self._set_local(key, pending, self.lock_ttl)
+            if self.use_redis:
+                self._local_keys.add(key)
+        return record
+
+    async def _wait_for(self, key: str) -> dict:
+        """Poll until the owning request finishes, with capped backoff"""
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            record = await self._get(key)
+            if record is None:
+                # Owner failed and released the key; let the client retry
+                break
+            if record["state"] == DONE:
+                return record
+        raise IdempotencyInProgress("A request with this Idempotency-Key is still in progress")
+
+    def _is_local(self, key: str) -> bool:
+        return not self.use_redis or key in self._local_keys
+
+    async def _get(self, key: str) -> Optional[dict]:
+        if self._is_local(key):
+            return self._get_local(key)
+        try:
+            value = await get_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Idempotency backend unavailable while waiting, using local record: {e}")
+            return self._get_local(key)
+        return orjson.loads(value) if value else None
+
+    async def _store(self, key: str, record: dict):
+        if self._is_local(key):
+            self._set_local(key, record, self.ttl)
+            return
+        try:
+            await get_redis().set(key, orjson.dumps(record), px=self.ttl * 1000)
+        except Exception as e:
+            # The response was produced; failing to cache it only loses replay
+            logger.warning(f"Failed to store idempotent response: {e}")
+
+    async def _release(self, key: str):
+        if self._is_local(key):
+            self._local.pop(key, None)
+            self._local_keys.discard(key)
+            return
+        try:
+            await get_redis().delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to release idempotency key: {e}")
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            self._local_keys.discard(key)
+            return None
+        return record
+
+    def _set_local(self, key: str, record: dict, ttl: int):
+        now = time.monotonic()
+        self._local[key] = (now + ttl, record)
+        self._local.move_to_end(key)
+        # Write order roughly follows expiry (only two TTLs), so the sweep stops at the first live record
+        while self._local:
+            oldest, (expires_at, _) = next(iter(self._local.items()))
+            if expires_at >= now and len(self._local) <= self.max_local_entries:
+                break
+            del self._local[oldest]
+            self._local_keys.discard(oldest)
+
+
+def idempotency_key_for(api_key: str, idempotency_key: str) -> str:
+    """Keys are scoped per API key so tenants cannot collide or read each other's results"""
+    tenant = hashlib.blake2b(api_key.encode(), digest_size=12).hexdigest()
+    return f"idem:{tenant}:{idempotency_key}"
+
+
+# Global instance
+idempotency_store = IdempotencyStore(
+    ttl=settings.idempotency_ttl,
+    lock_ttl=settings.idempotency_lock_ttl,
+    wait_timeout=settings.idempotency_wait_timeout,
+    use_redis=settings.idempotency_storage == "redis",
+    max_local_entries=settings.idempotency_local_max_entries
+)
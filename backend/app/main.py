@@ -1,9 +1,7 @@
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+import asyncio
 import logging
-import time
 from contextlib import asynccontextmanager
 
 from .config import settings
@@ -12,6 +10,11 @@ from .routes.tickets import router as tickets_router
 from .routes.admin import router as admin_router
 from .routes.health import router as health_router
 from .middleware import setup_middleware
+from .warmup import warm_up
+from .services.ai_service import ai_service
+from .services.jobs import build_job_scheduler
+from .redis_client import close_redis
+from .audit import audit_logger
 
 
 # Configure logging
@@ -27,13 +30,33 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting Solution AI Ticket Triage SaaS")
-    create_tables()
-    logger.info("Database tables created/verified")
+    if settings.auto_create_tables:
+        create_tables()
+        logger.info("Database tables created/verified")
+
+    # Readiness flips once pools are warm; startup itself does not wait
+    warmup_task = asyncio.create_task(warm_up())
+
+    # Retention, log cleanup, quota resets and metrics snapshots; one process runs them
+    job_scheduler = build_job_scheduler() if settings.jobs_enabled else None
+    if job_scheduler:
+        job_scheduler.start()
+
+    if settings.audit_enabled:
+        audit_logger.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down Solution AI Ticket Triage SaaS")
+    warmup_task.cancel()
+    if job_scheduler:
+        await job_scheduler.stop()
+    if settings.audit_enabled:
+        # Drains the buffer so events recorded during shutdown are kept
+        await audit_logger.stop()
+    await ai_service.close()
+    await close_redis()
 
 
 # Create FastAPI application
@@ -42,6 +65,7 @@ app = FastAPI(
     description=settings.description,
     version=settings.version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json"
@@ -60,7 +84,7 @@ app.include_router(health_router)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -70,17 +94,8 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time header to all responses"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-
 if __name__ == "__main__":
+    # Development server; production runs gunicorn with gunicorn.conf.py
     import uvicorn
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,158 @@
+import os
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "handler", "status"])
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "handler"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+# AI provider output handling
+CLASSIFICATION_PARSE = Counter(
+    "classification_parse_total",
+    "Provider classification outputs by parse outcome (ok, repaired, failed)",
+    ["provider", "model", "outcome"]
+)
+CLASSIFICATION_COALESCED = Counter(
+    "classification_coalesced_total",
+    "Classifications served by joining an identical in-flight provider call"
+)
+LLM_ROUTING_DECISIONS = Counter(
+    "llm_routing_decisions_total",
+    "First-choice provider per classification by routing policy",
+    ["policy", "provider"]
+)
+LLM_PROVIDER_LATENCY = Histogram(
+    "llm_provider_latency_seconds",
+    "Provider call latency including any repair retry",
+    ["provider", "model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+)
+CASCADE_RESOLVED = Counter(
+    "llm_cascade_resolved_total",
+    "Classifications whose answer was kept at each cascade tier",
+    ["tier"]
+)
+CASCADE_ESCALATIONS = Counter(
+    "llm_cascade_escalations_total",
+    "Classifications passed on from a cascade tier (low_confidence, parse_failed, error)",
+    ["tier", "reason"]
+)
+CASCADE_TIER_LATENCY = Histogram(
+    "llm_cascade_tier_latency_seconds",
+    "Provider call latency per cascade tier",
+    ["tier"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+)
+
+
+# LLM scheduler
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time classification requests wait for a provider slot",
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "Provider calls currently in flight", multiprocess_mode="livesum")
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth", "Classification requests waiting for a provider slot", multiprocess_mode="livesum"
+)
+LLM_SHED = Counter("llm_shed_total", "Classification requests rejected with 429", ["reason"])
+
+
+# Database
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["role"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Connection checkouts that hit pool_timeout", ["role"])
+DB_POOL_IN_USE = Gauge("db_pool_in_use", "Checked-out database connections", ["role"], multiprocess_mode="livesum")
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "Queries slower than DB_SLOW_QUERY_MS", ["role"])
+
+
+# Rate limiting
+RATE_LIMITED = Counter("rate_limited_total", "Requests rejected by the rate limiter", ["route"])
+RATE_LIMIT_BACKEND_ERRORS = Counter(
+    "rate_limit_backend_errors_total", "Rate limit checks that fell back to the local bucket"
+)
+
+
+# Idempotency
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key by outcome (executed, coalesced, replayed, conflict)",
+    ["outcome"]
+)
+
+
+# Audit trail
+AUDIT_EVENTS = Counter(
+    "audit_events_total",
+    "Audit events by outcome (queued, sampled_out, dropped)",
+    ["outcome"]
+)
+AUDIT_BUFFER_DEPTH = Gauge(
+    "audit_buffer_depth", "Audit events waiting to be written", multiprocess_mode="livesum"
+)
+AUDIT_FLUSH_DURATION = Histogram(
+    "audit_flush_duration_seconds",
+    "Time to write one batch of audit events",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+AUDIT_FLUSH_ERRORS = Counter("audit_flush_errors_total", "Audit batches that failed to write and were requeued")
+
+
+# Periodic jobs
+JOB_RUNS = Counter(
+    "scheduled_job_runs_total",
+    "Periodic job runs by outcome (ok, failed, skipped while still running)",
+    ["job", "outcome"]
+)
+JOB_DURATION = Histogram(
+    "scheduled_job_duration_seconds",
+    "Periodic job run time",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+)
+JOB_LAST_SUCCESS = Gauge(
+    "scheduled_job_last_success_timestamp_seconds",
+    "Unix time of the last successful run of each periodic job",
+    ["job"],
+    multiprocess_mode="max"
+)
+JOB_LEADER = Gauge(
+    "scheduled_jobs_leader",
+    "1 while this process holds the periodic job leader lock",
+    multiprocess_mode="livesum"
+)
+
+
+def render_metrics() -> bytes:
+    """Render all registered metrics in the Prometheus text format"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Running under gunicorn: merge the samples written by every worker
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+__all__ = [
+    "HTTP_REQUESTS", "HTTP_REQUEST_DURATION",
+    "CLASSIFICATION_PARSE", "CLASSIFICATION_COALESCED", "LLM_ROUTING_DECISIONS", "LLM_PROVIDER_LATENCY",
+    "CASCADE_RESOLVED", "CASCADE_ESCALATIONS", "CASCADE_TIER_LATENCY",
+    "LLM_QUEUE_WAIT", "LLM_IN_FLIGHT", "LLM_QUEUE_DEPTH", "LLM_SHED",
+    "DB_POOL_CHECKOUT_WAIT", "DB_POOL_TIMEOUTS", "DB_POOL_IN_USE", "DB_SLOW_QUERIES",
+    "RATE_LIMITED", "RATE_LIMIT_BACKEND_ERRORS",
+    "IDEMPOTENCY_REQUESTS",
+    "AUDIT_EVENTS", "AUDIT_BUFFER_DEPTH", "AUDIT_FLUSH_DURATION", "AUDIT_FLUSH_ERRORS",
+    "JOB_RUNS", "JOB_DURATION", "JOB_LAST_SUCCESS", "JOB_LEADER",
+    "CONTENT_TYPE_LATEST", "render_metrics"
+]
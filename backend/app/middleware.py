@@ -1,21 +1,89 @@
+from contextvars import ContextVar
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
+import time
+import uuid
 
 from .config import settings
+from .metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION
+from .rate_limit import (
+    EXEMPT_PREFIXES, RateLimiter, build_rate_limiter, rate_limit_headers, request_identity, send_rate_limited
+)
 
 logger = logging.getLogger(__name__)
 
+# Request ID for the current request, available to any code running inside it
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestContextMiddleware:
+    """
+    Single pure-ASGI layer for the per-request cross-cutting concerns:
+    request ID, rate limiting, timing header and HTTP metrics.
+
+    Only the response start message is touched (to add headers); bodies are
+    passed through unbuffered, unlike BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request = Request(scope)
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        extra_headers = [(b"x-request-id", request_id.encode())]
+        status_code = 500
+
+        try:
+            if not scope["path"].startswith(EXEMPT_PREFIXES):
+                result = await self.limiter.hit(request_identity(request), scope["method"], scope["path"])
+                extra_headers += rate_limit_headers(result)
+                if not result.allowed:
+                    status_code = 429
+                    await send_rate_limited(send, result, extra_headers)
+                    return
+
+            async def send_wrapper(message: Message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    process_time = time.perf_counter() - start_time
+                    message["headers"] = list(message.get("headers", [])) + extra_headers + [
+                        (b"x-process-time", f"{process_time:.6f}".encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+            endpoint = scope.get("endpoint")
+            handler = endpoint.__name__ if endpoint else "unmatched"
+            HTTP_REQUESTS.labels(scope["method"], handler, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(scope["method"], handler).observe(time.perf_counter() - start_time)
+
 
 def setup_middleware(app: FastAPI):
     """Setup all middleware for the FastAPI application"""
 
-    # CORS middleware
+    # Request context: request ID, rate limiting (per API key, shared via Redis),
+    # timing header and metrics in one pure-ASGI layer
+    limiter = build_rate_limiter()
+    app.state.limiter = limiter
+    app.add_middleware(RequestContextMiddleware, limiter=limiter)
+
+    # CORS middleware (outermost, so preflight requests are answered before rate limiting)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # In production, specify exact domains
@@ -24,17 +92,4 @@ def setup_middleware(app: FastAPI):
         allow_headers=["*"],
     )
 
-    # Trusted host middleware (security)
-    if not settings.log_level == "DEBUG":
-        app.add_middleware(
-            TrustedHostMiddleware,
-            allowed_hosts=["*"]  # Configure for production
-        )
-
-    # Rate limiting middleware
-    limiter = Limiter(key_func=get_remote_address)
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
-
-    logger.info("Middleware setup completed")
\ No newline at end of file
+    logger.info("Middleware setup completed")
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Text, Boolean, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import (
+    Column, Integer, String, Float, DateTime, Date, Text, Boolean, ForeignKey, Index, LargeBinary,
+    DDL, event, func, literal_column
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-Base = declarative_base()
+from .database import Base
 
 
 class User(Base):
@@ -38,7 +40,31 @@ class ApiKey(Base):
 
     # Relationships
     user = relationship("User", back_populates="api_keys")
-    tickets = relationship("Ticket", back_populates="api_key_rel")
+    # Tickets store the key string rather than a foreign key to api_keys.id
+    tickets = relationship(
+        "Ticket", back_populates="api_key_rel", primaryjoin="ApiKey.key == foreign(Ticket.api_key)"
+    )
+
+    __table_args__ = (
+        # Key lookups and active-key counts only ever touch active keys
+        Index("ix_api_keys_active_key", "key", postgresql_where=(is_active == True)),
+    )
+
+
+def ticket_search_document(ticket_text, summary):
+    """
+    Text that ticket search matches against: the ticket body and its summary.
+
+    Queries must build it with this function, with literal SQL constants
+    rather than bound parameters, so PostgreSQL can match them to the
+    expression indexes below.
+    """
+    return ticket_text + literal_column("' '") + func.coalesce(summary, literal_column("''"))
+
+
+def ticket_search_vector(ticket_text, summary):
+    # The two-argument to_tsvector is immutable, which expression indexes require
+    return func.to_tsvector(literal_column("'english'::regconfig"), ticket_search_document(ticket_text, summary))
 
 
 class Ticket(Base):
@@ -50,16 +76,47 @@ class Ticket(Base):
     confidence = Column(Float, nullable=False)
     summary = Column(Text)
     user_id = Column(Integer, ForeignKey("users.id"))
-    api_key = Column(String, index=True)
+    api_key = Column(String)
     source = Column(String, default="api")  # api, webhook, manual
     status = Column(String, default="processed")  # processed, pending, failed
     processing_time = Column(Float)  # in seconds
+    original_tokens = Column(Integer)  # ticket text before preprocessing
+    prompt_tokens = Column(Integer)  # ticket text actually sent to the provider
+    # Provider call that produced the classification, for cost/latency analytics
+    provider = Column(String)  # openai, anthropic, fallback
+    model = Column(String)
+    prompt_version = Column(String)
+    input_tokens = Column(Integer)  # provider-reported, whole prompt including instructions
+    output_tokens = Column(Integer)
+    cost_usd = Column(Float)
+    provider_ttfb = Column(Float)  # seconds until the provider's first response bytes
+    provider_latency = Column(Float)  # seconds for the provider call(s), including any repair
+    cascade_tier = Column(Integer)  # 1-based tier that answered when LLM_CASCADE is on; tokens, cost and latency cover all tiers tried
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="tickets")
-    api_key_rel = relationship("ApiKey", back_populates="tickets")
+    api_key_rel = relationship(
+        "ApiKey", back_populates="tickets", primaryjoin="foreign(Ticket.api_key) == ApiKey.key"
+    )
+
+    __table_args__ = (
+        # /recent and per-key stats; also serves plain api_key lookups
+        Index("ix_tickets_api_key_created_at", "api_key", created_at.desc()),
+        # Retention deletes and time-bucketed analytics
+        Index("ix_tickets_created_at", "created_at"),
+        # /admin/tickets/search: full-text match, and trigram for substring fallback
+        Index(
+            "ix_tickets_search_vector", ticket_search_vector(ticket_text, summary), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_tickets_search_trigram",
+            ticket_search_document(ticket_text, summary).label("search_document"),
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
 
 
 class WebhookLog(Base):
@@ -67,12 +124,31 @@ class WebhookLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     provider = Column(String, nullable=False)  # zendesk, intercom, jira
-    payload = Column(Text)
-    response = Column(Text)
+    # Bodies live in webhook_payloads; see app/services/webhook_payloads.py
+    payload_hash = Column(String(64), ForeignKey("webhook_payloads.hash"), nullable=True)
+    response_hash = Column(String(64), ForeignKey("webhook_payloads.hash"), nullable=True)
     status_code = Column(Integer)
     processing_time = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_webhook_logs_provider_created_at", "provider", "created_at"),
+        Index("ix_webhook_logs_payload_hash", "payload_hash"),
+        Index("ix_webhook_logs_response_hash", "response_hash"),
+    )
+
+
+class WebhookPayload(Base):
+    __tablename__ = "webhook_payloads"
+
+    hash = Column(String(64), primary_key=True)  # sha256 of the uncompressed body
+    encoding = Column(String, nullable=False)  # gzip
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every deduplicated write, so garbage collection spares bodies still being referenced
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -90,6 +166,11 @@ class AuditLog(Base):
     # Relationships
     user = relationship("User")
 
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), newest first
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+    )
+
 
 class SystemMetrics(Base):
     __tablename__ = "system_metrics"
@@ -98,4 +179,10 @@ class SystemMetrics(Base):
     metric_name = Column(String, nullable=False)
     metric_value = Column(Float)
     tags = Column(Text)  # JSON string
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# gin_trgm_ops for ix_tickets_search_trigram
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
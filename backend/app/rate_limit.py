@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import orjson
+from starlette.requests import Request
+from starlette.types import Send
+
+from .auth import get_client_ip
+from .config import settings
+from .metrics import RATE_LIMITED, RATE_LIMIT_BACKEND_ERRORS
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never rate limited (probes, scraping, docs)
+EXEMPT_PREFIXES = ("/health", "/api/docs", "/api/redoc", "/api/openapi.json")
+
+# GCRA in a single round trip. Uses the Redis clock so pods with skewed
+# clocks share one timeline. Returns {allowed, remaining, retry_after_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+local diff = new_tat - now
+if diff > period then
+    return {0, 0, math.ceil(diff - period)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(diff))
+return {1, math.floor((period - diff) / interval), 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    limit: int
+    window: int  # seconds
+
+    @property
+    def period_ms(self) -> float:
+        return self.window * 1000.0
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period_ms / self.limit
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds
+
+
+def parse_route_limits(spec: str) -> Dict[str, RateLimit]:
+    """
+    Parse "METHOD /path=limit/window_seconds" entries separated by commas.
+
+    An entry of "/prefix/*" without a method covers every route under the
+    prefix. Example: "POST /api/v1/triage=60/60,GET /api/v1/stats=30/60,/admin/*=300/60"
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, rate = entry.rpartition("=")
+        limit, _, window = rate.partition("/")
+        limits[route.strip()] = RateLimit(int(limit), int(window))
+    return limits
+
+
+class RateLimiter:
+    """
+    Generic cell rate algorithm (GCRA) limiter keyed on API key.
+
+    GCRA gives sliding-window semantics with O(1) state per key: a single
+    theoretical-arrival-time value. State lives in Redis so every worker and
+    pod shares the same buckets; if Redis is unreachable the limiter falls
+    back to a per-process bucket rather than failing requests.
+    """
+
+    def __init__(self, default: RateLimit, routes: Dict[str, RateLimit], use_redis: bool = True):
+        self.default = default
+        self.routes = routes
+        # Longest prefix first, so the most specific one wins
+        self.prefixes = sorted(
+            ((route[:-1], route) for route in routes if route.endswith("*")), key=lambda item: -len(item[0])
+        )
+        self.use_redis = use_redis
+        self._script = None
+        self._local: Dict[str, float] = {}
+
+    def limit_for(self, method: str, path: str) -> Tuple[str, RateLimit]:
+        route = f"{method} {path}"
+        if route in self.routes:
+            return route, self.routes[route]
+        for prefix, route in self.prefixes:
+            if path.startswith(prefix):
+                return route, self.routes[route]
+        return "default", self.default
+
+    async def hit(self, identity: str, method: str, path: str) -> RateLimitResult:
+        route, rate = self.limit_for(method, path)
+        key = f"rl:{route}:{identity}"
+        if not self.use_redis:
+            allowed, remaining, retry_after_ms = self._hit_local(key, rate)
+        else:
+            try:
+                allowed, remaining, retry_after_ms = await self._hit_redis(key, rate)
+            except Exception as e:
+                RATE_LIMIT_BACKEND_ERRORS.inc()
+                logger.warning(f"Rate limit backend unavailable, using local bucket: {e}")
+                allowed, remaining, retry_after_ms = self._hit_local(key, rate)
+
+        if not allowed:
+            RATE_LIMITED.labels(route).inc()
+        return RateLimitResult(bool(allowed), rate.limit, int(remaining), retry_after_ms / 1000.0)
+
+    async def _hit_redis(self, key: str, rate: RateLimit):
+        if self._script is None:
+            self._script = get_redis().register_script(GCRA_SCRIPT)
+        # EVALSHA: one round trip per request, script source sent only on a cache miss
+        return await self._script(keys=[key], args=[rate.interval_ms, rate.period_ms])
+
+    def _hit_local(self, key: str, rate: RateLimit):
+        now = time.time() * 1000
+        tat = max(self._local.get(key, now), now)
+        new_tat = tat + rate.interval_ms
+        diff = new_tat - now
+        if diff > rate.period_ms:
+            return 0, 0, diff - rate.period_ms
+        self._local[key] = new_tat
+        return 1, int((rate.period_ms - diff) // rate.interval_ms), 0
+
+
+def request_identity(request: Request) -> str:
+    """
+    Bucket identity: the API key when it is a known one, otherwise the real client IP.
+
+    Unknown keys fall back to the IP, so a client cannot get a fresh bucket
+    by sending a new made-up key on every request.
+    """
+    api_key = request.headers.get("X-Api-Key")
+    if api_key and api_key in settings.allowed_api_keys:
+        # Never put raw keys into Redis key names
+        return "key:" + hashlib.blake2b(api_key.encode(), digest_size=12).hexdigest()
+    return "ip:" + get_client_ip(request)
+
+
+def rate_limit_headers(result: RateLimitResult) -> list:
+    return [
+        (b"x-ratelimit-limit", str(result.limit).encode()),
+        (b"x-ratelimit-remaining", str(result.remaining).encode()),
+    ]
+
+
+async def send_rate_limited(send: Send, result: RateLimitResult, headers: list):
+    body = orjson.dumps({"detail": "Rate limit exceeded"})
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": headers + [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(result.retry_after + 0.999))).encode()),
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_rate_limiter() -> RateLimiter:
+    return RateLimiter(
+        default=RateLimit(settings.rate_limit_requests, settings.rate_limit_window),
+        routes=parse_route_limits(settings.rate_limit_routes),
+        use_redis=settings.rate_limit_storage == "redis"
+    )
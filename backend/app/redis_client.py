@@ -0,0 +1,30 @@
+import logging
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+def get_redis():
+    """Shared asyncio Redis client, created on first use"""
+    global _redis
+    if _redis is None:
+        import redis.asyncio as redis
+        _redis = redis.Redis.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            health_check_interval=30
+        )
+    return _redis
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
@@ -1,78 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta
 import logging
 
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, get_read_db
+from ..audit import audit_logger, list_audit_logs
 from ..auth import validate_admin_key
-from ..models import Ticket, ApiKey, WebhookLog, AuditLog
-from ..schemas import WebhookLogResponse, ApiKeyResponse
+from ..models import Ticket, ApiKey, WebhookLog
+from ..schemas import (
+    WebhookLogResponse, WebhookBodies, ApiKeyResponse, TicketListItem, TicketSearchPage, UsageBucket, CascadeTier,
+    AuditLogPage
+)
+from ..serialization import rows_response, rows_to_dicts
+from ..services.maintenance import cleanup_logs
 from ..services.ticket_service import TicketService
+from ..services.webhook_payloads import load_webhook_bodies
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 logger = logging.getLogger(__name__)
 
 
-@router.get("/tickets", dependencies=[Depends(validate_admin_key)])
+TICKET_LIST_FIELDS = ("id", "ticket_text", "label", "confidence", "api_key", "created_at", "processing_time")
+API_KEY_FIELDS = ("key", "customer_id", "rate_limit", "requests_today", "is_active")
+WEBHOOK_LOG_FIELDS = (
+    "id", "provider", "status_code", "processing_time", "created_at", "payload_hash", "response_hash"
+)
+AUDIT_LOG_FIELDS = (
+    "id", "created_at", "user_id", "action", "resource", "resource_id", "details", "ip_address", "user_agent"
+)
+USAGE_FIELDS = (
+    "bucket", "provider", "model", "prompt_version", "tickets", "avg_ttfb",
+    "p50_latency", "p95_latency", "input_tokens", "output_tokens", "cost_usd"
+)
+
+
+@router.get("/tickets", response_model=List[TicketListItem], dependencies=[Depends(validate_admin_key)])
 async def get_all_tickets(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all tickets (admin only)"""
-    tickets = db.query(Ticket).offset(skip).limit(limit).all()
-    return [
-        {
-            "id": t.id,
-            "ticket_text": t.ticket_text[:100] + "..." if len(t.ticket_text) > 100 else t.ticket_text,
-            "label": t.label,
-            "confidence": t.confidence,
-            "api_key": t.api_key,
-            "created_at": t.created_at.isoformat(),
-            "processing_time": t.processing_time
-        }
-        for t in tickets
-    ]
-
-
-@router.get("/api-keys", dependencies=[Depends(validate_admin_key)])
-async def get_all_api_keys(db: Session = Depends(get_db)):
-    """Get all API keys (admin only)"""
-    api_keys = db.query(ApiKey).all()
-    return [
-        ApiKeyResponse(
-            key=k.key,
-            customer_id=k.customer_id,
-            rate_limit=k.rate_limit,
-            requests_today=k.requests_today,
-            is_active=k.is_active
+    ticket_service = TicketService(db)
+    rows = ticket_service.get_ticket_listing_rows(skip, limit)
+    return rows_response(rows, TICKET_LIST_FIELDS)
+
+
+@router.get("/tickets/search", response_model=TicketSearchPage, dependencies=[Depends(validate_admin_key)])
+async def search_tickets(
+    q: str,
+    match: str = "auto",
+    label: Optional[str] = None,
+    api_key: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search ticket text and summaries, newest first (admin only).
+
+    match is auto (full text, falling back to substring when nothing
+    matches), fulltext or substring. Filters combine with the search;
+    pass next_cursor back as cursor for the next page.
+    """
+    try:
+        rows, next_cursor, used = TicketService(db).search_ticket_rows(
+            q, match, label, api_key, min_confidence, max_confidence, since, until, cursor, min(limit, 200)
         )
-        for k in api_keys
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(
+        content={"items": rows_to_dicts(rows, TICKET_LIST_FIELDS), "next_cursor": next_cursor, "match": used}
+    )
 
 
-@router.get("/webhook-logs", dependencies=[Depends(validate_admin_key)])
+@router.get("/api-keys", response_model=List[ApiKeyResponse], dependencies=[Depends(validate_admin_key)])
+async def get_all_api_keys(db: Session = Depends(get_read_db)):
+    """Get all API keys (admin only)"""
+    rows = db.query(
+        ApiKey.key,
+        ApiKey.customer_id,
+        ApiKey.rate_limit,
+        ApiKey.requests_today,
+        ApiKey.is_active
+    ).all()
+    return rows_response(rows, API_KEY_FIELDS)
+
+
+@router.post("/api-keys/{api_key}/deactivate", dependencies=[Depends(validate_admin_key)])
+async def deactivate_api_key(api_key: str, request: Request, db: Session = Depends(get_db)):
+    """Deactivate an API key (admin only)"""
+    if not TicketService(db).deactivate_api_key(api_key):
+        raise HTTPException(status_code=404, detail="API key not found")
+    audit_logger.record("api_key.deactivate", "api_key", api_key[:8], request=request, critical=True)
+    return {"message": "API key deactivated"}
+
+
+@router.get("/webhook-logs", response_model=List[WebhookLogResponse], dependencies=[Depends(validate_admin_key)])
 async def get_webhook_logs(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    provider: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Get webhook processing logs (admin only)"""
-    logs = db.query(WebhookLog).order_by(WebhookLog.created_at.desc()).offset(skip).limit(limit).all()
-    return [
-        WebhookLogResponse(
-            id=log.id,
-            provider=log.provider,
-            status_code=log.status_code,
-            processing_time=log.processing_time,
-            created_at=log.created_at
-        )
-        for log in logs
-    ]
+    """Get webhook processing logs without their bodies (admin only)"""
+    query = db.query(*(getattr(WebhookLog, field) for field in WEBHOOK_LOG_FIELDS))
+    if provider:
+        query = query.filter(WebhookLog.provider == provider)
+    rows = query.order_by(WebhookLog.created_at.desc()).offset(skip).limit(limit).all()
+    return rows_response(rows, WEBHOOK_LOG_FIELDS)
+
+
+@router.get("/webhook-logs/{log_id}/payload", response_model=WebhookBodies, dependencies=[Depends(validate_admin_key)])
+async def get_webhook_payload(log_id: int, db: Session = Depends(get_read_db)):
+    """Decompressed request and response bodies of one webhook log (admin only)"""
+    bodies = load_webhook_bodies(db, log_id)
+    if bodies is None:
+        raise HTTPException(status_code=404, detail="Webhook log not found")
+    return ORJSONResponse(content=bodies)
 
 
 @router.delete("/old-tickets", dependencies=[Depends(validate_admin_key)])
 async def delete_old_tickets(
+    request: Request,
     days: int = 90,
     db: Session = Depends(get_db)
 ):
@@ -80,11 +137,15 @@ async def delete_old_tickets(
     ticket_service = TicketService(db)
     deleted_count = ticket_service.delete_old_tickets(days)
     logger.info(f"Admin deleted {deleted_count} old tickets")
+    audit_logger.record(
+        "tickets.delete_old", "tickets", details={"days": days, "deleted": deleted_count},
+        request=request, critical=True
+    )
     return {"message": f"Deleted {deleted_count} tickets older than {days} days"}
 
 
 @router.get("/stats", dependencies=[Depends(validate_admin_key)])
-async def get_admin_stats(db: Session = Depends(get_db)):
+async def get_admin_stats(db: Session = Depends(get_read_db)):
     """Get comprehensive admin statistics"""
     # Ticket stats
     total_tickets = db.query(Ticket).count()
@@ -120,28 +181,62 @@ async def get_admin_stats(db: Session = Depends(get_db)):
     }
 
 
-@router.post("/maintenance/cleanup", dependencies=[Depends(validate_admin_key)])
-async def run_maintenance_cleanup(db: Session = Depends(get_db)):
-    """Run maintenance cleanup tasks"""
-    # Clean old audit logs (keep last 1000)
-    old_audit_logs = db.query(AuditLog).order_by(AuditLog.created_at.desc()).offset(1000).all()
-    for log in old_audit_logs:
-        db.delete(log)
-
-    # Clean old webhook logs (keep last 500)
-    old_webhook_logs = db.query(WebhookLog).order_by(WebhookLog.created_at.desc()).offset(500).all()
-    for log in old_webhook_logs:
-        db.delete(log)
+@router.get("/analytics/usage", response_model=List[UsageBucket], dependencies=[Depends(validate_admin_key)])
+async def get_usage_analytics(
+    days: int = 7,
+    bucket: str = "day",
+    api_key: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Provider latency, token usage and cost per provider, model and prompt version over time (admin only)"""
+    since = datetime.utcnow() - timedelta(days=days)
+    try:
+        rows = TicketService(db).get_usage_rows(since, bucket, api_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return rows_response(rows, USAGE_FIELDS)
+
+
+@router.get("/analytics/cascade", response_model=List[CascadeTier], dependencies=[Depends(validate_admin_key)])
+async def get_cascade_analytics(
+    days: int = 7,
+    api_key: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Share of tickets, hit rate, latency and cost per cascade tier (admin only)"""
+    since = datetime.utcnow() - timedelta(days=days)
+    return TicketService(db).get_cascade_report(since, api_key)
 
-    db.commit()
 
-    deleted_audit = len(old_audit_logs)
-    deleted_webhook = len(old_webhook_logs)
+@router.get("/audit-logs", response_model=AuditLogPage, dependencies=[Depends(validate_admin_key)])
+async def get_audit_logs(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    resource: Optional[str] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Audit trail, newest first; pass next_cursor back as cursor for the next page (admin only)"""
+    try:
+        rows, next_cursor = list_audit_logs(db, min(limit, 500), cursor, action, resource, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(content={"items": rows_to_dicts(rows, AUDIT_LOG_FIELDS), "next_cursor": next_cursor})
 
-    logger.info(f"Maintenance cleanup: deleted {deleted_audit} audit logs, {deleted_webhook} webhook logs")
 
-    return {
-        "message": "Maintenance cleanup completed",
+@router.post("/maintenance/cleanup", dependencies=[Depends(validate_admin_key)])
+async def run_maintenance_cleanup(request: Request, db: Session = Depends(get_db)):
+    """Run maintenance cleanup tasks (also scheduled as the log_cleanup job)"""
+    deleted_audit, deleted_webhook, deleted_payloads = cleanup_logs(
+        db, timedelta(days=settings.audit_log_retention_days), settings.webhook_log_keep,
+        timedelta(hours=settings.webhook_payload_grace_hours)
+    )
+    details = {
         "deleted_audit_logs": deleted_audit,
-        "deleted_webhook_logs": deleted_webhook
-    }
\ No newline at end of file
+        "deleted_webhook_logs": deleted_webhook,
+        "deleted_webhook_payloads": deleted_payloads
+    }
+    audit_logger.record("maintenance.cleanup", "logs", details=details, request=request, critical=True)
+
+    return {"message": "Maintenance cleanup completed", **details}
\ No newline at end of file
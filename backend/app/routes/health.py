@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
-import psutil
 import time
 from datetime import datetime
 
 from ..database import get_db
 from ..config import settings
 from ..schemas import HealthCheck, MetricsResponse
+from ..metrics import CONTENT_TYPE_LATEST, render_metrics
+from ..warmup import warmup_state
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -45,6 +46,7 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         db_status = f"unhealthy: {str(e)}"
 
     # System metrics
+    import psutil
     uptime = time.time() - START_TIME
     memory = psutil.virtual_memory()
     cpu_percent = psutil.cpu_percent(interval=1)
@@ -75,6 +77,7 @@ async def get_metrics(db: Session = Depends(get_db)):
         uptime_seconds = int(time.time() - START_TIME)
 
         # Memory usage
+        import psutil
         memory = psutil.virtual_memory()
 
         return MetricsResponse(
@@ -100,6 +103,20 @@ async def get_metrics(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe; reports ready only once DB and provider pools are warm"""
+    if not warmup_state.ready:
+        response.status_code = 503
+    return {"ready": warmup_state.ready, "steps": warmup_state.steps}
+
+
+@router.get("/prometheus")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @router.get("/ping")
 async def ping():
     """Simple ping endpoint"""
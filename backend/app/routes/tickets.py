@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..services.ticket_service import TicketService
+from ..services.scheduler import SchedulerOverloaded
 from ..models import Ticket
-from ..schemas import TicketRequest, TicketResponse, TicketStats
-from ..auth import get_current_api_key
+from ..schemas import TicketRequest, TicketResponse, TicketStats, RecentTicket
+from ..serialization import rows_response, sse_stream
+from ..audit import audited_api_key
+from ..idempotency import (
+    IdempotencyConflict, IdempotencyInProgress, idempotency_key_for, idempotency_store, request_fingerprint
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,8 +22,9 @@ router = APIRouter(prefix="/api/v1", tags=["tickets"])
 @router.post("/triage", response_model=TicketResponse)
 async def triage_ticket(
     request: Request,
+    response: Response,
     ticket: TicketRequest,
-    api_key: str = Depends(get_current_api_key),
+    api_key: str = Depends(audited_api_key),
     db: Session = Depends(get_db)
 ):
     """
@@ -25,20 +32,42 @@ async def triage_ticket(
 
     - **ticket_text**: The text content of the customer ticket
     - **api_key**: Your API key (passed in X-Api-Key header)
+    - **Idempotency-Key** (optional header): retries with the same key replay the
+      first response instead of classifying and billing the ticket again
     """
-    try:
+    async def process() -> dict:
         ticket_service = TicketService(db)
         processed_ticket = await ticket_service.process_ticket(
             ticket_text=ticket.ticket_text,
             api_key=api_key
         )
+        return {
+            "label": processed_ticket.label,
+            "confidence": processed_ticket.confidence,
+            "summary": processed_ticket.summary
+        }
 
-        return TicketResponse(
-            label=processed_ticket.label,
-            confidence=processed_ticket.confidence,
-            summary=processed_ticket.summary
-        )
+    try:
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key:
+            result, replayed = await idempotency_store.execute(
+                idempotency_key_for(api_key, idempotency_key),
+                request_fingerprint(ticket.ticket_text),
+                process
+            )
+            if replayed:
+                response.headers["Idempotent-Replayed"] = "true"
+        else:
+            result = await process()
+
+        return TicketResponse(**result)
 
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except ValueError as e:
         if "Rate limit exceeded" in str(e):
             raise HTTPException(status_code=429, detail=str(e))
@@ -51,11 +80,45 @@ async def triage_ticket(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/recent", response_model=List[dict])
+@router.post("/triage/stream")
+async def triage_ticket_stream(
+    ticket: TicketRequest,
+    api_key: str = Depends(audited_api_key),
+    db: Session = Depends(get_db)
+):
+    """
+    Classify a ticket and stream the result as Server-Sent Events.
+
+    Emits `label` and `confidence` events as soon as the provider has produced
+    them, then a final `result` event with the summary and the saved ticket id.
+    `revised` on the result is true when its label or confidence replaces an
+    earlier event's.
+    """
+    try:
+        events = await TicketService(db).open_ticket_stream(ticket.ticket_text, api_key)
+    except ValueError as e:
+        if "Rate limit exceeded" in str(e):
+            raise HTTPException(status_code=429, detail=str(e))
+        elif "Invalid API key" in str(e):
+            raise HTTPException(status_code=401, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        # Stop proxies buffering the stream and defeating early delivery
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+RECENT_TICKET_FIELDS = ("ticket_text", "label", "confidence", "summary", "timestamp", "processing_time")
+
+
+@router.get("/recent", response_model=List[RecentTicket])
 async def get_recent_tickets(
     request: Request,
-    api_key: str = Depends(get_current_api_key),
-    db: Session = Depends(get_db),
+    api_key: str = Depends(audited_api_key),
+    db: Session = Depends(get_read_db),
     limit: int = 10
 ):
     """
@@ -65,19 +128,8 @@ async def get_recent_tickets(
     """
     try:
         ticket_service = TicketService(db)
-        tickets = ticket_service.get_recent_tickets(api_key, limit)
-
-        return [
-            {
-                "ticket_text": t.ticket_text,
-                "label": t.label,
-                "confidence": t.confidence,
-                "summary": t.summary,
-                "timestamp": t.created_at.isoformat(),
-                "processing_time": t.processing_time
-            }
-            for t in tickets
-        ]
+        rows = ticket_service.get_recent_ticket_rows(api_key, limit)
+        return rows_response(rows, RECENT_TICKET_FIELDS)
 
     except Exception as e:
         logger.error(f"Error fetching recent tickets: {e}")
@@ -87,8 +139,8 @@ async def get_recent_tickets(
 @router.get("/stats", response_model=TicketStats)
 async def get_ticket_stats(
     request: Request,
-    api_key: str = Depends(get_current_api_key),
-    db: Session = Depends(get_db)
+    api_key: str = Depends(audited_api_key),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get statistics for tickets processed with your API key.
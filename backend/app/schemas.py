@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict
 from datetime import datetime
 
@@ -29,6 +29,76 @@ class TicketResponse(BaseModel):
         }
 
 
+class RecentTicket(BaseModel):
+    ticket_text: str
+    label: str
+    confidence: float
+    summary: Optional[str]
+    timestamp: datetime
+    processing_time: Optional[float]
+
+
+class TicketListItem(BaseModel):
+    id: int
+    ticket_text: str
+    label: str
+    confidence: float
+    api_key: Optional[str]
+    created_at: datetime
+    processing_time: Optional[float]
+
+
+class TicketSearchPage(BaseModel):
+    items: List[TicketListItem]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+    match: str = Field(..., description="Matching used: fulltext or substring")
+
+
+class UsageBucket(BaseModel):
+    bucket: datetime
+    provider: Optional[str]
+    model: Optional[str]
+    prompt_version: Optional[str]
+    tickets: int
+    avg_ttfb: Optional[float]
+    p50_latency: Optional[float]
+    p95_latency: Optional[float]
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+
+
+class CascadeTier(BaseModel):
+    tier: int
+    provider: Optional[str]
+    model: Optional[str]
+    tickets: int
+    share: float
+    hit_rate: float
+    avg_confidence: Optional[float]
+    avg_latency: Optional[float]
+    p95_latency: Optional[float]
+    cost_usd: float
+
+
+VALID_LABELS = ("bug", "feature_request", "billing_issue", "other")
+
+
+class ClassificationResult(BaseModel):
+    """Structured output expected from AI providers"""
+    label: str
+    confidence: float
+    summary: str
+
+    @validator("label")
+    def normalize_label(cls, value):
+        return value if value in VALID_LABELS else "other"
+
+    @validator("confidence")
+    def clamp_confidence(cls, value):
+        return max(0.0, min(1.0, value))
+
+
 class TicketStats(BaseModel):
     total_tickets: int = Field(..., description="Total number of tickets processed")
     avg_confidence: float = Field(..., description="Average confidence score")
@@ -52,9 +122,34 @@ class ApiKeyResponse(BaseModel):
 class WebhookLogResponse(BaseModel):
     id: int
     provider: str
-    status_code: int
-    processing_time: float
+    status_code: Optional[int]
+    processing_time: Optional[float]
+    created_at: datetime
+    payload_hash: Optional[str] = Field(None, description="sha256 of the request body; fetch it from /webhook-logs/{id}/payload")
+    response_hash: Optional[str] = Field(None, description="sha256 of the response body")
+
+
+class WebhookBodies(BaseModel):
+    id: int
+    payload: Optional[str]
+    response: Optional[str]
+
+
+class AuditLogItem(BaseModel):
+    id: int
     created_at: datetime
+    user_id: Optional[int]
+    action: str
+    resource: str
+    resource_id: Optional[str]
+    details: Optional[str]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogItem]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
 
 
 class HealthCheck(BaseModel):
@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Sequence, Tuple
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def rows_to_dicts(rows: Iterable[Sequence[Any]], fields: Sequence[str]) -> list:
+    """Map SQL result tuples onto dicts keyed by the given field names"""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def rows_response(rows: Iterable[Sequence[Any]], fields: Sequence[str], status_code: int = 200) -> ORJSONResponse:
+    """
+    Serialise SQL result tuples straight to a JSON response.
+
+    Returning a Response bypasses FastAPI's response_model validation, so
+    rows are encoded once by orjson instead of being turned into ORM
+    objects, then Pydantic models, then jsonable dicts.
+    """
+    return ORJSONResponse(content=rows_to_dicts(rows, fields), status_code=status_code)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (created_at, id) position"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor this API did not issue"""
+    try:
+        created_at, _, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode {"event": name, ...} dicts as Server-Sent Events frames"""
+    async for event in events:
+        name = event.pop("event")
+        yield b"event: " + name.encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
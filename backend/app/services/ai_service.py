@@ -1,26 +1,29 @@
+import asyncio
+import hashlib
 import time
 import logging
-from typing import Dict, Any, Optional
-import openai
-import anthropic
-from ..config import settings
+from contextvars import ContextVar
+from typing import AsyncContextManager, AsyncIterator, Dict, Any, List, Optional, Callable, Tuple
+import httpx
+import orjson
+from ..metrics import (
+    CLASSIFICATION_PARSE, CLASSIFICATION_COALESCED,
+    CASCADE_RESOLVED, CASCADE_ESCALATIONS, CASCADE_TIER_LATENCY
+)
+from ..schemas import ClassificationResult, VALID_LABELS
+from .cascade import build_cascade
+from .prompt_preprocessor import prompt_preprocessor
+from .providers import Provider, build_registry
+from .routing import build_router
+from .stream_parser import IncrementalJSONFields
 
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever CLASSIFY_PROMPT or REPAIR_PROMPT changes; stored on every ticket
+PROMPT_VERSION = "v1"
 
-class AIService:
-    def __init__(self):
-        openai.api_key = settings.openai_api_key
-        self.anthropic_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-
-    async def classify_ticket(self, ticket_text: str) -> Dict[str, Any]:
-        """
-        Classify ticket using AI with failover
-        """
-        start_time = time.time()
-
-        prompt = f"""Classify this customer support ticket and provide a summary.
+CLASSIFY_PROMPT = """Classify this customer support ticket and provide a summary.
 
 Ticket: {ticket_text}
 
@@ -35,84 +38,446 @@ Respond with valid JSON:
 
 Strict JSON only."""
 
-        try:
-            # Try OpenAI first
-            response = await openai.ChatCompletion.acreate(
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-                temperature=0.1
+REPAIR_PROMPT = """Your previous reply could not be parsed ({error}):
+
+{output}
+
+Return only the corrected JSON object with keys "label", "confidence" and "summary"."""
+REPAIR_MAX_OUTPUT_CHARS = 2000
+REPAIR_MAX_TOKENS = 150
+
+# perf_counter timestamps of provider responses (headers received) in the current call
+_response_times: ContextVar[Optional[List[float]]] = ContextVar("provider_response_times", default=None)
+
+
+class MalformedOutput(ValueError):
+    """A provider's output stayed unparseable after the repair retry; usage is what those calls cost"""
+
+    def __init__(self, message: str, usage: Dict[str, Any]):
+        super().__init__(message)
+        self.usage = usage
+
+
+def classification_key(ticket_text: str) -> str:
+    """Hash of the ticket text with case and whitespace differences removed"""
+    normalized = " ".join(ticket_text.split()).casefold()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+class AIService:
+    def __init__(self):
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Providers come from LLM_PROVIDERS; SDK clients are created on first use
+        self.registry = build_registry(lambda: self.http_client)
+        self.router = build_router(self.registry)
+        # Cheapest-first escalation from LLM_CASCADE; None routes every ticket by policy
+        self.cascade = build_cascade(self.registry)
+        # Provider calls currently running, keyed by classification_key, with whether their usage was handed out
+        self._in_flight: Dict[str, Tuple[asyncio.Task, List[bool]]] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Connection pool shared by all remote providers"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                event_hooks={"response": [self._record_response_time]}
             )
+        return self._http_client
+
+    @staticmethod
+    async def _record_response_time(response: httpx.Response):
+        # Response hooks fire once headers arrive, before the body is read
+        times = _response_times.get()
+        if times is not None:
+            times.append(time.perf_counter())
+
+    async def warm_up(self):
+        """Import provider SDKs and open pooled connections before traffic arrives"""
+        for provider in self.registry.enabled():
+            url = provider.base_url
+            if not url:
+                continue
+            try:
+                # Any response will do; the point is an established TLS connection in the pool
+                await self.http_client.head(url, timeout=5.0)
+            except httpx.HTTPError as e:
+                logger.warning(f"Provider warm-up failed for {url}: {e}")
+
+    async def close(self):
+        for provider in self.registry:
+            await provider.close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+    async def classify_ticket(
+        self,
+        ticket_text: str,
+        preprocess: bool = True,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+        api_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Classify ticket using AI, trying providers in routed order.
+
+        Concurrent calls for the same normalized text share one provider call,
+        whichever API key they come from (unless the key is pinned to a
+        provider). Only the call that starts the provider request enters
+        slot(); the others just wait for its result. The tokens and cost of
+        the shared call go to the first caller to receive it; the rest get
+        zero, so summing usage over the saved tickets counts the call once.
+        """
+        key = f"{self.router.pinned(api_key) or ''}:{classification_key(ticket_text)}"
+        entry = self._in_flight.get(key)
+        if entry is not None:
+            CLASSIFICATION_COALESCED.inc()
+            task, claimed = entry
+        else:
+            task = asyncio.ensure_future(self._classify_in_slot(ticket_text, preprocess, slot, api_key))
+            claimed = []
+            self._in_flight[key] = (task, claimed)
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded so one caller disconnecting does not cancel the call for the rest
+        result = await asyncio.shield(task)
+        if claimed:
+            return self._unpaid(result)
+        # Claimed on receipt rather than by the starter, which may have been cancelled
+        claimed.append(True)
+        return dict(result)
+
+    @staticmethod
+    def _unpaid(result: Dict[str, Any]) -> Dict[str, Any]:
+        """A copy of result for a caller that shared another's provider call: no tokens, no cost"""
+        return {
+            **result,
+            **{field: 0 for field in ("input_tokens", "output_tokens") if result.get(field) is not None},
+            **({"cost_usd": 0.0} if result.get("cost_usd") is not None else {})
+        }
+
+    async def _classify_in_slot(
+        self,
+        ticket_text: str,
+        preprocess: bool,
+        slot: Optional[Callable[[], AsyncContextManager]],
+        api_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if slot is None:
+            return await self._classify(ticket_text, preprocess, api_key)
+        async with slot():
+            return await self._classify(ticket_text, preprocess, api_key)
+
+    def _prepare(self, ticket_text: str, preprocess: bool = True) -> tuple:
+        """Preprocessed prompt and its token accounting"""
+        if preprocess:
+            prepared = prompt_preprocessor.process(ticket_text)
+            ticket_text = prepared.pop("text")
+        else:
+            tokens = prompt_preprocessor.count_tokens(ticket_text)
+            prepared = {"original_tokens": tokens, "prompt_tokens": tokens}
+        return self._build_prompt(ticket_text), prepared
+
+    async def _classify(self, ticket_text: str, preprocess: bool, api_key: Optional[str] = None) -> Dict[str, Any]:
+        start_time = time.time()
+        prompt, prepared = self._prepare(ticket_text, preprocess)
+        if self._cascading(api_key):
+            return await self._cascade(prompt, prepared, start_time)
+
+        spent = None
+        for provider in self.router.route(api_key):
+            try:
+                result = await self._classify_with(provider, prompt)
+            except Exception as e:
+                logger.warning(f"{provider.name} ({provider.model}) failed: {e}")
+                if isinstance(e, MalformedOutput):
+                    spent = self._add_spent(e.usage, spent)
+                continue
 
-            result = self._parse_ai_response(response.choices[0].message.content)
             processing_time = time.time() - start_time
+            logger.info(f"{provider.name} classification completed in {processing_time:.2f}s")
+            return {**self._add_spent(result, spent), **prepared, "processing_time": processing_time,
+                    "provider": provider.name, "model": provider.model}
 
-            logger.info(f"OpenAI classification completed in {processing_time:.2f}s")
-            return {**result, "processing_time": processing_time, "provider": "openai"}
+        logger.error("All LLM providers failed")
+        return self._add_spent(self._fallback(prepared, time.time() - start_time), spent)
 
-        except Exception as e:
-            logger.warning(f"OpenAI failed: {e}, trying Anthropic")
+    def _cascading(self, api_key: Optional[str]) -> bool:
+        # Keys pinned to a provider skip the cascade
+        return self.cascade is not None and not self.router.pinned(api_key)
+
+    async def _cascade(
+        self,
+        prompt: str,
+        prepared: Dict[str, Any],
+        start_time: float,
+        first_tier: int = 1,
+        kept: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Classify with each cascade tier in turn until an answer clears its label's threshold.
 
+        A tier that errors or returns unparseable output is skipped. Tokens,
+        cost and provider latency add up over every tier tried, including
+        paid calls whose output could not be parsed;
+        provider, model and cascade_tier are those of the answer kept. When
+        no later tier answers, the last answer is kept even if below its
+        threshold. kept carries an answer from tiers before first_tier.
+        """
+        tiers = self.cascade.tiers
+        spent = None
+        for tier, provider in enumerate(tiers[first_tier - 1:], first_tier):
+            if not provider.enabled:
+                continue
+            start = time.perf_counter()
             try:
-                # Fallback to Anthropic
-                response = await self.anthropic_client.messages.create(
-                    model=settings.anthropic_model,
-                    max_tokens=200,
-                    temperature=0.1,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-
-                result = self._parse_ai_response(response.content[0].text)
-                processing_time = time.time() - start_time
-
-                logger.info(f"Anthropic classification completed in {processing_time:.2f}s")
-                return {**result, "processing_time": processing_time, "provider": "anthropic"}
-
-            except Exception as e2:
-                logger.error(f"Anthropic failed: {e2}")
-                processing_time = time.time() - start_time
-
-                return {
-                    "label": "other",
-                    "confidence": 0.0,
-                    "summary": "Failed to classify ticket due to AI service unavailability",
-                    "processing_time": processing_time,
-                    "provider": "fallback"
-                }
+                result = await self._classify_with(provider, prompt)
+            except Exception as e:
+                reason = "parse_failed" if isinstance(e, ValueError) else "error"
+                CASCADE_ESCALATIONS.labels(tier, reason).inc()
+                logger.warning(f"Cascade tier {tier} ({provider.key}) failed: {e}")
+                if isinstance(e, MalformedOutput):
+                    spent = self._add_spent(e.usage, spent)
+                continue
+            finally:
+                CASCADE_TIER_LATENCY.labels(tier).observe(time.perf_counter() - start)
 
-    def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse AI response and validate format"""
-        import json
-        import re
+            kept = {**self._add_usage(result, kept), "provider": provider.name,
+                    "model": provider.model, "cascade_tier": tier}
+            if self.cascade.accepts(result):
+                break
+            if tier < len(tiers):
+                CASCADE_ESCALATIONS.labels(tier, "low_confidence").inc()
+                logger.info(f"Escalating {result['label']} at confidence {result['confidence']:.2f} past tier {tier}")
+
+        if kept is None:
+            logger.error("All cascade tiers failed")
+            return self._add_spent(self._fallback(prepared, time.time() - start_time), spent)
+        CASCADE_RESOLVED.labels(kept["cascade_tier"]).inc()
+        return {**self._add_spent(kept, spent), **prepared, "processing_time": time.time() - start_time}
+
+    @staticmethod
+    def _add_usage(result: Dict[str, Any], earlier: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """result with the token usage, cost and latency of an earlier tier's answer added"""
+        if earlier is None:
+            return result
+        costs = (result["cost_usd"], earlier["cost_usd"])
+        return {
+            **result,
+            "input_tokens": result["input_tokens"] + earlier["input_tokens"],
+            "output_tokens": result["output_tokens"] + earlier["output_tokens"],
+            "cost_usd": None if None in costs else sum(costs),
+            "provider_ttfb": earlier["provider_ttfb"],
+            "provider_latency": result["provider_latency"] + earlier["provider_latency"]
+        }
+
+    @staticmethod
+    def _add_spent(result: Dict[str, Any], spent: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """result with the tokens, cost and latency of failed calls added; a fallback result takes them as is"""
+        if spent is None:
+            return result
+        if result.get("input_tokens") is None:
+            return {**result, **spent}
+        costs = (result["cost_usd"], spent["cost_usd"])
+        return {
+            **result,
+            "input_tokens": result["input_tokens"] + spent["input_tokens"],
+            "output_tokens": result["output_tokens"] + spent["output_tokens"],
+            "cost_usd": None if None in costs else sum(costs),
+            "provider_latency": result["provider_latency"] + spent["provider_latency"]
+        }
+
+    @staticmethod
+    def _fallback(prepared: Dict[str, Any], processing_time: float) -> Dict[str, Any]:
+        return {
+            "label": "other",
+            "confidence": 0.0,
+            "summary": "Failed to classify ticket due to AI service unavailability",
+            "processing_time": processing_time,
+            "provider": "fallback",
+            "model": None,
+            "prompt_version": PROMPT_VERSION,
+            **prepared
+        }
+
+    async def stream_classification(self, ticket_text: str,
+                                    api_key: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Classify a ticket from the provider token stream.
+
+        Yields {"event": "label"} and {"event": "confidence"} as soon as each
+        field is complete in the stream, then one {"event": "result"} with the
+        full classification and usage. If a stream fails before anything was
+        yielded the next provider is tried; otherwise, or if every stream
+        fails, the result comes from the non-streaming classify_ticket path.
+        Tokens and cost of failed streams are added to the result's usage.
+
+        With a cascade only the first tier is streamed. If its answer is
+        below threshold the remaining tiers run without streaming. Either
+        way the result can carry a different label or confidence than the
+        early events; its revised flag is then true and the result wins.
+        """
+        start_time = time.time()
+        prompt, prepared = self._prepare(ticket_text)
+        messages = [{"role": "user", "content": prompt}]
+        cascading = self._cascading(api_key)
+        if cascading:
+            providers = [self.cascade.tiers[0]] if self.cascade.tiers[0].enabled else []
+        else:
+            providers = self.router.route(api_key)
+
+        emitted = {}
+        spent = None
+        for provider in providers:
+            parser = IncrementalJSONFields()
+            usage = {"input_tokens": 0, "output_tokens": 0}
+            start = time.perf_counter()
+            first_token_at = None
+            try:
+                async for delta in provider.stream(messages, 200, usage):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    for key, value in parser.feed(delta):
+                        early = self._early_field(key, value)
+                        if early is not None and key not in emitted:
+                            emitted[key] = early
+                            yield {"event": key, key: early, "elapsed": time.perf_counter() - start}
+
+                result = self._parse_ai_response(parser.text)
+            except Exception as e:
+                if isinstance(e, ValueError):
+                    CLASSIFICATION_PARSE.labels(provider.name, provider.model, "failed").inc()
+                logger.warning(f"{provider.name} stream failed: {e}")
+                spent = self._add_spent({
+                    **usage,
+                    "cost_usd": provider.cost(usage["input_tokens"], usage["output_tokens"]),
+                    "provider_latency": time.perf_counter() - start
+                }, spent)
+                if emitted:
+                    break
+                continue
 
-        # Clean the response
-        cleaned = re.sub(r'```json\s*|\s*```', '', response_text.strip())
+            CLASSIFICATION_PARSE.labels(provider.name, provider.model, "ok").inc()
+            latency = time.perf_counter() - start
+            self.router.observe(provider, latency, result["confidence"])
+            result = self._add_spent({
+                **result,
+                **prepared,
+                "provider": provider.name,
+                "model": provider.model,
+                "prompt_version": PROMPT_VERSION,
+                **usage,
+                "cost_usd": provider.cost(usage["input_tokens"], usage["output_tokens"]),
+                "provider_ttfb": (first_token_at - start) if first_token_at else latency,
+                "provider_latency": latency,
+                "processing_time": time.time() - start_time
+            }, spent)
+            if cascading:
+                CASCADE_TIER_LATENCY.labels(1).observe(latency)
+                result["cascade_tier"] = 1
+                if self.cascade.accepts(result) or len(self.cascade.tiers) == 1:
+                    CASCADE_RESOLVED.labels(1).inc()
+                else:
+                    CASCADE_ESCALATIONS.labels(1, "low_confidence").inc()
+                    result = await self._cascade(prompt, prepared, start_time, first_tier=2, kept=result)
+            yield {"event": "result", **result, "revised": self._revises(result, emitted)}
+            return
 
+        result = self._add_spent(await self.classify_ticket(ticket_text, api_key=api_key), spent)
+        result["processing_time"] = time.time() - start_time
+        yield {"event": "result", **result, "revised": self._revises(result, emitted)}
+
+    @staticmethod
+    def _revises(result: Dict[str, Any], emitted: Dict[str, Any]) -> bool:
+        """Whether result contradicts a label or confidence already streamed"""
+        return any(result.get(key) != value for key, value in emitted.items())
+
+    @staticmethod
+    def _early_field(key: str, value: Any) -> Any:
+        """Normalize a streamed field the way ClassificationResult would, or None to hold it back"""
+        if key == "label" and isinstance(value, str):
+            return value if value in VALID_LABELS else "other"
+        if key == "confidence" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return max(0.0, min(1.0, float(value)))
+        return None
+
+    async def _classify_with(self, provider: Provider, prompt: str) -> Dict[str, Any]:
+        """
+        Run one provider call and parse it, with a single bounded repair retry.
+
+        The result includes provider token usage, cost, time to first byte
+        and total provider latency, summed over the repair call if one was made.
+        Raises MalformedOutput, carrying the usage of both calls, if the
+        repaired output is still malformed so the caller can fail over to
+        the next provider and still account for what was spent.
+        """
+        response_times = []
+        token = _response_times.set(response_times)
+        start = time.perf_counter()
         try:
-            result = json.loads(cleaned)
+            completions = [await provider.complete([{"role": "user", "content": prompt}], 200)]
+            try:
+                result = self._parse_ai_response(completions[0].text)
+                outcome = "ok"
+            except ValueError as e:
+                logger.warning(f"Malformed {provider.name} output, requesting repair: {e}")
+                repair = REPAIR_PROMPT.format(error=e, output=completions[0].text[:REPAIR_MAX_OUTPUT_CHARS])
+                completions.append(await provider.complete([{"role": "user", "content": repair}], REPAIR_MAX_TOKENS))
+                try:
+                    result = self._parse_ai_response(completions[1].text)
+                except ValueError as repair_error:
+                    CLASSIFICATION_PARSE.labels(provider.name, provider.model, "failed").inc()
+                    input_tokens = sum(c.input_tokens for c in completions)
+                    output_tokens = sum(c.output_tokens for c in completions)
+                    raise MalformedOutput(str(repair_error), {
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                        "cost_usd": provider.cost(input_tokens, output_tokens),
+                        "provider_latency": time.perf_counter() - start
+                    }) from repair_error
+                outcome = "repaired"
+        except Exception:
+            # Failures count toward latency so a slow, erroring provider is not preferred
+            self.router.observe(provider, time.perf_counter() - start)
+            raise
+        finally:
+            _response_times.reset(token)
+        latency = time.perf_counter() - start
+        CLASSIFICATION_PARSE.labels(provider.name, provider.model, outcome).inc()
+        self.router.observe(provider, latency, result["confidence"])
 
-            # Validate required fields
-            if not all(key in result for key in ['label', 'confidence', 'summary']):
-                raise ValueError("Missing required fields")
+        input_tokens = sum(c.input_tokens for c in completions)
+        output_tokens = sum(c.output_tokens for c in completions)
+        return {
+            **result,
+            "prompt_version": PROMPT_VERSION,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": provider.cost(input_tokens, output_tokens),
+            "provider_ttfb": (response_times[0] - start) if response_times else latency,
+            "provider_latency": latency
+        }
 
-            # Validate label
-            valid_labels = ['bug', 'feature_request', 'billing_issue', 'other']
-            if result['label'] not in valid_labels:
-                result['label'] = 'other'
+    def _build_prompt(self, ticket_text: str) -> str:
+        return CLASSIFY_PROMPT.format(ticket_text=ticket_text)
 
-            # Validate confidence
-            result['confidence'] = max(0.0, min(1.0, float(result['confidence'])))
+    def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse a JSON-mode response into a validated classification.
 
-            return result
+        Raises ValueError when the output is not a valid classification.
+        """
+        text = response_text.strip()
+        if text.startswith("```"):
+            # Tolerate a stray code fence without dropping to regex
+            text = text.strip("`").strip()
+            if text.startswith("json"):
+                text = text[4:]
 
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
-            logger.error(f"Failed to parse AI response: {e}")
-            return {
-                "label": "other",
-                "confidence": 0.0,
-                "summary": f"AI response parsing failed: {str(e)}"
-            }
+        try:
+            return ClassificationResult(**orjson.loads(text)).dict()
+        except (orjson.JSONDecodeError, TypeError, ValueError) as e:
+            raise ValueError(f"Failed to parse AI response: {e}") from e
 
 
 # Global instance
-ai_service = AIService()
\ No newline at end of file
+ai_service = AIService()
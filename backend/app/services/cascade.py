@@ -0,0 +1,231 @@
+"""
+Confidence-gated model cascade.
+
+Tickets are classified by the cheapest tier first and escalated to the
+next tier only when the returned confidence is below the threshold for
+the returned label, or the output cannot be parsed. Per-label thresholds
+are calibrated offline against historical tickets: the first tier is run
+on a sample of stored tickets and, for each label, the threshold is the
+lowest confidence at which its answers still agree with the stored label
+at the target precision.
+
+Usage:
+    cd backend && python -m app.services.cascade --output cascade_thresholds.json
+        [--sample 2000] [--target-precision 0.95] [--min-support 20]
+        [--reference-model gpt-4o] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Ticket
+from .providers import Provider, ProviderRegistry
+
+
+logger = logging.getLogger(__name__)
+
+# (label the tier returned, its confidence, label stored on the historical ticket)
+Sample = Tuple[str, float, str]
+
+
+@dataclass
+class CascadeThresholds:
+    """
+    Minimum confidence at which a tier's answer is accepted, per label.
+
+    A label mapped to None never reaches the target precision and is always
+    escalated; labels without a calibrated value use the default.
+    """
+    default: float = 0.75
+    labels: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    def for_label(self, label: str) -> float:
+        if label not in self.labels:
+            return self.default
+        threshold = self.labels[label]
+        return math.inf if threshold is None else threshold
+
+    @classmethod
+    def load(cls, path: Optional[str], default: float) -> "CascadeThresholds":
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            return cls(default=data.get("default", default), labels=data.get("labels", {}))
+        return cls(default=default)
+
+    def save(self, path: Path):
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp_path, path)
+
+
+def fit_thresholds(
+    samples: List[Sample],
+    target_precision: float = 0.95,
+    min_support: int = 20,
+    default: float = 0.75
+) -> Tuple[CascadeThresholds, Dict[str, Dict[str, Any]]]:
+    """
+    Per-label thresholds from (predicted, confidence, reference) samples.
+
+    For each predicted label the threshold is the lowest confidence c such
+    that answers with confidence >= c match the reference at target_precision
+    or better, over at least min_support answers. Labels with fewer samples
+    than min_support keep the default. Returns the thresholds and a report
+    with support, precision and coverage (share of that label's answers
+    accepted) per label.
+    """
+    by_label: Dict[str, List[Tuple[float, bool]]] = {}
+    for predicted, confidence, reference in samples:
+        by_label.setdefault(predicted, []).append((confidence, predicted == reference))
+
+    thresholds = CascadeThresholds(default=default)
+    report = {}
+    for label, answers in sorted(by_label.items()):
+        if len(answers) < min_support:
+            report[label] = {"support": len(answers), "threshold": default, "precision": None, "coverage": None}
+            continue
+
+        answers.sort(key=lambda answer: answer[0], reverse=True)
+        best = None
+        correct = 0
+        for i, (confidence, is_correct) in enumerate(answers, 1):
+            correct += is_correct
+            # Only cut between distinct confidences; ties are accepted or rejected together
+            if i < len(answers) and answers[i][0] == confidence:
+                continue
+            if i >= min_support and correct / i >= target_precision:
+                best = (confidence, correct / i, i / len(answers))
+
+        thresholds.labels[label] = best[0] if best else None
+        report[label] = {
+            "support": len(answers),
+            "threshold": best[0] if best else None,
+            "precision": round(best[1], 4) if best else None,
+            "coverage": round(best[2], 4) if best else 0.0
+        }
+    return thresholds, report
+
+
+class Cascade:
+    """Providers in escalation order with the thresholds that gate each step"""
+
+    def __init__(self, tiers: List[Provider], thresholds: CascadeThresholds):
+        self.tiers = tiers
+        self.thresholds = thresholds
+
+    def accepts(self, result: Dict[str, Any]) -> bool:
+        return result["confidence"] >= self.thresholds.for_label(result["label"])
+
+
+def build_cascade(registry: ProviderRegistry) -> Optional[Cascade]:
+    """Cascade from LLM_CASCADE (provider keys, cheapest first), or None when it is not configured"""
+    keys = [key.strip() for key in settings.llm_cascade.split(",") if key.strip()]
+    if not keys:
+        return None
+    tiers = []
+    for key in keys:
+        provider = registry.get(key)
+        if provider is None:
+            raise ValueError(f"Cascade tier {key!r} is not in LLM_PROVIDERS")
+        tiers.append(provider)
+    thresholds = CascadeThresholds.load(settings.llm_cascade_thresholds_path, settings.llm_cascade_threshold)
+    return Cascade(tiers, thresholds)
+
+
+def load_reference_tickets(
+    db: Session,
+    sample: int,
+    calibrated_model: str,
+    reference_model: Optional[str] = None
+) -> List[tuple]:
+    """
+    Most recent (ticket_text, label) pairs classified by a provider, optionally by one model.
+
+    Tickets labelled by calibrated_model itself (or by an unrecorded model)
+    are never used: a tier replayed against its own past answers agrees
+    with them almost always, which would drive every threshold to the
+    minimum and switch escalation off.
+    """
+    if reference_model == calibrated_model:
+        raise ValueError(f"Reference model must differ from the calibrated model {calibrated_model!r}")
+    query = db.query(Ticket.ticket_text, Ticket.label).filter(
+        Ticket.provider.isnot(None), Ticket.provider != "fallback", Ticket.model != calibrated_model
+    )
+    if reference_model:
+        query = query.filter(Ticket.model == reference_model)
+    return query.order_by(Ticket.id.desc()).limit(sample).all()
+
+
+async def collect_samples(provider: Provider, tickets: List[tuple], concurrency: int = 8) -> List[Sample]:
+    """Classify historical tickets with one tier and pair each answer with the stored label"""
+    from .ai_service import ai_service
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def classify(ticket_text: str) -> Dict[str, Any]:
+        async with semaphore:
+            prompt, _ = ai_service._prepare(ticket_text)
+            return await ai_service._classify_with(provider, prompt)
+
+    results = await asyncio.gather(*(classify(text) for text, _ in tickets), return_exceptions=True)
+    samples = []
+    for (_, reference), result in zip(tickets, results):
+        if isinstance(result, Exception):
+            # Unparseable output escalates at run time anyway; it says nothing about thresholds
+            logger.warning(f"Calibration call failed: {result}")
+            continue
+        samples.append((result["label"], result["confidence"], reference))
+    return samples
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .ai_service import ai_service
+
+    if ai_service.cascade is None:
+        raise SystemExit("LLM_CASCADE is not configured")
+    provider = ai_service.cascade.tiers[0]
+
+    db = SessionLocal()
+    try:
+        tickets = load_reference_tickets(db, args.sample, provider.model, args.reference_model)
+    finally:
+        db.close()
+    logger.info(f"Calibrating {provider.key} against {len(tickets)} historical tickets")
+
+    try:
+        samples = await collect_samples(provider, tickets, args.concurrency)
+    finally:
+        await ai_service.close()
+
+    thresholds, report = fit_thresholds(
+        samples, args.target_precision, args.min_support, settings.llm_cascade_threshold
+    )
+    thresholds.save(args.output)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, required=True, help="JSON file to write; point LLM_CASCADE_THRESHOLDS at it")
+    parser.add_argument("--sample", type=int, default=2000, help="number of recent historical tickets to replay")
+    parser.add_argument("--target-precision", type=float, default=0.95)
+    parser.add_argument("--min-support", type=int, default=20, help="answers needed before a label gets its own threshold")
+    parser.add_argument(
+        "--reference-model",
+        help="only use tickets labelled by this model as ground truth; tickets labelled by the calibrated tier are always excluded"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
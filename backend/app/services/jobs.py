@@ -0,0 +1,294 @@
+"""
+Periodic background jobs run inside the application lifespan.
+
+Every process runs a JobScheduler, but only the one holding the leader
+lock (a session-level PostgreSQL advisory lock on a dedicated connection)
+actually starts jobs. If the leader dies its connection closes, the lock
+is released and another process takes over at its next poll. Job bodies
+are synchronous database work and run in a worker thread.
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..metrics import JOB_RUNS, JOB_DURATION, JOB_LAST_SUCCESS, JOB_LEADER
+
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Fields accept *, numbers, ranges (1-5), lists (1,15) and steps (*/5,
+    10-50/10). Day of week runs 0-6 from Sunday; 7 is also Sunday. As in
+    cron, when both day fields are restricted a day matching either runs.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(","):
+            span, _, step = item.partition("/")
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(bound) for bound in span.split("-", 1))
+            else:
+                start = end = int(span)
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron field {field!r} is outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        # isoweekday() is 1-7 from Monday; cron counts 0-6 from Sunday
+        in_weekdays = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers every satisfiable combination, including Feb 29
+        limit = candidate + timedelta(days=4 * 366)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(
+                    year=candidate.year + (month == 1), month=month, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+
+class Job:
+    def __init__(self, name: str, schedule: CronSchedule, func: Callable[[], object], jitter: float = 0.0):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.jitter = jitter
+        self.next_run: Optional[datetime] = None
+        self.running = False
+
+    def plan(self, now: datetime):
+        """Schedule the next run, delayed by up to jitter seconds so jobs do not all start on the minute"""
+        self.next_run = self.schedule.next_after(now) + timedelta(seconds=random.uniform(0, self.jitter))
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock"""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class LeaderLock:
+    """
+    Job leadership held as a PostgreSQL session-level advisory lock.
+
+    The lock lives on a connection taken from the pool for as long as this
+    process is leader. On other databases (local SQLite) every process is
+    leader.
+    """
+
+    def __init__(self, bind: Engine, name: str = "solutionai:periodic-jobs"):
+        self.bind = bind
+        self.key = advisory_lock_key(name)
+        self._connection: Optional[Connection] = None
+
+    def acquire(self) -> bool:
+        """Take or confirm leadership; blocking, so call it from a worker thread"""
+        if self.bind.dialect.name != "postgresql":
+            return True
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                self._connection.commit()
+                return True
+            except DBAPIError as e:
+                # The session, and with it the lock, is gone
+                logger.warning(f"Lost periodic job leadership: {e}")
+                self._discard()
+
+        connection = self.bind.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            # The lock is held by the session, not the transaction; do not sit idle in one
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        logger.info("Acquired periodic job leadership")
+        self._connection = connection
+        return True
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._connection.commit()
+        except DBAPIError as e:
+            logger.warning(f"Releasing periodic job leadership failed: {e}")
+        self._discard()
+
+    def _discard(self):
+        try:
+            self._connection.invalidate()
+            self._connection.close()
+        finally:
+            self._connection = None
+
+
+class JobScheduler:
+    def __init__(self, jobs: List[Job], leader: LeaderLock, poll_interval: float = 30.0):
+        self.jobs = jobs
+        self.leader = leader
+        self.poll_interval = poll_interval
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def start(self):
+        now = datetime.utcnow()
+        for job in self.jobs:
+            job.plan(now)
+            logger.info(f"Scheduled job {job.name} ({job.schedule.expression}), first run {job.next_run:%Y-%m-%d %H:%M:%S}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        # Let a job that is mid-write finish rather than cutting its transaction
+        await asyncio.gather(*self._running, return_exceptions=True)
+        await asyncio.to_thread(self.leader.release)
+        JOB_LEADER.set(0)
+
+    async def _run(self):
+        while True:
+            try:
+                delay = await self.tick(datetime.utcnow())
+            except Exception as e:
+                logger.error(f"Job scheduler tick failed: {e}")
+                delay = self.poll_interval
+            await asyncio.sleep(delay)
+
+    async def tick(self, now: datetime) -> float:
+        """Refresh leadership, start due jobs and return the seconds to sleep"""
+        try:
+            self.is_leader = await asyncio.to_thread(self.leader.acquire)
+        except DBAPIError as e:
+            logger.warning(f"Job leader election failed: {e}")
+            self.is_leader = False
+        JOB_LEADER.set(1 if self.is_leader else 0)
+
+        for job in self.jobs:
+            if job.next_run > now:
+                continue
+            # Followers advance their schedule too; the leader ran this slot
+            if self.is_leader:
+                self.launch(job)
+            job.plan(now)
+
+        next_run = min((job.next_run for job in self.jobs), default=now + timedelta(seconds=self.poll_interval))
+        return max(0.0, min(self.poll_interval, (next_run - now).total_seconds()))
+
+    def launch(self, job: Job):
+        if job.running:
+            logger.warning(f"Job {job.name} is still running, skipping this run")
+            JOB_RUNS.labels(job.name, "skipped").inc()
+            return
+        job.running = True
+        task = asyncio.create_task(self.run_job(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def run_job(self, job: Job):
+        start = time.perf_counter()
+        outcome = "failed"
+        try:
+            result = await asyncio.to_thread(job.func)
+            outcome = "ok"
+            JOB_LAST_SUCCESS.labels(job.name).set(time.time())
+            logger.info(f"Job {job.name} finished in {time.perf_counter() - start:.2f}s: {result}")
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            job.running = False
+            JOB_RUNS.labels(job.name, outcome).inc()
+            JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+
+
+def in_session(func: Callable, *args) -> Callable[[], object]:
+    """Job body running func(db, *args) in its own session"""
+    def run():
+        db = SessionLocal()
+        try:
+            return func(db, *args)
+        finally:
+            db.close()
+    return run
+
+
+def build_job_scheduler() -> JobScheduler:
+    from .maintenance import cleanup_logs, reset_daily_quotas, snapshot_system_metrics
+    from .ticket_service import TicketService
+
+    snapshot_window = timedelta(minutes=5)
+    if settings.metrics_snapshot_cron:
+        # Each snapshot covers the gap since the previous scheduled one
+        schedule = CronSchedule(settings.metrics_snapshot_cron)
+        first = schedule.next_after(datetime.utcnow())
+        snapshot_window = schedule.next_after(first) - first
+
+    jobs = [
+        ("ticket_retention", settings.ticket_retention_cron,
+         in_session(lambda db: TicketService(db).delete_old_tickets(settings.ticket_retention_days))),
+        ("log_cleanup", settings.log_cleanup_cron,
+         in_session(cleanup_logs, timedelta(days=settings.audit_log_retention_days), settings.webhook_log_keep,
+                    timedelta(hours=settings.webhook_payload_grace_hours))),
+        ("quota_reset", settings.quota_reset_cron, in_session(reset_daily_quotas)),
+        ("metrics_snapshot", settings.metrics_snapshot_cron, in_session(snapshot_system_metrics, snapshot_window)),
+    ]
+    return JobScheduler(
+        [Job(name, CronSchedule(cron), func, settings.job_jitter_seconds) for name, cron, func in jobs if cron],
+        LeaderLock(engine),
+        poll_interval=settings.job_leader_poll_seconds
+    )
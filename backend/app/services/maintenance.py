@@ -0,0 +1,89 @@
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from ..models import ApiKey, AuditLog, SystemMetrics, Ticket, WebhookLog
+from .webhook_payloads import delete_orphaned_payloads
+
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_all_but_newest(db: Session, model, keep: int) -> int:
+    """Delete every row of model except the newest keep, in one DELETE"""
+    stale_ids = db.query(model.id).order_by(model.created_at.desc(), model.id.desc()).offset(keep).subquery()
+    return db.query(model).filter(model.id.in_(db.query(stale_ids.c.id))).delete(synchronize_session=False)
+
+
+def cleanup_logs(
+    db: Session,
+    audit_retention: timedelta = timedelta(days=2555),
+    webhook_keep: int = 500,
+    payload_grace: timedelta = timedelta(hours=24)
+) -> Tuple[int, int, int]:
+    """
+    Expire audit logs older than audit_retention, trim webhook logs to their
+    newest rows, then drop webhook bodies no remaining log references;
+    returns (deleted_audit, deleted_webhook, deleted_payloads)
+    """
+    # Age-based so the trail keeps its full history however busy the API is
+    deleted_audit = db.query(AuditLog).filter(
+        AuditLog.created_at < datetime.utcnow() - audit_retention
+    ).delete(synchronize_session=False)
+    deleted_webhook = _delete_all_but_newest(db, WebhookLog, webhook_keep)
+    deleted_payloads = delete_orphaned_payloads(db, payload_grace)
+    db.commit()
+    logger.info(
+        f"Maintenance cleanup: deleted {deleted_audit} audit logs, {deleted_webhook} webhook logs, "
+        f"{deleted_payloads} webhook payloads"
+    )
+    return deleted_audit, deleted_webhook, deleted_payloads
+
+
+def reset_daily_quotas(db: Session) -> int:
+    """
+    Zero requests_today for keys not yet reset today.
+
+    The triage write path still resets lazily, so a missed or late run only
+    leaves stale counters on keys that send no traffic.
+    """
+    today = date.today()
+    reset = db.query(ApiKey).filter(
+        (ApiKey.last_reset != today) | ApiKey.last_reset.is_(None)
+    ).update({ApiKey.requests_today: 0, ApiKey.last_reset: today}, synchronize_session=False)
+    db.commit()
+    logger.info(f"Reset daily quota for {reset} API keys")
+    return reset
+
+
+def snapshot_system_metrics(db: Session, window: timedelta = timedelta(minutes=5)) -> Dict[str, float]:
+    """Aggregate the last window of tickets into SystemMetrics rows"""
+    now = datetime.utcnow()
+    tickets, avg_processing_time, avg_confidence, fallbacks, cost_usd = db.query(
+        func.count(Ticket.id),
+        func.avg(Ticket.processing_time),
+        func.avg(Ticket.confidence),
+        func.sum(case((Ticket.provider == "fallback", 1), else_=0)),
+        func.sum(Ticket.cost_usd)
+    ).filter(Ticket.created_at >= now - window).one()
+    active_api_keys = db.query(func.count(ApiKey.id)).filter(ApiKey.is_active == True).scalar()
+
+    snapshot = {
+        "tickets_processed": float(tickets),
+        "avg_processing_time": float(avg_processing_time or 0.0),
+        "avg_confidence": float(avg_confidence or 0.0),
+        "fallback_rate": float(fallbacks or 0) / tickets if tickets else 0.0,
+        "cost_usd": float(cost_usd or 0.0),
+        "active_api_keys": float(active_api_keys),
+    }
+    tags = json.dumps({"window_seconds": int(window.total_seconds())})
+    db.add_all([
+        SystemMetrics(metric_name=name, metric_value=value, tags=tags, created_at=now)
+        for name, value in snapshot.items()
+    ])
+    db.commit()
+    return snapshot
@@ -0,0 +1,131 @@
+import html
+import logging
+import re
+from typing import Dict, Any, List
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Reply-chain headers; everything from the first match onwards is quoted history
+REPLY_HEADER_RE = re.compile(
+    r"^(On .{0,200}wrote:\s*$"
+    r"|-{2,}\s*Original Message\s*-{2,}"
+    r"|-{2,}\s*Forwarded message\s*-{2,}"
+    r"|From: .+\n(?:.*\n){0,3}?(?:Sent|Date): )",
+    re.IGNORECASE | re.MULTILINE
+)
+QUOTED_LINE_RE = re.compile(r"^\s*>.*$\n?", re.MULTILINE)
+# Signature delimiters and common sign-offs; the rest of the message is dropped
+SIGNATURE_RE = re.compile(
+    r"^(--\s*$"
+    r"|Sent from my \w+"
+    r"|(?:Best|Kind|Warm)? ?regards,?\s*$"
+    r"|Thanks(?: again)?,\s*$"
+    r"|Cheers,\s*$)",
+    re.IGNORECASE | re.MULTILINE
+)
+HTML_BLOCK_RE = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+DATA_URI_RE = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=\s]+")
+BASE64_BLOB_RE = re.compile(r"[A-Za-z0-9+/]{120,}={0,2}")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+class PromptPreprocessor:
+    """Reduce ticket text to the part worth sending to a provider"""
+
+    def __init__(self, max_tokens: int = None, head_ratio: float = None, encoding: str = "cl100k_base"):
+        self.max_tokens = max_tokens if max_tokens is not None else settings.prompt_max_tokens
+        self.head_ratio = head_ratio if head_ratio is not None else settings.prompt_head_ratio
+        self._encoding_name = encoding
+        self._encoding_loaded = False
+        self._encoding_obj = None
+
+    @property
+    def _encoding(self):
+        """Tokenizer loaded on first use; tiktoken is optional and slow to initialise"""
+        if not self._encoding_loaded:
+            try:
+                import tiktoken
+                self._encoding_obj = tiktoken.get_encoding(self._encoding_name)
+            except ImportError:
+                logger.info("tiktoken not installed, using approximate token counts")
+            except Exception as e:
+                # The encoding file is downloaded on first use; offline hosts fall back too
+                logger.warning(f"tiktoken encoding {self._encoding_name} unavailable ({e}), using approximate token counts")
+            self._encoding_loaded = True
+        return self._encoding_obj
+
+    def process(self, ticket_text: str) -> Dict[str, Any]:
+        """
+        Clean and truncate ticket text.
+
+        Returns the text to send along with original and sent token counts.
+        """
+        original_tokens = self.count_tokens(ticket_text)
+        cleaned = self.clean(ticket_text)
+        # Never hand the provider an empty prompt because cleaning was too eager
+        if not cleaned:
+            cleaned = ticket_text.strip()
+        text = self.truncate(cleaned)
+
+        return {
+            "text": text,
+            "original_tokens": original_tokens,
+            "prompt_tokens": self.count_tokens(text)
+        }
+
+    def clean(self, text: str) -> str:
+        """Strip HTML, base64 blobs, quoted reply chains and signatures"""
+        text = HTML_BLOCK_RE.sub(" ", text)
+        text = HTML_TAG_RE.sub(" ", text)
+        text = html.unescape(text)
+        text = DATA_URI_RE.sub("[attachment]", text)
+        text = BASE64_BLOB_RE.sub("[attachment]", text)
+
+        match = REPLY_HEADER_RE.search(text)
+        if match and match.start() > 0:
+            text = text[:match.start()]
+        text = QUOTED_LINE_RE.sub("", text)
+
+        match = SIGNATURE_RE.search(text)
+        if match and match.start() > 0:
+            text = text[:match.start()]
+
+        return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+    def truncate(self, text: str) -> str:
+        """Keep the head and tail of text so it fits within max_tokens"""
+        tokens = self._encode(text)
+        if len(tokens) <= self.max_tokens:
+            return text
+
+        budget = self.max_tokens - len(self._encode(TRUNCATION_MARKER))
+        head = int(budget * self.head_ratio)
+        tail = budget - head
+        return self._decode(tokens[:head]) + TRUNCATION_MARKER + self._decode(tokens[len(tokens) - tail:])
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._encode(text))
+
+    def _encode(self, text: str) -> List:
+        if self._encoding:
+            return self._encoding.encode(text)
+        # Fallback approximation: words and punctuation, keeping offsets for decoding
+        return [(m.start(), m.end(), text) for m in WORD_RE.finditer(text)]
+
+    def _decode(self, tokens: List) -> str:
+        if self._encoding:
+            return self._encoding.decode(tokens)
+        if not tokens:
+            return ""
+        return tokens[0][2][tokens[0][0]:tokens[-1][1]]
+
+
+# Global instance
+prompt_preprocessor = PromptPreprocessor()
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+import orjson
+
+from ..config import settings
+from .prompt_preprocessor import prompt_preprocessor
+
+
+logger = logging.getLogger(__name__)
+
+
+class Completion(NamedTuple):
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+def parse_pricing(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "model=input/output,..." USD-per-million-token prices"""
+    pricing = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, prices = item.partition("=")
+        input_price, _, output_price = prices.partition("/")
+        pricing[model.strip()] = (float(input_price), float(output_price or input_price))
+    return pricing
+
+
+MODEL_PRICING = parse_pricing(settings.llm_pricing)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Provider cost in USD, or None for models without a configured price"""
+    if model not in MODEL_PRICING:
+        return None
+    input_price, output_price = MODEL_PRICING[model]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class Provider:
+    """
+    One model endpoint that can classify a prompt.
+
+    Subclasses implement complete(); stream() defaults to a single chunk
+    for providers without a token stream.
+    """
+
+    name = "provider"
+
+    def __init__(self, model: str, key: Optional[str] = None):
+        self.model = model
+        self._key = key
+
+    @property
+    def key(self) -> str:
+        """Registry key: the provider name, or "name:model" for an extra model of the same provider"""
+        return self._key or self.name
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @property
+    def base_url(self) -> Optional[str]:
+        """Remote endpoint to pre-connect during warm-up, if any"""
+        return None
+
+    @property
+    def price(self) -> Tuple[float, float]:
+        """USD per million input/output tokens; unpriced remote models sort last"""
+        return MODEL_PRICING.get(self.model, (float("inf"), float("inf")))
+
+    def cost(self, input_tokens: int, output_tokens: int) -> Optional[float]:
+        return estimate_cost(self.model, input_tokens, output_tokens)
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> Completion:
+        raise NotImplementedError
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                     usage: Dict[str, int]) -> AsyncIterator[str]:
+        completion = await self.complete(messages, max_tokens)
+        usage["input_tokens"] = completion.input_tokens
+        usage["output_tokens"] = completion.output_tokens
+        yield completion.text
+
+    async def close(self):
+        pass
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    def __init__(self, model: str, http_client: Callable[[], httpx.AsyncClient], key: Optional[str] = None):
+        super().__init__(model, key)
+        self._http_client = http_client
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.openai_api_key)
+
+    @property
+    def client(self):
+        # The SDK is slow to import; the client is created on first use
+        if self._client is None:
+            import openai
+            self._client = openai.AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                http_client=self._http_client()
+            )
+        return self._client
+
+    @property
+    def base_url(self) -> Optional[str]:
+        return str(self.client.base_url)
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> Completion:
+        """OpenAI chat completion in native JSON mode"""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+        usage = response.usage
+        return Completion(
+            response.choices[0].message.content or "",
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                     usage: Dict[str, int]) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                # Each streamed content chunk carries one token
+                usage["output_tokens"] += 1
+                yield chunk.choices[0].delta.content
+        # Streamed chat completions carry no usage block; count the prompt locally
+        usage["input_tokens"] = prompt_preprocessor.count_tokens(messages[-1]["content"])
+
+
+class AnthropicProvider(Provider):
+    name = "anthropic"
+
+    def __init__(self, model: str, http_client: Callable[[], httpx.AsyncClient], key: Optional[str] = None):
+        super().__init__(model, key)
+        self._http_client = http_client
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.anthropic_api_key)
+
+    @property
+    def client(self):
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                base_url=settings.anthropic_base_url,
+                http_client=self._http_client()
+            )
+        return self._client
+
+    @property
+    def base_url(self) -> Optional[str]:
+        return str(self.client.base_url)
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> Completion:
+        """Anthropic message with the assistant turn prefilled to force a JSON object"""
+        response = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=0.1,
+            messages=messages + [{"role": "assistant", "content": "{"}]
+        )
+        return Completion(
+            "{" + response.content[0].text,
+            response.usage.input_tokens,
+            response.usage.output_tokens
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                     usage: Dict[str, int]) -> AsyncIterator[str]:
+        stream = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=0.1,
+            messages=messages + [{"role": "assistant", "content": "{"}],
+            stream=True
+        )
+        # The prefilled "{" goes out with the first real token so it does not count as first byte
+        prefill = "{"
+        async for event in stream:
+            if event.type == "message_start":
+                usage["input_tokens"] = event.message.usage.input_tokens
+            elif event.type == "content_block_delta":
+                yield prefill + event.delta.text
+                prefill = ""
+            elif event.type == "message_delta":
+                usage["output_tokens"] = event.usage.output_tokens
+
+
+class LocalModelProvider(Provider):
+    """
+    In-process classifier with no network round trip and no per-token cost.
+
+    Uses a Hugging Face text-classification model from LOCAL_MODEL_PATH when
+    transformers is installed, otherwise a keyword model. Inference runs in a
+    worker thread so the event loop is never blocked.
+    """
+
+    name = "local"
+    KEYWORDS = {
+        "bug": ("error", "crash", "broken", "fails", "failed", "exception", "bug", "not working", "500"),
+        "billing_issue": ("invoice", "charge", "charged", "refund", "billing", "payment", "card", "subscription"),
+        "feature_request": ("feature", "would be great", "please add", "support for", "suggest", "wish"),
+    }
+    _TICKET = re.compile(r"Ticket:\s*(.*?)\n\s*Categories:", re.S)
+
+    def __init__(self, model: str, model_path: Optional[str] = None, key: Optional[str] = None):
+        super().__init__(model, key)
+        self.model_path = model_path
+        self._pipeline = None
+        self._pipeline_loaded = False
+
+    @property
+    def price(self) -> Tuple[float, float]:
+        return (0.0, 0.0)
+
+    def cost(self, input_tokens: int, output_tokens: int) -> Optional[float]:
+        return 0.0
+
+    @property
+    def pipeline(self):
+        if not self._pipeline_loaded and self.model_path:
+            try:
+                from transformers import pipeline
+                self._pipeline = pipeline("text-classification", model=self.model_path)
+            except ImportError:
+                logger.warning("transformers not installed, local provider uses the keyword model")
+            self._pipeline_loaded = True
+        return self._pipeline
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> Completion:
+        match = self._TICKET.search(messages[-1]["content"])
+        ticket_text = match.group(1).strip() if match else messages[-1]["content"]
+        result = await asyncio.to_thread(self.classify, ticket_text)
+        return Completion(orjson.dumps(result).decode())
+
+    def classify(self, ticket_text: str) -> Dict[str, object]:
+        summary = ticket_text.split("\n", 1)[0][:120]
+        if self.pipeline is not None:
+            prediction = self.pipeline(ticket_text[:2000], truncation=True)[0]
+            return {"label": prediction["label"], "confidence": round(prediction["score"], 3), "summary": summary}
+
+        lowered = ticket_text.lower()
+        scores = {label: sum(lowered.count(k) for k in words) for label, words in self.KEYWORDS.items()}
+        label = max(scores, key=scores.get)
+        total = sum(scores.values())
+        if not total:
+            return {"label": "other", "confidence": 0.3, "summary": summary}
+        return {"label": label, "confidence": round(scores[label] / total * 0.8, 3), "summary": summary}
+
+
+class StubProvider(Provider):
+    """Deterministic offline provider for development and tests"""
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub", label: str = "other", confidence: float = 0.5,
+                 key: Optional[str] = None):
+        super().__init__(model, key)
+        self.label = label
+        self.confidence = confidence
+
+    @property
+    def price(self) -> Tuple[float, float]:
+        return (0.0, 0.0)
+
+    def cost(self, input_tokens: int, output_tokens: int) -> Optional[float]:
+        return 0.0
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> Completion:
+        return Completion(orjson.dumps({
+            "label": self.label,
+            "confidence": self.confidence,
+            "summary": "Offline stub classification"
+        }).decode())
+
+
+class ProviderRegistry:
+    """Providers by key, in configured priority order"""
+
+    def __init__(self, providers: List[Provider]):
+        self._providers: Dict[str, Provider] = {}
+        for provider in providers:
+            self.register(provider)
+
+    def register(self, provider: Provider):
+        self._providers[provider.key] = provider
+
+    def get(self, key: str) -> Optional[Provider]:
+        return self._providers.get(key)
+
+    def enabled(self) -> List[Provider]:
+        return [provider for provider in self._providers.values() if provider.enabled]
+
+    def __iter__(self):
+        return iter(self._providers.values())
+
+
+def build_registry(http_client: Callable[[], httpx.AsyncClient]) -> ProviderRegistry:
+    """
+    Providers from LLM_PROVIDERS. An entry is a provider name with its
+    configured model ("openai") or "name:model" for another model of the
+    same provider ("openai:gpt-4o"), e.g. as a stronger cascade tier.
+    """
+    factories = {
+        "openai": lambda model, key: OpenAIProvider(model or settings.openai_model, http_client, key),
+        "anthropic": lambda model, key: AnthropicProvider(model or settings.anthropic_model, http_client, key),
+        "local": lambda model, key: LocalModelProvider(model or settings.local_model_name, settings.local_model_path, key),
+        "stub": lambda model, key: StubProvider(model or "stub", key=key),
+    }
+    providers = []
+    for spec in filter(None, (part.strip() for part in settings.llm_providers.split(","))):
+        name, _, model = spec.partition(":")
+        if name not in factories:
+            raise ValueError(f"Unknown LLM provider {name!r}; expected one of {', '.join(factories)}")
+        providers.append(factories[name](model or None, spec if model else None))
+    return ProviderRegistry(providers)
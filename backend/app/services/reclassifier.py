@@ -0,0 +1,242 @@
+"""
+Bulk re-classification of stored tickets.
+
+Streams tickets in primary-key order, classifies them with bounded
+concurrency and writes the classification, with its provider, usage and
+latency, back in one bulk UPDATE per batch. Progress is checkpointed after every committed batch so
+an interrupted run resumes where it stopped.
+
+Usage:
+    cd backend && python -m app.services.reclassifier --checkpoint reclassify.json
+        [--batch-size 200] [--concurrency 8] [--max-calls 10000] [--max-tokens 5000000]
+        [--label other] [--since 2024-01-01]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Ticket
+from .ai_service import ai_service, classification_key
+
+
+logger = logging.getLogger(__name__)
+
+# Written from every new result so usage analytics match the new provider, model and prompt version
+USAGE_FIELDS = (
+    "original_tokens", "prompt_tokens", "input_tokens", "output_tokens", "cost_usd",
+    "provider_ttfb", "provider_latency"
+)
+# A duplicate answered from the run's cache cost nothing; the call is counted on the first ticket only
+UNPAID = {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+
+
+@dataclass
+class Checkpoint:
+    """Resumable progress of one re-classification run"""
+    last_id: int = 0
+    processed: int = 0
+    updated: int = 0
+    failed: int = 0
+    provider_calls: int = 0
+    prompt_tokens: int = 0
+    started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    @classmethod
+    def load(cls, path: Optional[Path]) -> "Checkpoint":
+        if path and path.exists():
+            return cls(**json.loads(path.read_text()))
+        return cls()
+
+    def save(self, path: Optional[Path]):
+        if not path:
+            return
+        # Write then rename so a crash mid-write never leaves a torn checkpoint
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self)))
+        os.replace(tmp_path, path)
+
+
+class BudgetExhausted(Exception):
+    """Raised when the run reaches its provider call or token budget"""
+
+
+class Reclassifier:
+    def __init__(
+        self,
+        db: Session,
+        checkpoint_path: Optional[Path] = None,
+        batch_size: int = 200,
+        concurrency: int = 8,
+        max_calls: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        label: Optional[str] = None,
+        since: Optional[datetime] = None
+    ):
+        self.db = db
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = Checkpoint.load(checkpoint_path)
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.label = label
+        self.since = since
+        # Identical ticket texts in the backlog are classified once per run
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def _filtered(self, query):
+        if self.label:
+            query = query.filter(Ticket.label == self.label)
+        if self.since:
+            query = query.filter(Ticket.created_at >= self.since)
+        return query
+
+    def remaining(self) -> int:
+        return self._filtered(self.db.query(func.count(Ticket.id))).filter(
+            Ticket.id > self.checkpoint.last_id
+        ).scalar()
+
+    def next_batch(self) -> List[tuple]:
+        """Next (id, ticket_text) rows after the checkpoint, by keyset rather than OFFSET"""
+        return self._filtered(self.db.query(Ticket.id, Ticket.ticket_text)).filter(
+            Ticket.id > self.checkpoint.last_id
+        ).order_by(Ticket.id).limit(self.batch_size).all()
+
+    def _check_budget(self):
+        if self.max_calls is not None and self.checkpoint.provider_calls >= self.max_calls:
+            raise BudgetExhausted(f"provider call budget of {self.max_calls} reached")
+        if self.max_tokens is not None and self.checkpoint.prompt_tokens >= self.max_tokens:
+            raise BudgetExhausted(f"prompt token budget of {self.max_tokens} reached")
+
+    async def classify(self, ticket_text: str) -> Dict[str, Any]:
+        key = classification_key(ticket_text)
+        if key in self._cache:
+            return {**self._cache[key], **UNPAID}
+
+        async with self.semaphore:
+            # Re-checked inside the semaphore so queued calls cannot overshoot the budget
+            if key in self._cache:
+                return {**self._cache[key], **UNPAID}
+            self._check_budget()
+            self.checkpoint.provider_calls += 1
+            result = await ai_service.classify_ticket(ticket_text)
+            self.checkpoint.prompt_tokens += result.get("prompt_tokens") or 0
+
+        if result["provider"] != "fallback":
+            self._cache[key] = result
+        return result
+
+    async def run_batch(self, rows: List[tuple]) -> int:
+        """Classify one batch and write it back; returns the number of updated tickets"""
+        results = await asyncio.gather(
+            *(self.classify(ticket_text) for _, ticket_text in rows), return_exceptions=True
+        )
+
+        updates = []
+        last_id = self.checkpoint.last_id
+        for (ticket_id, _), result in zip(rows, results):
+            if isinstance(result, BudgetExhausted):
+                # Stop at the first unclassified ticket so the resume point leaves no gaps
+                break
+            last_id = ticket_id
+            self.checkpoint.processed += 1
+            if isinstance(result, Exception) or result["provider"] == "fallback":
+                self.checkpoint.failed += 1
+                continue
+            updates.append({
+                "id": ticket_id,
+                "label": result["label"],
+                "confidence": result["confidence"],
+                "summary": result["summary"],
+                "provider": result["provider"],
+                "model": result.get("model"),
+                "prompt_version": result.get("prompt_version"),
+                "cascade_tier": result.get("cascade_tier"),
+                **{field: result.get(field) for field in USAGE_FIELDS},
+                "updated_at": datetime.utcnow()
+            })
+
+        if updates:
+            # ORM bulk UPDATE by primary key: one executemany per batch
+            self.db.execute(update(Ticket), updates)
+        self.db.commit()
+
+        self.checkpoint.updated += len(updates)
+        self.checkpoint.last_id = last_id
+        self.checkpoint.save(self.checkpoint_path)
+
+        budget_error = next((r for r in results if isinstance(r, BudgetExhausted)), None)
+        if budget_error:
+            raise budget_error
+        return len(updates)
+
+    async def run(self) -> Checkpoint:
+        total = self.remaining()
+        logger.info(f"Re-classifying {total} tickets after id {self.checkpoint.last_id}")
+        started = time.perf_counter()
+        done = 0
+
+        try:
+            while True:
+                rows = self.next_batch()
+                if not rows:
+                    break
+                await self.run_batch(rows)
+                done += len(rows)
+
+                elapsed = time.perf_counter() - started
+                rate = done / elapsed if elapsed else 0.0
+                eta = (total - done) / rate if rate else 0.0
+                logger.info(
+                    f"Re-classified {done}/{total} ({rate:.1f} tickets/s, ETA {eta / 60:.1f} min), "
+                    f"{self.checkpoint.provider_calls} provider calls, {self.checkpoint.prompt_tokens} prompt tokens"
+                )
+        except BudgetExhausted as e:
+            logger.warning(f"Stopping re-classification: {e}; resume from id {self.checkpoint.last_id}")
+
+        return self.checkpoint
+
+
+async def main(args: argparse.Namespace) -> Checkpoint:
+    db = SessionLocal()
+    try:
+        reclassifier = Reclassifier(
+            db,
+            checkpoint_path=args.checkpoint,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            max_calls=args.max_calls,
+            max_tokens=args.max_tokens,
+            label=args.label,
+            since=args.since
+        )
+        return await reclassifier.run()
+    finally:
+        db.close()
+        await ai_service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", type=Path, help="JSON file to resume from and record progress in")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-calls", type=int, help="stop after this many provider classifications")
+    parser.add_argument("--max-tokens", type=int, help="stop after sending this many prompt tokens")
+    parser.add_argument("--label", help="only re-classify tickets currently carrying this label")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only tickets created at or after this time")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    checkpoint = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(asdict(checkpoint), indent=2))
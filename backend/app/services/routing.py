@@ -0,0 +1,149 @@
+import logging
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..metrics import LLM_ROUTING_DECISIONS, LLM_PROVIDER_LATENCY
+from .providers import Provider, ProviderRegistry
+
+
+logger = logging.getLogger(__name__)
+
+ROUTING_POLICIES = ("priority", "latency", "cost")
+
+
+class ProviderStats:
+    """
+    Rolling window of recent latencies and confidences for one provider.
+
+    Samples older than max_age seconds are ignored. A provider demoted by
+    its stats is rarely called, so without expiry its window would never
+    refresh; once its samples age out it is treated as unmeasured and gets
+    traffic again.
+    """
+
+    def __init__(self, window: int = 200, max_age: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self.latencies: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self.confidences: Deque[Tuple[float, float]] = deque(maxlen=window)
+
+    def observe(self, latency: float, confidence: Optional[float]):
+        now = self.clock()
+        self.latencies.append((now, latency))
+        if confidence is not None:
+            self.confidences.append((now, confidence))
+
+    def _recent(self, samples: Deque[Tuple[float, float]]) -> List[float]:
+        cutoff = self.clock() - self.max_age
+        # Appended in time order, so expired samples are all at the left
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [value for _, value in samples]
+
+    def recent_confidences(self) -> List[float]:
+        return self._recent(self.confidences)
+
+    def p95(self) -> Optional[float]:
+        latencies = self._recent(self.latencies)
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def mean_confidence(self) -> Optional[float]:
+        confidences = self.recent_confidences()
+        if not confidences:
+            return None
+        return sum(confidences) / len(confidences)
+
+
+def parse_pins(spec: str) -> Dict[str, str]:
+    """Parse "api_key=provider,..." per-key provider pins (provider keys as in LLM_PROVIDERS)"""
+    pins = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        api_key, _, provider = item.partition("=")
+        pins[api_key.strip()] = provider.strip()
+    return pins
+
+
+class ProviderRouter:
+    """
+    Orders providers for each request according to a routing policy.
+
+    - priority: configured LLM_PROVIDERS order
+    - latency: lowest observed p95 first; providers without recent samples
+      go first so they get measured
+    - cost: cheapest provider whose rolling mean confidence meets the bar,
+      then the rest by price
+    Stats only count the last stats_max_age seconds, so a provider demoted
+    by the latency or cost policy is re-measured once its old samples age
+    out. A pinned API key always starts with its pinned provider. The
+    remaining providers stay in the list as failover.
+    """
+
+    def __init__(self, registry: ProviderRegistry, policy: str = "priority",
+                 confidence_bar: float = 0.7, pins: Optional[Dict[str, str]] = None,
+                 min_samples: int = 20, stats_max_age: float = 600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy {policy!r}; expected one of {', '.join(ROUTING_POLICIES)}")
+        self.registry = registry
+        self.policy = policy
+        self.confidence_bar = confidence_bar
+        self.pins = pins or {}
+        self.min_samples = min_samples
+        self.stats_max_age = stats_max_age
+        self.clock = clock
+        self.stats: Dict[str, ProviderStats] = {}
+
+    def stats_for(self, provider: Provider) -> ProviderStats:
+        if provider.key not in self.stats:
+            self.stats[provider.key] = ProviderStats(max_age=self.stats_max_age, clock=self.clock)
+        return self.stats[provider.key]
+
+    def pinned(self, api_key: Optional[str]) -> Optional[str]:
+        return self.pins.get(api_key) if api_key else None
+
+    def route(self, api_key: Optional[str] = None) -> List[Provider]:
+        providers = self.registry.enabled()
+        if self.policy == "latency":
+            providers.sort(key=lambda p: self.stats_for(p).p95() or 0.0)
+        elif self.policy == "cost":
+            providers.sort(key=lambda p: (not self._meets_bar(p), sum(p.price)))
+
+        policy = self.policy
+        pin = self.pinned(api_key)
+        if pin:
+            pinned = [p for p in providers if p.key == pin]
+            if pinned:
+                providers = pinned + [p for p in providers if p.key != pin]
+                policy = "pinned"
+
+        if providers:
+            LLM_ROUTING_DECISIONS.labels(policy, providers[0].key).inc()
+            logger.info(f"Routing ({policy}): {' > '.join(p.key for p in providers)}")
+        return providers
+
+    def _meets_bar(self, provider: Provider) -> bool:
+        confidences = self.stats_for(provider).recent_confidences()
+        if len(confidences) < self.min_samples:
+            # Too few recent samples to judge; let it through so it gets measured
+            return True
+        return sum(confidences) / len(confidences) >= self.confidence_bar
+
+    def observe(self, provider: Provider, latency: float, confidence: Optional[float] = None):
+        self.stats_for(provider).observe(latency, confidence)
+        LLM_PROVIDER_LATENCY.labels(provider.name, provider.model).observe(latency)
+
+
+def build_router(registry: ProviderRegistry) -> ProviderRouter:
+    return ProviderRouter(
+        registry,
+        policy=settings.llm_routing_policy,
+        confidence_bar=settings.llm_confidence_bar,
+        pins=parse_pins(settings.llm_provider_pins),
+        stats_max_age=settings.llm_routing_stats_max_age
+    )
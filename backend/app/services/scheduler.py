@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from ..config import settings
+from ..metrics import LLM_QUEUE_WAIT, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_SHED
+
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when a request is shed because it cannot start within the queue deadline"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Classification capacity exceeded, retry after {self.retry_after}s")
+
+
+def concurrency_from_limits(rpm: int, tpm: int, tokens_per_request: int, expected_latency: float) -> int:
+    """
+    Derive a global in-flight cap from provider RPM/TPM limits.
+
+    By Little's law the sustainable concurrency is arrival rate times latency;
+    the arrival rate is bounded by whichever of the request or token limits
+    is tighter.
+    """
+    requests_per_second = min(rpm, tpm / max(tokens_per_request, 1)) / 60.0
+    return max(1, int(requests_per_second * expected_latency))
+
+
+class _Waiter:
+    __slots__ = ("tenant", "future", "enqueued_at")
+
+    def __init__(self, tenant: str, future: asyncio.Future):
+        self.tenant = tenant
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class LLMScheduler:
+    """
+    Global concurrency cap with weighted fair queuing across tenants.
+
+    Each tenant (api_key) is weighted by its ApiKey.rate_limit tier. Queued
+    requests are ordered by virtual finish time, so a tenant flooding the
+    queue only delays its own requests while others keep their share.
+    """
+
+    def __init__(self, max_in_flight: int, queue_deadline: float, expected_latency: float):
+        self.max_in_flight = max_in_flight
+        self.queue_deadline = queue_deadline
+        self.expected_latency = expected_latency
+        self._in_flight = 0
+        self._queue: List[tuple] = []
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._sequence = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, weight: Optional[int] = None):
+        """Hold one in-flight provider slot for the duration of the block"""
+        await self.acquire(tenant, weight)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, tenant: str, weight: Optional[int] = None):
+        if self._in_flight < self.max_in_flight and not self._queued:
+            self._in_flight += 1
+            LLM_IN_FLIGHT.set(self._in_flight)
+            LLM_QUEUE_WAIT.observe(0.0)
+            return
+
+        estimated_wait = self.estimated_wait()
+        if estimated_wait > self.queue_deadline:
+            LLM_SHED.labels("admission").inc()
+            raise SchedulerOverloaded(estimated_wait - self.queue_deadline)
+
+        waiter = _Waiter(tenant, asyncio.get_running_loop().create_future())
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        finish = start + 1.0 / max(weight or 1, 1)
+        self._last_finish[tenant] = finish
+        heapq.heappush(self._queue, (finish, next(self._sequence), start, waiter))
+        self._queued += 1
+        LLM_QUEUE_DEPTH.set(self._queued)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_deadline)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queued -= 1
+                LLM_QUEUE_DEPTH.set(self._queued)
+                LLM_SHED.labels("deadline").inc()
+                raise SchedulerOverloaded(self.estimated_wait())
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted as we were cancelled; hand it on
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._queued -= 1
+                LLM_QUEUE_DEPTH.set(self._queued)
+            raise
+
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - waiter.enqueued_at)
+
+    def release(self):
+        while self._queue:
+            _, _, start, waiter = heapq.heappop(self._queue)
+            if waiter.future.cancelled():
+                continue
+            self._queued -= 1
+            LLM_QUEUE_DEPTH.set(self._queued)
+            self._virtual_time = start
+            # The slot passes straight to the next waiter; in-flight count is unchanged
+            waiter.future.set_result(True)
+            return
+
+        self._in_flight -= 1
+        LLM_IN_FLIGHT.set(self._in_flight)
+        if not self._in_flight:
+            # Idle: forget finish tags so returning tenants start fresh
+            self._virtual_time = 0.0
+            self._last_finish.clear()
+
+    def estimated_wait(self) -> float:
+        """Expected seconds before a newly queued request starts"""
+        return (self._queued + 1) * self.expected_latency / self.max_in_flight
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+
+def build_scheduler() -> LLMScheduler:
+    max_in_flight = settings.llm_max_concurrency or concurrency_from_limits(
+        settings.llm_rpm_limit,
+        settings.llm_tpm_limit,
+        settings.llm_tokens_per_request,
+        settings.llm_expected_latency
+    )
+    # The cap covers the provider account, shared by every worker process of every pod,
+    # so split it between them all or the fleet overshoots together
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    replicas = settings.replicas
+    max_in_flight = max(1, max_in_flight // (max(workers, 1) * max(replicas, 1)))
+    logger.info(
+        f"LLM scheduler: {max_in_flight} concurrent provider calls per worker "
+        f"({workers} workers x {replicas} replicas)"
+    )
+    return LLMScheduler(
+        max_in_flight=max_in_flight,
+        queue_deadline=settings.llm_queue_deadline,
+        expected_latency=settings.llm_expected_latency
+    )
+
+
+# Global instance
+llm_scheduler = build_scheduler()
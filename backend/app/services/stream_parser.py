@@ -0,0 +1,101 @@
+import json
+from typing import Any, List, Tuple
+
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONFields:
+    """
+    Extracts top-level fields of a JSON object while it is still streaming.
+
+    feed() takes arbitrary chunks of provider output and returns the
+    (key, value) pairs whose values completed within that chunk, so a
+    caller can act on "label" long before "summary" has finished. Only
+    top-level string, number, boolean and null values are reported; nested
+    objects and arrays are skipped. The complete text is kept in .text for
+    a final strict parse.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._expecting_key = False
+        self._key = None
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._token: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._chunks.append(chunk)
+        completed = []
+        for char in chunk:
+            if self._in_string:
+                self._feed_string(char, completed)
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = self._depth == 1 and self._expecting_key
+                self._token = []
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expecting_key = char == "{"
+                else:
+                    # Nested containers are not reported
+                    self._key = None
+            elif char in "}]":
+                if self._depth == 1:
+                    self._finish_scalar(completed)
+                self._depth -= 1
+            elif self._depth != 1:
+                continue
+            elif char == ":":
+                self._expecting_key = False
+                self._token = []
+            elif char == ",":
+                self._finish_scalar(completed)
+                self._expecting_key = True
+            elif char in _WHITESPACE:
+                self._finish_scalar(completed)
+            elif not self._expecting_key and self._key is not None:
+                self._token.append(char)
+        return completed
+
+    def _feed_string(self, char: str, completed: List[Tuple[str, Any]]):
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if self._depth != 1:
+                self._token = []
+                return
+            try:
+                value = json.loads('"' + "".join(self._token) + '"')
+            except ValueError:
+                value = "".join(self._token)
+            if self._string_is_key:
+                self._key = value
+            elif self._key is not None:
+                completed.append((self._key, value))
+                self._key = None
+            self._token = []
+            return
+        self._token.append(char)
+
+    def _finish_scalar(self, completed: List[Tuple[str, Any]]):
+        if not self._token or self._key is None:
+            return
+        try:
+            value = json.loads("".join(self._token))
+        except ValueError:
+            value = "".join(self._token)
+        completed.append((self._key, value))
+        self._key = None
+        self._token = []
@@ -1,30 +1,122 @@
 import logging
-from datetime import datetime, date
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from ..models import Ticket, ApiKey, User
+from datetime import datetime, date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import case, func, insert, literal_column, or_, tuple_, update, Text
+from sqlalchemy.orm import Session, noload
+from ..models import Ticket, ApiKey, User, ticket_search_document, ticket_search_vector
 from ..config import settings
+from ..serialization import decode_cursor, encode_cursor
 from .ai_service import ai_service
+from .scheduler import SchedulerOverloaded, llm_scheduler
 
 
 logger = logging.getLogger(__name__)
 
 
 class TicketService:
+    # Column projections used by the read paths; only these columns leave the database
+    RECENT_TICKET_COLUMNS = (
+        Ticket.ticket_text,
+        Ticket.label,
+        Ticket.confidence,
+        Ticket.summary,
+        Ticket.created_at,
+        Ticket.processing_time
+    )
+    TICKET_LISTING_COLUMNS = (
+        Ticket.id,
+        Ticket.label,
+        Ticket.confidence,
+        Ticket.api_key,
+        Ticket.created_at,
+        Ticket.processing_time
+    )
+    PREVIEW_LENGTH = 100
+    USAGE_BUCKETS = ("hour", "day", "week")
+    SEARCH_MATCHES = ("auto", "fulltext", "substring")
+    # Trigrams need three characters before the index can narrow anything down
+    MIN_SUBSTRING_LENGTH = 3
+
+    # Created per request; slots keep the instance to a single pointer
+    __slots__ = ("db",)
+
     def __init__(self, db: Session):
         self.db = db
 
     async def process_ticket(self, ticket_text: str, api_key: str, user_id: Optional[int] = None) -> Ticket:
         """Process a ticket through AI classification and save to database"""
 
-        # Check rate limit
-        await self._check_rate_limit(api_key)
+        # Reserve one request of the daily quota before paying for a provider call
+        reserved_on = date.today()
+        rate_limit = await self._check_rate_limit(api_key, reserved_on)
+
+        try:
+            # Classify with AI, sharing provider capacity fairly across API keys;
+            # duplicates of a ticket already in flight join it without taking a slot
+            classification = await ai_service.classify_ticket(
+                ticket_text,
+                slot=lambda: llm_scheduler.slot(api_key, weight=rate_limit),
+                api_key=api_key
+            )
+            ticket = self._record_ticket(self._build_ticket(ticket_text, api_key, classification, user_id))
+        except BaseException:
+            self._refund_quota(api_key, reserved_on)
+            raise
+        if classification.get("provider") == "fallback":
+            # Every provider failed; the ticket is kept but not counted
+            self._refund_quota(api_key, reserved_on)
+
+        logger.info(f"Ticket processed: {ticket.id} - {ticket.label} ({ticket.confidence:.2f})")
+        return ticket
+
+    async def open_ticket_stream(self, ticket_text: str, api_key: str,
+                                 user_id: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Reserve quota, then return an iterator of streaming classification events.
+
+        Unknown keys and keys out of quota raise here, before any response is
+        started. The last event carries the saved ticket id, or is an error
+        event if the scheduler refused the call. The reserved request is
+        given back if no ticket is saved, the client goes away first, or every
+        provider failed.
+        """
+        reserved_on = date.today()
+        rate_limit = await self._check_rate_limit(api_key, reserved_on)
+        return self._stream_ticket(ticket_text, api_key, rate_limit, reserved_on, user_id)
 
-        # Classify with AI
-        classification = await ai_service.classify_ticket(ticket_text)
+    async def _stream_ticket(self, ticket_text: str, api_key: str, weight: int, reserved_on: date,
+                             user_id: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        charged = False
+        try:
+            async with llm_scheduler.slot(api_key, weight=weight):
+                async for event in ai_service.stream_classification(ticket_text, api_key):
+                    if event["event"] != "result":
+                        yield event
+                        continue
 
-        # Create ticket record
-        ticket = Ticket(
+                    ticket = self._record_ticket(self._build_ticket(ticket_text, api_key, event, user_id))
+                    charged = event.get("provider") != "fallback"
+                    logger.info(f"Ticket streamed: {ticket.id} - {ticket.label} ({ticket.confidence:.2f})")
+                    yield {
+                        "event": "result",
+                        "id": ticket.id,
+                        "label": ticket.label,
+                        "confidence": ticket.confidence,
+                        "summary": ticket.summary,
+                        "revised": event.get("revised", False)
+                    }
+        except SchedulerOverloaded as e:
+            # Headers are already sent, so overload is reported in-band
+            yield {"event": "error", "detail": str(e), "retry_after": e.retry_after}
+        finally:
+            if not charged:
+                self._refund_quota(api_key, reserved_on)
+
+    def _build_ticket(self, ticket_text: str, api_key: str, classification: Dict[str, Any],
+                      user_id: Optional[int] = None) -> Ticket:
+        """Ticket row for a classification result from AIService"""
+        now = datetime.utcnow()
+        return Ticket(
             ticket_text=ticket_text,
             label=classification['label'],
             confidence=classification['confidence'],
@@ -33,43 +125,307 @@ class TicketService:
             user_id=user_id,
             source="api",
             status="processed",
-            processing_time=classification.get('processing_time', 0)
+            processing_time=classification.get('processing_time', 0),
+            original_tokens=classification.get('original_tokens'),
+            prompt_tokens=classification.get('prompt_tokens'),
+            provider=classification.get('provider'),
+            model=classification.get('model'),
+            prompt_version=classification.get('prompt_version'),
+            input_tokens=classification.get('input_tokens'),
+            output_tokens=classification.get('output_tokens'),
+            cost_usd=classification.get('cost_usd'),
+            provider_ttfb=classification.get('provider_ttfb'),
+            provider_latency=classification.get('provider_latency'),
+            cascade_tier=classification.get('cascade_tier'),
+            created_at=now,
+            updated_at=now
         )
 
-        self.db.add(ticket)
-        self.db.commit()
-        self.db.refresh(ticket)
-
-        logger.info(f"Ticket processed: {ticket.id} - {ticket.label} ({ticket.confidence:.2f})")
-        return ticket
+    async def _check_rate_limit(self, api_key: str, today: Optional[date] = None) -> int:
+        """
+        Reserve one request of the key's daily quota, before any provider call.
 
-    async def _check_rate_limit(self, api_key: str):
-        """Check and update rate limit for API key"""
-        today = date.today()
+        One conditional UPDATE ... RETURNING counts the request only if the
+        key is active and has quota left today, so concurrent requests can
+        never reserve more than the quota between them; the reservation is
+        committed at once so no transaction stays open across the provider
+        call. Returns the key's rate limit, which also weights its scheduler
+        share. Raises ValueError("Invalid API key") for unknown or inactive
+        keys and ValueError("Rate limit exceeded") for exhausted ones.
+        """
+        today = today or date.today()
+        quota = update(ApiKey).where(
+            ApiKey.key == api_key,
+            ApiKey.is_active == True,
+            or_(
+                ApiKey.last_reset != today,
+                ApiKey.last_reset.is_(None),
+                func.coalesce(ApiKey.requests_today, 0) < ApiKey.rate_limit
+            )
+        ).values(
+            requests_today=case(
+                (ApiKey.last_reset == today, func.coalesce(ApiKey.requests_today, 0) + 1), else_=1
+            ),
+            last_reset=today
+        ).returning(ApiKey.rate_limit)
+        try:
+            rate_limit = self.db.execute(quota).scalar()
+            if rate_limit is None:
+                # Only a refused reservation pays for telling the two refusals apart
+                active = self.db.query(ApiKey.is_active).filter(ApiKey.key == api_key).scalar()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if rate_limit is None:
+            raise ValueError("Rate limit exceeded" if active else "Invalid API key")
+        return rate_limit
 
-        api_key_obj = self.db.query(ApiKey).filter(ApiKey.key == api_key).first()
-        if not api_key_obj:
-            raise ValueError("Invalid API key")
+    def _refund_quota(self, api_key: str, reserved_on: date):
+        """Give back a request reserved by _check_rate_limit that was not charged"""
+        try:
+            # A counter already reset for a later day has nothing of this reservation left to give back
+            self.db.query(ApiKey).filter(
+                ApiKey.key == api_key,
+                ApiKey.last_reset == reserved_on,
+                ApiKey.requests_today > 0
+            ).update({ApiKey.requests_today: ApiKey.requests_today - 1}, synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            # Never mask the failure that made the refund necessary
+            self.db.rollback()
+            logger.error(f"Failed to refund quota for {api_key[:8]}...: {e}")
 
-        # Reset counter if it's a new day
-        if api_key_obj.last_reset != today:
-            api_key_obj.requests_today = 0
-            api_key_obj.last_reset = today
+    def _record_ticket(self, ticket: Ticket) -> Ticket:
+        """
+        Insert the ticket and read back its id in one round trip (INSERT ... RETURNING).
 
-        # Check limit
-        if api_key_obj.requests_today >= api_key_obj.rate_limit:
-            raise ValueError("Rate limit exceeded")
+        The request was already counted by _check_rate_limit.
+        """
+        values = {
+            column.key: getattr(ticket, column.key)
+            for column in Ticket.__table__.columns
+            if getattr(ticket, column.key) is not None
+        }
+        try:
+            ticket.id = self.db.execute(insert(Ticket).values(values).returning(Ticket.id)).scalar_one()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return ticket
 
-        # Increment counter
-        api_key_obj.requests_today += 1
+    def deactivate_api_key(self, api_key: str) -> bool:
+        """Deactivate a key; returns False if there is no such key"""
+        updated = self.db.query(ApiKey).filter(ApiKey.key == api_key).update(
+            {ApiKey.is_active: False}, synchronize_session=False
+        )
         self.db.commit()
+        return updated > 0
 
     def get_recent_tickets(self, api_key: str, limit: int = 10) -> List[Ticket]:
         """Get recent tickets for an API key"""
-        return self.db.query(Ticket).filter(
+        return self.db.query(Ticket).options(noload("*")).filter(
             Ticket.api_key == api_key
         ).order_by(Ticket.created_at.desc()).limit(limit).all()
 
+    def get_recent_ticket_rows(self, api_key: str, limit: int = 10) -> List[tuple]:
+        """Get recent tickets for an API key as plain result tuples"""
+        return self.db.query(*self.RECENT_TICKET_COLUMNS).filter(
+            Ticket.api_key == api_key
+        ).order_by(Ticket.created_at.desc()).limit(limit).all()
+
+    def get_ticket_listing_rows(self, skip: int = 0, limit: int = 100,
+                                preview_length: int = PREVIEW_LENGTH) -> List[tuple]:
+        """
+        Get the admin ticket listing as result tuples.
+
+        Rows are (id, ticket_text_preview, label, confidence, api_key,
+        created_at, processing_time); the text is truncated by the database
+        so full ticket bodies are never transferred.
+        """
+        columns = list(self.TICKET_LISTING_COLUMNS)
+        columns.insert(1, self._ticket_preview(preview_length))
+        return self.db.query(*columns).order_by(Ticket.id).offset(skip).limit(limit).all()
+
+    def search_ticket_rows(
+        self,
+        q: str,
+        match: str = "auto",
+        label: Optional[str] = None,
+        api_key: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        preview_length: int = PREVIEW_LENGTH
+    ) -> Tuple[List[tuple], Optional[str], str]:
+        """
+        Search ticket text and summaries, newest first.
+
+        "fulltext" matches q as a web-search style query (words, "quoted
+        phrases", or, -exclusion) with English stemming, through the
+        tsvector GIN index. "substring" matches q anywhere in the text,
+        case-insensitively, through the trigram index; it finds partial
+        words and codes that stemming does not. "auto" runs full text and
+        falls back to substring when the first page comes back empty.
+        Databases other than PostgreSQL only support substring matching.
+
+        Rows have the admin listing shape. Pages are keyset-paginated on
+        (created_at, id); the cursor also pins the match used, so later
+        pages of an "auto" search do not switch modes. Returns (rows,
+        next_cursor, match used). Raises ValueError for bad arguments.
+        """
+        q = q.strip()
+        if not q:
+            raise ValueError("Search query is empty")
+        if match not in self.SEARCH_MATCHES:
+            raise ValueError(f"match must be one of {', '.join(self.SEARCH_MATCHES)}")
+        if min_confidence is not None and max_confidence is not None and min_confidence > max_confidence:
+            raise ValueError("min_confidence is greater than max_confidence")
+
+        position = None
+        if cursor:
+            match, _, position = cursor.partition(":")
+            if match not in ("fulltext", "substring"):
+                raise ValueError("Invalid cursor")
+            position = decode_cursor(position)
+        if self.db.get_bind().dialect.name != "postgresql":
+            match = "substring"
+        if match == "substring" and len(q) < self.MIN_SUBSTRING_LENGTH:
+            raise ValueError(f"Substring search needs at least {self.MIN_SUBSTRING_LENGTH} characters")
+
+        columns = list(self.TICKET_LISTING_COLUMNS)
+        columns.insert(1, self._ticket_preview(preview_length))
+        query = self.db.query(*columns)
+        if label:
+            query = query.filter(Ticket.label == label)
+        if api_key:
+            query = query.filter(Ticket.api_key == api_key)
+        if min_confidence is not None:
+            query = query.filter(Ticket.confidence >= min_confidence)
+        if max_confidence is not None:
+            query = query.filter(Ticket.confidence <= max_confidence)
+        if since:
+            query = query.filter(Ticket.created_at >= since)
+        if until:
+            query = query.filter(Ticket.created_at < until)
+        if position:
+            query = query.filter(tuple_(Ticket.created_at, Ticket.id) < tuple_(*position))
+
+        def page(mode: str) -> List[tuple]:
+            return query.filter(self._search_condition(q, mode)).order_by(
+                Ticket.created_at.desc(), Ticket.id.desc()
+            ).limit(limit + 1).all()
+
+        used = "fulltext" if match == "auto" else match
+        rows = page(used)
+        if match == "auto" and not rows and len(q) >= self.MIN_SUBSTRING_LENGTH:
+            used = "substring"
+            rows = page(used)
+
+        if len(rows) <= limit:
+            return rows, None, used
+        rows = rows[:limit]
+        return rows, f"{used}:{encode_cursor(rows[-1].created_at, rows[-1].id)}", used
+
+    @staticmethod
+    def _search_condition(q: str, match: str):
+        """WHERE clause for one search mode, built on the expressions the search indexes cover"""
+        if match == "fulltext":
+            return ticket_search_vector(Ticket.ticket_text, Ticket.summary).op("@@")(
+                func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+            )
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return ticket_search_document(Ticket.ticket_text, Ticket.summary).ilike(pattern, escape="\\")
+
+    @staticmethod
+    def _ticket_preview(length: int):
+        """SQL expression truncating ticket_text to length characters plus an ellipsis"""
+        return case(
+            (func.length(Ticket.ticket_text) > length,
+             func.substr(Ticket.ticket_text, 1, length, type_=Text) + "..."),
+            else_=Ticket.ticket_text
+        ).label("ticket_text")
+
+    def get_usage_rows(self, since: datetime, bucket: str = "day", api_key: Optional[str] = None) -> List[tuple]:
+        """
+        Latency, token and cost aggregates per time bucket, provider, model and prompt version.
+
+        Rows are (bucket, provider, model, prompt_version, tickets, avg_ttfb,
+        p50_latency, p95_latency, input_tokens, output_tokens, cost_usd).
+        Percentiles are computed in PostgreSQL with percentile_cont.
+        """
+        if bucket not in self.USAGE_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(self.USAGE_BUCKETS)}")
+
+        period = func.date_trunc(bucket, Ticket.created_at).label("bucket")
+        query = self.db.query(
+            period,
+            Ticket.provider,
+            Ticket.model,
+            Ticket.prompt_version,
+            func.count(Ticket.id),
+            func.avg(Ticket.provider_ttfb),
+            func.percentile_cont(0.5).within_group(Ticket.provider_latency),
+            func.percentile_cont(0.95).within_group(Ticket.provider_latency),
+            func.coalesce(func.sum(Ticket.input_tokens), 0),
+            func.coalesce(func.sum(Ticket.output_tokens), 0),
+            func.coalesce(func.sum(Ticket.cost_usd), 0.0)
+        ).filter(Ticket.created_at >= since)
+        if api_key:
+            query = query.filter(Ticket.api_key == api_key)
+
+        return query.group_by(
+            period, Ticket.provider, Ticket.model, Ticket.prompt_version
+        ).order_by(period, Ticket.provider, Ticket.model).all()
+
+    def get_cascade_report(self, since: datetime, api_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Share of tickets each cascade tier resolved, with its hit rate, confidence, latency and cost.
+
+        hit_rate is the share of tickets reaching a tier that were resolved
+        there; a ticket reaches tier n when it was resolved at tier n or later.
+        Latency and cost are end to end over all tiers the ticket went through.
+        """
+        query = self.db.query(
+            Ticket.cascade_tier,
+            Ticket.provider,
+            Ticket.model,
+            func.count(Ticket.id),
+            func.avg(Ticket.confidence),
+            func.avg(Ticket.provider_latency),
+            func.percentile_cont(0.95).within_group(Ticket.provider_latency),
+            func.coalesce(func.sum(Ticket.cost_usd), 0.0)
+        ).filter(Ticket.created_at >= since, Ticket.cascade_tier.isnot(None))
+        if api_key:
+            query = query.filter(Ticket.api_key == api_key)
+        rows = query.group_by(Ticket.cascade_tier, Ticket.provider, Ticket.model).order_by(Ticket.cascade_tier).all()
+
+        total = sum(row[3] for row in rows)
+        per_tier: Dict[int, int] = {}
+        for row in rows:
+            per_tier[row[0]] = per_tier.get(row[0], 0) + row[3]
+
+        report = []
+        for tier, provider, model, tickets, avg_confidence, avg_latency, p95_latency, cost_usd in rows:
+            reached = sum(count for t, count in per_tier.items() if t >= tier)
+            report.append({
+                "tier": tier,
+                "provider": provider,
+                "model": model,
+                "tickets": tickets,
+                "share": tickets / total,
+                "hit_rate": per_tier[tier] / reached,
+                "avg_confidence": avg_confidence,
+                "avg_latency": avg_latency,
+                "p95_latency": p95_latency,
+                "cost_usd": cost_usd
+            })
+        return report
+
     def get_ticket_stats(self, api_key: str) -> dict:
         """Get statistics for tickets processed with this API key"""
         tickets = self.db.query(Ticket).filter(Ticket.api_key == api_key).all()
@@ -99,7 +455,7 @@ class TicketService:
 
     def get_all_tickets(self, skip: int = 0, limit: int = 100) -> List[Ticket]:
         """Get all tickets (admin function)"""
-        return self.db.query(Ticket).offset(skip).limit(limit).all()
+        return self.db.query(Ticket).options(noload("*")).offset(skip).limit(limit).all()
 
     def delete_old_tickets(self, days: int = 90):
         """Delete tickets older than specified days (GDPR compliance)"""
@@ -0,0 +1,115 @@
+"""
+Webhook request and response bodies, stored apart from webhook_logs.
+
+Bodies are gzip-compressed and keyed by the sha256 of their uncompressed
+content, so a body repeated across deliveries (provider retries, identical
+notifications, canned responses) is stored once. Log rows keep only the
+hashes, which keeps webhook_logs narrow for the admin listing; bodies are
+read on demand, one log at a time.
+"""
+import gzip
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from ..config import settings
+from ..models import WebhookLog, WebhookPayload
+
+
+DECODERS = {"gzip": gzip.decompress}
+
+
+def store_payload(db: Session, body: Optional[str]) -> Optional[str]:
+    """
+    Store body unless an identical one is already stored; returns its hash.
+
+    One upsert either way: a duplicate only bumps last_seen_at, which also
+    locks the row so a concurrent garbage collection cannot remove it from
+    under the log row about to reference it. Does not commit.
+    """
+    if body is None:
+        return None
+    raw = body.encode()
+    digest = hashlib.sha256(raw).hexdigest()
+    now = datetime.utcnow()
+    values = {
+        "hash": digest,
+        "encoding": "gzip",
+        "data": gzip.compress(raw, compresslevel=settings.webhook_payload_compression_level, mtime=0),
+        "size": len(raw),
+        "created_at": now,
+        "last_seen_at": now
+    }
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(WebhookPayload).values(values).on_conflict_do_update(
+            index_elements=[WebhookPayload.hash], set_={"last_seen_at": now}
+        )
+        db.execute(statement)
+    else:
+        existing = db.get(WebhookPayload, digest)
+        if existing is not None:
+            existing.last_seen_at = now
+        else:
+            db.add(WebhookPayload(**values))
+        db.flush()
+    return digest
+
+
+def record_webhook(
+    db: Session,
+    provider: str,
+    payload: Optional[str],
+    response: Optional[str],
+    status_code: int,
+    processing_time: float
+) -> WebhookLog:
+    """Log one webhook delivery, storing its bodies out of line"""
+    log = WebhookLog(
+        provider=provider,
+        payload_hash=store_payload(db, payload),
+        response_hash=store_payload(db, response),
+        status_code=status_code,
+        processing_time=processing_time
+    )
+    db.add(log)
+    db.commit()
+    return log
+
+
+def _decode(encoding: Optional[str], data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return DECODERS[encoding](data).decode()
+
+
+def load_webhook_bodies(db: Session, log_id: int) -> Optional[Dict[str, Optional[str]]]:
+    """Decompressed payload and response of one log in a single query, or None if the log is gone"""
+    payload = aliased(WebhookPayload)
+    response = aliased(WebhookPayload)
+    row = db.query(
+        WebhookLog.id, payload.encoding, payload.data, response.encoding, response.data
+    ).outerjoin(
+        payload, payload.hash == WebhookLog.payload_hash
+    ).outerjoin(
+        response, response.hash == WebhookLog.response_hash
+    ).filter(WebhookLog.id == log_id).first()
+    if row is None:
+        return None
+    return {"id": row[0], "payload": _decode(row[1], row[2]), "response": _decode(row[3], row[4])}
+
+
+def delete_orphaned_payloads(db: Session, grace: timedelta = timedelta(hours=24)) -> int:
+    """Delete bodies no log references and no write has touched for grace; does not commit"""
+    cutoff = datetime.utcnow() - grace
+    return db.query(WebhookPayload).filter(
+        WebhookPayload.last_seen_at < cutoff,
+        ~exists().where(WebhookLog.payload_hash == WebhookPayload.hash),
+        ~exists().where(WebhookLog.response_hash == WebhookPayload.hash)
+    ).delete(synchronize_session=False)
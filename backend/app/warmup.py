@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from .config import settings
+from .database import warm_pool
+from .services.ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Tracks background warm-up so readiness is reported only once pools are warm"""
+
+    def __init__(self):
+        self.ready = False
+        self.steps: Dict[str, str] = {}
+
+
+warmup_state = WarmupState()
+
+
+async def warm_up():
+    """Pre-warm the database pool and provider HTTP connections in the background"""
+    start_time = time.perf_counter()
+
+    try:
+        await asyncio.to_thread(warm_pool, settings.warmup_db_connections)
+        warmup_state.steps["database"] = "warm"
+    except Exception as e:
+        # Without a database we cannot serve traffic; stay unready
+        logger.error(f"Database warm-up failed: {e}")
+        warmup_state.steps["database"] = f"failed: {e}"
+        return
+
+    # Provider warm-up failures are logged but do not block readiness
+    await ai_service.warm_up()
+    warmup_state.steps["providers"] = "warm"
+
+    warmup_state.ready = True
+    logger.info(f"Warm-up completed in {time.perf_counter() - start_time:.2f}s")
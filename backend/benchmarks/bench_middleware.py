@@ -0,0 +1,118 @@
+"""
+Per-request overhead of the middleware stack, before and after consolidation.
+
+Builds three minimal apps with the same trivial endpoint and drives them
+in-process through raw ASGI calls (no sockets), so the numbers isolate
+middleware cost:
+
+  bare     no middleware
+  legacy   CORS + TrustedHost("*") + SlowAPIMiddleware + @app.middleware("http") timing
+  current  CORS + RequestContextMiddleware (request ID, limiter, timing, metrics)
+
+Usage:
+    cd backend && python -m benchmarks.bench_middleware [--requests 20000]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+
+from app.middleware import RequestContextMiddleware
+from app.rate_limit import RateLimit, RateLimiter
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"status": "pong"}
+
+    return app
+
+
+def add_cors(app: FastAPI):
+    app.add_middleware(
+        CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    )
+
+
+def bare_app() -> FastAPI:
+    return make_app()
+
+
+def legacy_app() -> FastAPI:
+    from slowapi import Limiter, _rate_limit_exceeded_handler
+    from slowapi.errors import RateLimitExceeded
+    from slowapi.middleware import SlowAPIMiddleware
+    from slowapi.util import get_remote_address
+
+    app = make_app()
+    add_cors(app)
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    app.state.limiter = Limiter(key_func=get_remote_address)
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_middleware(SlowAPIMiddleware)
+
+    @app.middleware("http")
+    async def add_process_time_header(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+    return app
+
+
+def current_app() -> FastAPI:
+    app = make_app()
+    limiter = RateLimiter(RateLimit(10 ** 9, 60), {}, use_redis=False)
+    app.add_middleware(RequestContextMiddleware, limiter=limiter)
+    add_cors(app)
+    return app
+
+
+async def call(app, scope):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)
+
+
+async def measure(app, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/v1/ping", "raw_path": b"/api/v1/ping", "root_path": "",
+        "query_string": b"", "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        "headers": [(b"host", b"testserver"), (b"x-api-key", b"demo_key_123"), (b"origin", b"http://example.com")],
+    }
+    # Build the middleware stack and warm caches
+    for _ in range(200):
+        await call(app, scope)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app, scope)
+    return (time.perf_counter() - started) / requests
+
+
+async def run(requests: int):
+    results = {name: await measure(factory(), requests) for name, factory in (
+        ("bare", bare_app), ("legacy", legacy_app), ("current", current_app)
+    )}
+    print(f"{'stack':<8} {'us/request':>11} {'overhead us':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<8} {seconds * 1e6:>11.1f} {(seconds - results['bare']) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
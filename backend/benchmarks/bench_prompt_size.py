@@ -0,0 +1,67 @@
+"""
+Prompt-size benchmark over the long-ticket fixture corpus.
+
+Reports original vs sent token counts per ticket and the label agreement
+between classifying the raw text and the preprocessed text. With provider
+keys configured the live AIService is used (``--live``); otherwise a keyword
+classifier stands in so the benchmark runs offline.
+
+Usage:
+    cd backend && python -m benchmarks.bench_prompt_size [--live]
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from app.services.prompt_preprocessor import prompt_preprocessor
+
+FIXTURE = Path(__file__).parent / "fixtures" / "long_tickets.json"
+
+KEYWORDS = {
+    "billing_issue": ("charged", "refund", "invoice", "billing", "payment", "credit"),
+    "bug": ("error", "fails", "500", "broken", "stopped", "crash"),
+    "feature_request": ("would be great", "please add", "support for", "feature"),
+}
+
+
+async def keyword_classify(text: str, preprocess: bool = True) -> dict:
+    if preprocess:
+        text = prompt_preprocessor.process(text)["text"]
+    lowered = text.lower()
+    scores = {label: sum(lowered.count(k) for k in words) for label, words in KEYWORDS.items()}
+    label = max(scores, key=scores.get)
+    return {"label": label if scores[label] else "other"}
+
+
+async def run(live: bool = False):
+    if live:
+        from app.services.ai_service import ai_service
+        classify = ai_service.classify_ticket
+    else:
+        classify = keyword_classify
+
+    corpus = json.loads(FIXTURE.read_text())
+    total_original = total_sent = agree = correct = 0
+
+    print(f"{'#':>3} {'orig tok':>9} {'sent tok':>9} {'raw':>16} {'processed':>16} {'expected':>16}")
+    for i, item in enumerate(corpus):
+        prepared = prompt_preprocessor.process(item["ticket_text"])
+        raw = await classify(item["ticket_text"], preprocess=False)
+        processed = await classify(item["ticket_text"], preprocess=True)
+
+        total_original += prepared["original_tokens"]
+        total_sent += prepared["prompt_tokens"]
+        agree += raw["label"] == processed["label"]
+        correct += processed["label"] == item["label"]
+        print(f"{i:>3} {prepared['original_tokens']:>9} {prepared['prompt_tokens']:>9} "
+              f"{raw['label']:>16} {processed['label']:>16} {item['label']:>16}")
+
+    print()
+    print(f"token reduction: {total_original} -> {total_sent} ({1 - total_sent / total_original:.1%})")
+    print(f"label agreement raw vs processed: {agree}/{len(corpus)}")
+    print(f"processed labels matching fixture: {correct}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(live="--live" in sys.argv))
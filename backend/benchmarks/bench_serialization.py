@@ -0,0 +1,64 @@
+"""
+Micro-benchmark for list endpoint serialisation.
+
+Compares the old path (ORM-like objects -> Pydantic models -> jsonable dicts
+-> stdlib json) with the orjson path used by ``rows_response`` (SQL result
+tuples -> dicts -> orjson) and reports the per-row cost of each.
+
+Usage:
+    cd backend && python -m benchmarks.bench_serialization [rows ...]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from app.routes.admin import API_KEY_FIELDS
+from app.schemas import ApiKeyResponse
+from app.serialization import rows_response
+
+
+def make_rows(count: int) -> list:
+    return [
+        (f"key_cus_{i:08d}", f"cus_{i:08d}", 1000, i % 1000, i % 7 != 0)
+        for i in range(count)
+    ]
+
+
+def legacy_path(rows: list) -> bytes:
+    """Mirror of the previous get_all_api_keys + response_model flow"""
+    objects = [SimpleNamespace(**dict(zip(API_KEY_FIELDS, row))) for row in rows]
+    models = [
+        ApiKeyResponse(
+            key=k.key,
+            customer_id=k.customer_id,
+            rate_limit=k.rate_limit,
+            requests_today=k.requests_today,
+            is_active=k.is_active
+        )
+        for k in objects
+    ]
+    # FastAPI re-validates against response_model before encoding
+    validated = [ApiKeyResponse(**jsonable_encoder(m)) for m in models]
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def orjson_path(rows: list) -> bytes:
+    return rows_response(rows, API_KEY_FIELDS).body
+
+
+def run(sizes=(100, 1000, 10000)):
+    print(f"{'rows':>8} {'legacy us/row':>14} {'orjson us/row':>14} {'speedup':>8}  ({datetime.utcnow().isoformat()})")
+    for size in sizes:
+        rows = make_rows(size)
+        number = max(1, 20000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_path(rows), number=number, repeat=5)) / number
+        fast = min(timeit.repeat(lambda: orjson_path(rows), number=number, repeat=5)) / number
+        print(f"{size:>8} {legacy / size * 1e6:>14.3f} {fast / size * 1e6:>14.3f} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run(tuple(int(arg) for arg in sys.argv[1:]) or (100, 1000, 10000))
@@ -0,0 +1,82 @@
+"""
+Cold-start profile.
+
+1. Runs ``python -X importtime -c "import app.main"`` and reports the total
+   import time plus the slowest top-level packages.
+2. Starts uvicorn and measures time until /health/ping answers (process up)
+   and until /health/ready returns 200 (pools warm).
+
+Usage:
+    cd backend && python -m benchmarks.bench_startup [--top 15] [--no-serve]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+PORT = 8766
+
+
+def profile_imports(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, env={**os.environ, "AUTO_CREATE_TABLES": "false"}
+    )
+    packages = defaultdict(int)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1:
+            # Top-level imports: cumulative time already includes their children
+            total_us += cumulative
+            packages[module.split(".")[0]] += cumulative
+
+    print(f"import app.main: {total_us / 1000:.1f} ms")
+    for package, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<30} {us / 1000:>8.1f} ms")
+
+
+def time_to_ready():
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    alive = ready = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}") as client:
+            while ready is None and time.perf_counter() - started < 60:
+                try:
+                    if alive is None and client.get("/health/ping").status_code == 200:
+                        alive = time.perf_counter() - started
+                    if client.get("/health/ready").status_code == 200:
+                        ready = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(f"process serving: {alive * 1000:.0f} ms" if alive else "process serving: timed out")
+    print(f"ready (pools warm): {ready * 1000:.0f} ms" if ready else "ready: timed out")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-serve", action="store_true")
+    args = parser.parse_args()
+
+    profile_imports(args.top)
+    if not args.no_serve:
+        time_to_ready()
@@ -0,0 +1,107 @@
+"""
+Throughput benchmark across gunicorn worker counts.
+
+Starts the app under gunicorn with 1, 2, 4 and 8 workers in turn, drives it
+with a fixed number of concurrent asyncio clients for a fixed duration and
+reports requests/second and latency percentiles for each worker count.
+
+Usage:
+    cd backend && python -m benchmarks.bench_workers [--path /health/ping]
+        [--workers 1,2,4,8] [--concurrency 64] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+PORT = 8765
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/health/ping")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def drive(client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100)[pct - 1] if len(values) > 1 else (values or [0])[0]
+
+
+async def run_once(workers: int, args) -> dict:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{PORT}"}
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+            await wait_ready(client)
+            await drive(client, args.path, args.headers, args.concurrency, 1.0)  # warm-up
+            latencies, errors = await drive(client, args.path, args.headers, args.concurrency, args.duration)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    return {
+        "workers": workers,
+        "rps": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/health/ping")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--api-key", default=os.getenv("BENCH_API_KEY", "demo_key_123"))
+    args = parser.parse_args()
+    args.headers = {"X-Api-Key": args.api_key}
+
+    print(f"{'workers':>8} {'rps':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        result = asyncio.run(run_once(workers, args))
+        print(f"{result['workers']:>8} {result['rps']:>10.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Offline stand-in for the OpenAI and Anthropic APIs.
+
+Serves POST /v1/chat/completions and POST /v1/messages in the providers'
+wire formats, so the real SDKs in AIService can be pointed at it with
+OPENAI_BASE_URL=http://localhost:9100/v1 and ANTHROPIC_BASE_URL=http://localhost:9100.
+Latency is log-normal around --latency-ms; --error-rate returns provider-style
+5xx/429 errors and --malformed-rate returns output that fails JSON parsing.
+A fixed --seed makes the sequence of latencies and faults reproducible.
+Requests with "stream": true get SSE token streams; the first token arrives
+after TTFB_SHARE of the sampled latency and the rest are spread over the remainder.
+
+Usage:
+    cd backend && python -m benchmarks.fake_provider [--port 9100] [--latency-ms 400]
+        [--latency-sigma 0.5] [--error-rate 0.01] [--malformed-rate 0.02] [--seed 1]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+
+TTFB_SHARE = 0.25
+STREAM_CHUNK_CHARS = 4
+
+KEYWORDS = {
+    "bug": ("error", "crash", "broken", "fails", "exception", "bug", "500", "down"),
+    "billing_issue": ("invoice", "charge", "refund", "billing", "payment", "card", "subscription"),
+    "feature_request": ("feature", "would be great", "please add", "support for", "suggest"),
+}
+
+
+class FaultProfile:
+    """Latency distribution and fault rates shared by both endpoints"""
+
+    def __init__(self, latency_ms: float, latency_sigma: float, error_rate: float,
+                 malformed_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FaultProfile":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LATENCY_MS", "400")),
+            latency_sigma=float(os.getenv("FAKE_LATENCY_SIGMA", "0.5")),
+            error_rate=float(os.getenv("FAKE_ERROR_RATE", "0")),
+            malformed_rate=float(os.getenv("FAKE_MALFORMED_RATE", "0")),
+            seed=int(os.getenv("FAKE_SEED", "1"))
+        )
+
+    def latency(self) -> float:
+        """Seconds to wait; the median is latency_ms"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.random.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def fault(self) -> str:
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return "error"
+        if roll < self.error_rate + self.malformed_rate:
+            return "malformed"
+        return "ok"
+
+
+def classify(prompt: str) -> dict:
+    lowered = prompt.lower()
+    scores = {label: sum(lowered.count(k) for k in words) for label, words in KEYWORDS.items()}
+    label = max(scores, key=scores.get)
+    if not scores[label]:
+        label = "other"
+    ticket = prompt.split("Ticket:", 1)[-1].strip().splitlines()[0] if "Ticket:" in prompt else prompt
+    return {
+        "label": label,
+        "confidence": round(min(0.5 + 0.1 * scores.get(label, 0), 0.99), 2),
+        "summary": ticket[:80]
+    }
+
+
+def completion_text(prompt: str, fault: str) -> str:
+    if fault == "malformed":
+        return "Sure! The label is probably a bug."
+    return orjson.dumps(classify(prompt)).decode()
+
+
+def token_count(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def error_response(provider: str) -> ORJSONResponse:
+    if provider == "openai":
+        body = {"error": {"message": "The server had an error", "type": "server_error", "code": None}}
+    else:
+        body = {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+    return ORJSONResponse(body, status_code=529 if provider == "anthropic" else 500)
+
+
+def sse(data: dict, event: str = None) -> bytes:
+    frame = b"data: " + orjson.dumps(data) + b"\n\n"
+    return (b"event: " + event.encode() + b"\n" + frame) if event else frame
+
+
+async def paced_chunks(text: str, latency: float):
+    """Yield text in small chunks, first after TTFB_SHARE of latency, the rest spread evenly"""
+    chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+    await asyncio.sleep(latency * TTFB_SHARE)
+    gap = latency * (1 - TTFB_SHARE) / len(chunks)
+    for i, chunk in enumerate(chunks):
+        if i:
+            await asyncio.sleep(gap)
+        yield chunk
+
+
+def openai_stream(model: str, content: str, latency: float) -> StreamingResponse:
+    async def frames():
+        chunk_id = f"chatcmpl-fake-{time.time_ns()}"
+        async for piece in paced_chunks(content, latency):
+            yield sse({
+                "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            })
+        yield sse({
+            "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        })
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(frames(), media_type="text/event-stream")
+
+
+def anthropic_stream(model: str, text: str, input_tokens: int, latency: float) -> StreamingResponse:
+    async def frames():
+        yield sse({"type": "message_start", "message": {
+            "id": f"msg_fake_{time.time_ns()}", "type": "message", "role": "assistant", "content": [],
+            "model": model, "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 1}
+        }}, "message_start")
+        yield sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                  "content_block_start")
+        async for piece in paced_chunks(text, latency):
+            yield sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+                      "content_block_delta")
+        yield sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                   "usage": {"output_tokens": token_count(text)}}, "message_delta")
+        yield sse({"type": "message_stop"}, "message_stop")
+
+    return StreamingResponse(frames(), media_type="text/event-stream")
+
+
+def create_app(profile: FaultProfile) -> FastAPI:
+    app = FastAPI(title="Fake LLM provider")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        latency = profile.latency()
+        fault = profile.fault()
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        if body.get("stream") and fault != "error":
+            return openai_stream(body.get("model", "fake"), completion_text(prompt, fault), latency)
+
+        await asyncio.sleep(latency)
+        if fault == "error":
+            return error_response("openai")
+
+        content = completion_text(prompt, fault)
+        return {
+            "id": f"chatcmpl-fake-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": token_count(prompt),
+                "completion_tokens": token_count(content),
+                "total_tokens": token_count(prompt) + token_count(content)
+            }
+        }
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        latency = profile.latency()
+        fault = profile.fault()
+        if not body.get("stream") or fault == "error":
+            await asyncio.sleep(latency)
+        if fault == "error":
+            return error_response("anthropic")
+
+        turns = body.get("messages", [])
+        prefill = ""
+        if turns and turns[-1].get("role") == "assistant":
+            prefill = turns.pop()["content"]
+        prompt = "\n".join(str(m.get("content", "")) for m in turns)
+        text = completion_text(prompt, fault)
+        if prefill and text.startswith(prefill):
+            # Continue the prefilled assistant turn rather than repeating it
+            text = text[len(prefill):]
+        if body.get("stream"):
+            return anthropic_stream(body.get("model", "fake"), text, token_count(prompt), latency)
+        return {
+            "id": f"msg_fake_{time.time_ns()}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": token_count(prompt), "output_tokens": token_count(text)}
+        }
+
+    return app
+
+
+# Module-level app for `uvicorn benchmarks.fake_provider:app`, configured from FAKE_* env vars
+app = create_app(FaultProfile.from_env())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+    profile = FaultProfile(args.latency_ms, args.latency_sigma, args.error_rate, args.malformed_rate, args.seed)
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
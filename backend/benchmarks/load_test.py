@@ -0,0 +1,223 @@
+"""
+Closed-loop load test for the triage API.
+
+Drives POST /api/v1/triage, GET /api/v1/stats and GET /api/v1/recent with a
+weighted mix from --concurrency workers for --duration seconds, then reports
+RPS and p50/p95/p99 per endpoint. Run it against the stack from
+docker-compose.loadtest.yml, where both providers point at
+benchmarks/fake_provider.py, so results measure our service rather than
+the providers.
+
+Results can be saved as a JSON baseline and later runs compared against it;
+the comparison exits non-zero when RPS drops or p95 rises by more than
+--tolerance.
+
+Usage:
+    docker compose -f docker-compose.yml -f docker-compose.loadtest.yml up -d --build
+    cd backend && python -m benchmarks.load_test --seed-key [--duration 60] [--concurrency 50]
+        [--mix triage=8,stats=1,recent=1] [--save benchmarks/baselines/local.json]
+        [--compare benchmarks/baselines/local.json --tolerance 0.1]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "long_tickets.json"
+SHORT_TICKETS = [
+    "The dashboard shows a 500 error whenever I open reports.",
+    "I was charged twice for my subscription this month, please refund one.",
+    "It would be great to export tickets as CSV.",
+    "How do I change the email address on my account?",
+]
+ENDPOINTS = {
+    "triage": ("POST", "/api/v1/triage"),
+    "stats": ("GET", "/api/v1/stats"),
+    "recent": ("GET", "/api/v1/recent"),
+}
+
+
+def seed_api_key(api_key: str):
+    """Ensure the load-test key exists with a quota that will not be hit"""
+    from app.database import SessionLocal
+    from app.models import ApiKey
+
+    db = SessionLocal()
+    try:
+        api_key_obj = db.query(ApiKey).filter(ApiKey.key == api_key).first()
+        if api_key_obj is None:
+            api_key_obj = ApiKey(key=api_key)
+            db.add(api_key_obj)
+        api_key_obj.rate_limit = 10 ** 9
+        api_key_obj.requests_today = 0
+        api_key_obj.is_active = True
+        db.commit()
+    finally:
+        db.close()
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(self, base_url: str, api_key: str, mix: dict, duplicate_rate: float, seed: int):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.duplicate_rate = duplicate_rate
+        self.random = random.Random(seed)
+        self.tickets = SHORT_TICKETS + [item["ticket_text"] for item in json.loads(FIXTURE.read_text())]
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def ticket_body(self, sequence: int) -> dict:
+        text = self.random.choice(self.tickets)
+        if self.random.random() >= self.duplicate_rate:
+            # A unique suffix defeats request coalescing, like independent real tickets
+            text = f"{text}\n\nRef #{sequence}"
+        return {"ticket_text": text}
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float, counter):
+        while time.perf_counter() < deadline:
+            name = self.random.choices(self.names, self.weights)[0]
+            method, path = ENDPOINTS[name]
+            body = self.ticket_body(next(counter)) if method == "POST" else None
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+
+            if status == 200:
+                self.latencies[name].append(elapsed)
+            else:
+                self.errors[name][str(status)] += 1
+
+    async def run(self, concurrency: int, duration: float, warmup: float) -> dict:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        headers = {"X-Api-Key": self.api_key}
+        async with httpx.AsyncClient(base_url=self.base_url, headers=headers, limits=limits, timeout=60) as client:
+            counter = iter(range(sys.maxsize))
+            if warmup:
+                deadline = time.perf_counter() + warmup
+                await asyncio.gather(*(self.worker(client, deadline, counter) for _ in range(concurrency)))
+                self.latencies.clear()
+                self.errors.clear()
+
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(self.worker(client, deadline, counter) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return {name: summarize(self.latencies[name], dict(self.errors[name]), elapsed) for name in self.names}
+
+
+def summarize(latencies: list, errors: dict, elapsed: float) -> dict:
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100)
+        result.update(p50_ms=round(cuts[49] * 1000, 2), p95_ms=round(cuts[94] * 1000, 2),
+                      p99_ms=round(cuts[98] * 1000, 2))
+    return result
+
+
+def report(results: dict):
+    print(f"{'endpoint':<8} {'ok':>7} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['requests']:>7} {sum(result['errors'].values()):>7} {result['rps']:>9.1f} "
+              f"{result.get('p50_ms', 0):>9.1f} {result.get('p95_ms', 0):>9.1f} {result.get('p99_ms', 0):>9.1f}")
+        for status, count in sorted(result["errors"].items()):
+            print(f"{'':<8}   {status}: {count}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return a description of every endpoint that regressed beyond tolerance"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        if result["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {result['rps']}")
+        if "p95_ms" in result and "p95_ms" in previous and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {result['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default="loadtest_key")
+    parser.add_argument("--seed-key", action="store_true", help="create the API key row via DATABASE_URL first")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("triage=8,stats=1,recent=1"))
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="share of triage requests that repeat a ticket verbatim")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.seed_key:
+        seed_api_key(args.api_key)
+
+    load_test = LoadTest(args.base_url, args.api_key, args.mix, args.duplicate_rate, args.seed)
+    results = asyncio.run(load_test.run(args.concurrency, args.duration, args.warmup))
+    report(results)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "recorded_at": datetime.utcnow().isoformat(),
+            "host": platform.node(),
+            "config": {
+                "base_url": args.base_url,
+                "duration": args.duration,
+                "concurrency": args.concurrency,
+                "mix": args.mix,
+                "duplicate_rate": args.duplicate_rate,
+                "seed": args.seed,
+            },
+            "results": results
+        }, indent=2) + "\n")
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Micro-benchmarks for the per-request CPU cost of the triage hot path.
+
+Covers response parsing, prompt construction, request/response validation,
+API key checking and per-key stats at several input sizes. Results are
+saved per commit by pytest-benchmark so an optimisation can be compared
+against the run before it.
+
+Usage:
+    pip install pytest-benchmark
+    cd backend && python -m pytest benchmarks/test_hot_paths.py --benchmark-autosave
+    # after a change, compare against the last saved run
+    cd backend && python -m pytest benchmarks/test_hot_paths.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.auth import get_current_api_key
+from app.config import settings
+from app.database import Base
+from app.models import Ticket
+from app.schemas import ClassificationResult, TicketRequest, TicketResponse
+from app.services.ai_service import AIService
+from app.services.ticket_service import TicketService
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "long_tickets.json"
+LABELS = ["bug", "feature_request", "billing_issue", "other"]
+TEXT_SIZES = [100, 1000, 10000]
+STATS_SIZES = [100, 10000, 100000]
+
+
+def ticket_text(size: int) -> str:
+    """Realistic ticket prose cut or repeated to exactly size characters"""
+    corpus = "\n\n".join(item["ticket_text"] for item in json.loads(FIXTURE.read_text()))
+    return (corpus * (size // len(corpus) + 1))[:size]
+
+
+def provider_output(summary_length: int, fenced: bool = False) -> str:
+    output = json.dumps({"label": "billing_issue", "confidence": 0.93, "summary": ticket_text(summary_length)})
+    return f"```json\n{output}\n```" if fenced else output
+
+
+@pytest.fixture(scope="module")
+def service():
+    return AIService()
+
+
+@pytest.mark.benchmark(group="parse_ai_response")
+@pytest.mark.parametrize("summary_length", [80, 400])
+@pytest.mark.parametrize("fenced", [False, True], ids=["plain", "fenced"])
+def test_parse_ai_response(benchmark, service, summary_length, fenced):
+    output = provider_output(summary_length, fenced)
+
+    result = benchmark(service._parse_ai_response, output)
+
+    assert result["label"] == "billing_issue"
+
+
+@pytest.mark.benchmark(group="build_prompt")
+@pytest.mark.parametrize("size", TEXT_SIZES)
+def test_build_prompt(benchmark, service, size):
+    text = ticket_text(size)
+
+    prompt = benchmark(service._build_prompt, text)
+
+    assert text in prompt
+
+
+@pytest.mark.benchmark(group="validation")
+@pytest.mark.parametrize("size", TEXT_SIZES)
+def test_ticket_request_validation(benchmark, size):
+    payload = {"ticket_text": ticket_text(size)}
+
+    ticket = benchmark(lambda: TicketRequest(**payload))
+
+    assert len(ticket.ticket_text) == size
+
+
+@pytest.mark.benchmark(group="validation")
+def test_ticket_response_validation(benchmark):
+    payload = {"label": "bug", "confidence": 0.87, "summary": ticket_text(200)}
+
+    response = benchmark(lambda: TicketResponse(**payload).dict())
+
+    assert response["label"] == "bug"
+
+
+@pytest.mark.benchmark(group="validation")
+def test_classification_result_validation(benchmark):
+    payload = {"label": "Billing Issue", "confidence": 1.4, "summary": ticket_text(200)}
+
+    result = benchmark(lambda: ClassificationResult(**payload).dict())
+
+    assert result["confidence"] == 1.0
+
+
+@pytest.mark.benchmark(group="auth")
+@pytest.mark.parametrize("allowed_keys", [1, 1000])
+def test_get_current_api_key(benchmark, monkeypatch, allowed_keys):
+    keys = [f"key_{i:06d}" for i in range(allowed_keys)]
+    monkeypatch.setattr(settings, "allowed_api_keys", keys)
+    # Worst case for a list membership test: the last key
+    request = Request({"type": "http", "headers": [(b"x-api-key", keys[-1].encode())]})
+
+    assert benchmark(get_current_api_key, request, None) == keys[-1]
+
+
+@pytest.fixture(scope="module")
+def stats_session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    generator = random.Random(1)
+    now = datetime.utcnow()
+
+    with engine.begin() as connection:
+        for size in STATS_SIZES:
+            connection.execute(Ticket.__table__.insert(), [
+                {
+                    "ticket_text": "Ticket body",
+                    "label": generator.choice(LABELS),
+                    "confidence": generator.random(),
+                    "summary": "Summary",
+                    "api_key": f"stats_{size}",
+                    "processing_time": generator.uniform(0.2, 3.0),
+                    "created_at": now - timedelta(minutes=i),
+                }
+                for i in range(size)
+            ])
+
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.mark.benchmark(group="ticket_stats")
+@pytest.mark.parametrize("size", STATS_SIZES)
+def test_get_ticket_stats(benchmark, stats_session_factory, size):
+    db = stats_session_factory()
+    try:
+        service = TicketService(db)
+
+        # Large sets take seconds per call; a few rounds are enough to compare commits
+        stats = benchmark.pedantic(
+            lambda: service.get_ticket_stats(f"stats_{size}"),
+            setup=db.expunge_all,
+            rounds=5 if size >= 100000 else 20,
+            warmup_rounds=1
+        )
+    finally:
+        db.close()
+
+    assert stats["total_tickets"] == size
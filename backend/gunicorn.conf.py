@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for running the API with multiple uvicorn workers.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Worker count is derived from the CPUs actually available to the container
+(cgroup quota first, then affinity) unless WEB_CONCURRENCY is set. The app
+is preloaded in the master so workers share its memory copy-on-write.
+"""
+import os
+import shutil
+
+
+def available_cpus() -> float:
+    """CPUs available to this process, honouring cgroup v2/v1 quotas"""
+    try:
+        quota, period = open("/sys/fs/cgroup/cpu.max").read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read())
+        period = int(open("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+
+def default_workers() -> int:
+    # Async workers spend most of their time waiting on providers, so one
+    # worker per CPU (rounded up) is enough to keep every core busy
+    return max(1, int(available_cpus() + 0.999))
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Graceful restarts: SIGHUP/SIGTERM let in-flight requests finish
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = 5
+# Recycle workers periodically, staggered so they never restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "INFO").lower()
+
+# Export worker count so per-process state (e.g. the LLM scheduler) can size itself
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Prometheus metrics are aggregated across workers via a shared directory. This
+# must be set before the app is preloaded; config reloads on SIGHUP keep it.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = "/tmp/prometheus_multiproc"
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with forked workers
+    from app.database import engine, read_engine
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
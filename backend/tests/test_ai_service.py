@@ -0,0 +1,372 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services import providers
+from app.services.ai_service import AIService, MalformedOutput, PROMPT_VERSION
+from app.services.providers import Completion, Provider, ProviderRegistry, estimate_cost
+
+
+class FakeProvider(Provider):
+    """Provider whose complete() and stream() are supplied by the test"""
+
+    def __init__(self, name, model="gpt-4o-mini", complete=None, stream=None):
+        super().__init__(model)
+        self.name = name
+        if complete is not None:
+            self.complete = complete
+        if stream is not None:
+            self.stream = stream
+
+
+def use_providers(service, *providers):
+    service.registry = service.router.registry = ProviderRegistry(list(providers))
+
+
+@pytest.fixture
+def service():
+    return AIService()
+
+
+class TestParseAIResponse:
+    """Test cases for structured output parsing"""
+
+    def test_parses_valid_json(self, service):
+        result = service._parse_ai_response('{"label": "bug", "confidence": 0.9, "summary": "Crash on save"}')
+
+        assert result == {"label": "bug", "confidence": 0.9, "summary": "Crash on save"}
+
+    def test_normalizes_label_and_confidence(self, service):
+        result = service._parse_ai_response('{"label": "question", "confidence": 3, "summary": "?"}')
+
+        assert result["label"] == "other"
+        assert result["confidence"] == 1.0
+
+    def test_tolerates_code_fence(self, service):
+        result = service._parse_ai_response('```json\n{"label": "bug", "confidence": 0.5, "summary": "x"}\n```')
+
+        assert result["label"] == "bug"
+
+    @pytest.mark.parametrize("output", ["not json", "[1, 2]", '{"label": "bug"}'])
+    def test_malformed_output_raises(self, service, output):
+        with pytest.raises(ValueError):
+            service._parse_ai_response(output)
+
+
+class TestRepairRetry:
+    """Test cases for the bounded repair retry"""
+
+    @pytest.mark.asyncio
+    async def test_repairs_once(self, service):
+        complete = AsyncMock(side_effect=[
+            Completion("label: bug", 100, 5),
+            Completion('{"label": "bug", "confidence": 0.8, "summary": "Repaired"}', 140, 20)
+        ])
+
+        result = await service._classify_with(FakeProvider("openai", complete=complete), "prompt")
+
+        assert result["summary"] == "Repaired"
+        assert complete.await_count == 2
+        assert result["input_tokens"] == 240
+        assert result["output_tokens"] == 25
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_one_repair(self, service):
+        complete = AsyncMock(return_value=Completion("still not json"))
+
+        with pytest.raises(ValueError):
+            await service._classify_with(FakeProvider("openai", complete=complete), "prompt")
+
+        assert complete.await_count == 2
+
+
+class TestUsage:
+    """Test cases for per-call usage, cost and latency reporting"""
+
+    @pytest.fixture(autouse=True)
+    def pricing(self, monkeypatch):
+        monkeypatch.setattr(providers, "MODEL_PRICING", {"gpt-4o-mini": (0.15, 0.60)})
+
+    @pytest.mark.asyncio
+    async def test_reports_tokens_cost_and_latency(self, service):
+        complete = AsyncMock(return_value=Completion('{"label": "bug", "confidence": 0.8, "summary": "x"}', 1000, 50))
+
+        result = await service._classify_with(FakeProvider("openai", complete=complete), "prompt")
+
+        assert result["prompt_version"] == PROMPT_VERSION
+        # 1000 * $0.15/M + 50 * $0.60/M
+        assert result["cost_usd"] == pytest.approx(0.00018)
+        assert 0 <= result["provider_ttfb"] <= result["provider_latency"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_output_carries_its_usage(self, service):
+        complete = AsyncMock(return_value=Completion("still not json", 1000, 50))
+
+        with pytest.raises(MalformedOutput) as raised:
+            await service._classify_with(FakeProvider("openai", complete=complete), "prompt")
+
+        assert raised.value.usage["input_tokens"] == 2000
+        assert raised.value.usage["output_tokens"] == 100
+        assert raised.value.usage["cost_usd"] == pytest.approx(0.00036)
+
+    @pytest.mark.asyncio
+    async def test_failover_adds_usage_of_malformed_attempts(self, service):
+        use_providers(
+            service,
+            FakeProvider("openai", complete=AsyncMock(return_value=Completion("not json", 1000, 50))),
+            FakeProvider("anthropic", complete=AsyncMock(
+                return_value=Completion('{"label": "bug", "confidence": 0.9, "summary": "x"}', 1000, 50)
+            ))
+        )
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["provider"] == "anthropic"
+        assert result["input_tokens"] == 3000
+        assert result["output_tokens"] == 150
+        assert result["cost_usd"] == pytest.approx(0.00054)
+
+    @pytest.mark.asyncio
+    async def test_fallback_still_reports_spent_usage(self, service):
+        use_providers(service, FakeProvider("openai", complete=AsyncMock(return_value=Completion("not json", 1000, 50))))
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["provider"] == "fallback"
+        assert result["input_tokens"] == 2000
+        assert result["cost_usd"] == pytest.approx(0.00036)
+
+    def test_unpriced_model_has_no_cost(self):
+        assert estimate_cost("local-model", 1000, 50) is None
+
+
+class TestCoalescing:
+    """Test cases for single-flight coalescing of identical classifications"""
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_tickets_share_one_call(self, service):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def classify(ticket_text, preprocess, api_key=None):
+            nonlocal calls
+            calls += 1
+            started.set()
+            await release.wait()
+            return {"label": "bug", "confidence": 0.9, "summary": "Outage"}
+
+        service._classify = classify
+        first = asyncio.ensure_future(service.classify_ticket("Site is DOWN"))
+        await started.wait()
+        second = asyncio.ensure_future(service.classify_ticket("  site is   down "))
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(first, second)
+
+        assert calls == 1
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
+
+    @pytest.mark.asyncio
+    async def test_shared_call_cost_is_counted_once(self, service):
+        release = asyncio.Event()
+
+        async def classify(ticket_text, preprocess, api_key=None):
+            await release.wait()
+            return {"label": "bug", "confidence": 0.9, "summary": "Outage",
+                    "input_tokens": 1000, "output_tokens": 100, "cost_usd": 0.00021}
+
+        service._classify = classify
+        callers = [asyncio.ensure_future(service.classify_ticket("Site is down")) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*callers)
+
+        assert {result["label"] for result in results} == {"bug"}
+        assert sum(result["input_tokens"] for result in results) == 1000
+        assert sum(result["output_tokens"] for result in results) == 100
+        assert sum(result["cost_usd"] for result in results) == pytest.approx(0.00021)
+
+    @pytest.mark.asyncio
+    async def test_follower_gets_usage_when_leader_is_cancelled(self, service):
+        release = asyncio.Event()
+
+        async def classify(ticket_text, preprocess, api_key=None):
+            await release.wait()
+            return {"label": "bug", "confidence": 0.9, "summary": "Outage",
+                    "input_tokens": 1000, "output_tokens": 100, "cost_usd": 0.00021}
+
+        service._classify = classify
+        leader = asyncio.ensure_future(service.classify_ticket("same"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(service.classify_ticket("same"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+
+        assert (await follower)["cost_usd"] == pytest.approx(0.00021)
+
+    @pytest.mark.asyncio
+    async def test_waiters_survive_leader_cancellation(self, service):
+        release = asyncio.Event()
+
+        async def classify(ticket_text, preprocess, api_key=None):
+            await release.wait()
+            return {"label": "bug", "confidence": 0.9, "summary": "Outage"}
+
+        service._classify = classify
+        leader = asyncio.ensure_future(service.classify_ticket("same"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(service.classify_ticket("same"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+
+        assert (await follower)["label"] == "bug"
+        assert not service._in_flight
+
+    @pytest.mark.asyncio
+    async def test_completed_calls_are_not_reused(self, service):
+        service._classify = AsyncMock(return_value={"label": "bug", "confidence": 0.9, "summary": "x"})
+
+        await service.classify_ticket("same")
+        await service.classify_ticket("same")
+
+        assert service._classify.await_count == 2
+
+
+class TestStreaming:
+    """Test cases for streamed classification with early fields"""
+
+    @staticmethod
+    def stream_of(*chunks, error=None):
+        async def stream(messages, max_tokens, usage):
+            for chunk in chunks:
+                yield chunk
+            if error:
+                raise error
+        return stream
+
+    @pytest.mark.asyncio
+    async def test_emits_label_and_confidence_before_result(self, service):
+        use_providers(service, FakeProvider("openai", stream=self.stream_of(
+            '{"label": "Bug"', ', "confidence": 1.7,', ' "summary": "Crash"}'
+        )))
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        assert [event["event"] for event in events] == ["label", "confidence", "result"]
+        assert events[0]["label"] == "other"
+        assert events[1]["confidence"] == 1.0
+        assert events[2]["provider"] == "openai"
+
+    @pytest.mark.asyncio
+    async def test_fails_over_when_nothing_was_emitted(self, service):
+        use_providers(
+            service,
+            FakeProvider("openai", stream=self.stream_of('{"lab', error=RuntimeError("reset"))),
+            FakeProvider("anthropic", stream=self.stream_of('{"label": "bug", "confidence": 0.7, "summary": "x"}'))
+        )
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        assert events[-1]["provider"] == "anthropic"
+
+    @staticmethod
+    def usage_of(input_tokens, output_tokens, *chunks, error=None):
+        async def stream(messages, max_tokens, usage):
+            usage.update(input_tokens=input_tokens, output_tokens=output_tokens)
+            for chunk in chunks:
+                yield chunk
+            if error:
+                raise error
+        return stream
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_full_classification_after_partial_stream(self, service):
+        use_providers(service, FakeProvider("openai", stream=self.stream_of('{"label": "bug",', error=RuntimeError("reset"))))
+        service.classify_ticket = AsyncMock(return_value={"label": "bug", "confidence": 0.9, "summary": "x"})
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        assert [event["event"] for event in events] == ["label", "result"]
+        assert events[-1]["revised"] is False
+        service.classify_ticket.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fallback_that_changes_label_is_flagged_revised(self, service):
+        use_providers(service, FakeProvider("openai", stream=self.stream_of('{"label": "bug",', error=RuntimeError("reset"))))
+        service.classify_ticket = AsyncMock(return_value={"label": "feature_request", "confidence": 0.9, "summary": "x"})
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        assert events[0]["label"] == "bug"
+        assert events[-1]["label"] == "feature_request"
+        assert events[-1]["revised"] is True
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_usage_is_added_to_fallback_result(self, service, monkeypatch):
+        monkeypatch.setattr(providers, "MODEL_PRICING", {"gpt-4o-mini": (0.15, 0.60)})
+        use_providers(service, FakeProvider("openai", stream=self.usage_of(
+            1000, 100, '{"label": "bug",', error=RuntimeError("reset")
+        )))
+        service.classify_ticket = AsyncMock(return_value={
+            "label": "bug", "confidence": 0.9, "summary": "x", "input_tokens": 500, "output_tokens": 50,
+            "cost_usd": 0.000105, "provider_latency": 0.5
+        })
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        # 1500 * 0.15 / 1M + 150 * 0.60 / 1M
+        assert events[-1]["input_tokens"] == 1500
+        assert events[-1]["output_tokens"] == 150
+        assert events[-1]["cost_usd"] == pytest.approx(0.000315)
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_usage_is_added_to_next_stream(self, service, monkeypatch):
+        monkeypatch.setattr(providers, "MODEL_PRICING", {"gpt-4o-mini": (0.15, 0.60)})
+        use_providers(
+            service,
+            FakeProvider("openai", stream=self.usage_of(1000, 0, '{"lab', error=RuntimeError("reset"))),
+            FakeProvider("anthropic", stream=self.usage_of(
+                1000, 100, '{"label": "bug", "confidence": 0.7, "summary": "x"}'
+            ))
+        )
+
+        events = [event async for event in service.stream_classification("The app crashes on save")]
+
+        assert events[-1]["provider"] == "anthropic"
+        assert events[-1]["input_tokens"] == 2000
+        assert events[-1]["output_tokens"] == 100
+        # 2000 * 0.15 / 1M + 100 * 0.60 / 1M
+        assert events[-1]["cost_usd"] == pytest.approx(0.00036)
+
+
+class TestProviderFailover:
+    """Test cases for trying providers in routed order"""
+
+    @pytest.mark.asyncio
+    async def test_next_provider_answers_after_failure(self, service):
+        use_providers(
+            service,
+            FakeProvider("openai", complete=AsyncMock(side_effect=RuntimeError("timeout"))),
+            FakeProvider("anthropic", model="claude-3-haiku-20240307", complete=AsyncMock(
+                return_value=Completion('{"label": "billing_issue", "confidence": 0.9, "summary": "x"}', 10, 5)
+            ))
+        )
+
+        result = await service.classify_ticket("I was charged twice", preprocess=False)
+
+        assert result["provider"] == "anthropic"
+        assert result["model"] == "claude-3-haiku-20240307"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_no_provider_is_enabled(self, service):
+        use_providers(service)
+
+        result = await service.classify_ticket("I was charged twice", preprocess=False)
+
+        assert result["provider"] == "fallback"
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from datetime import datetime
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app import audit
+from app.audit import AuditLogger, audited_api_key, list_audit_logs
+from app.auth import get_current_api_key
+from app.database import Base
+from app.models import AuditLog
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def make_request(ip="203.0.113.7", user_agent="curl/8.0"):
+    return Request({
+        "type": "http",
+        # As set by nginx in front of the app
+        "headers": [
+            (b"x-real-ip", ip.encode()), (b"x-forwarded-for", ip.encode()), (b"user-agent", user_agent.encode())
+        ],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+class TestAuditBuffer:
+    """Test cases for buffering, backpressure and batched flushing"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_batches_with_client_details(self, session_factory):
+        audit = AuditLogger(batch_size=2, session_factory=session_factory)
+        for i in range(5):
+            audit.record("api_key.use", "api_key", f"key_{i}", details={"path": "/api/v1/triage"}, request=make_request())
+
+        assert await audit.flush() == 5
+
+        db = session_factory()
+        rows = db.query(AuditLog).order_by(AuditLog.id).all()
+        assert [row.resource_id for row in rows] == [f"key_{i}" for i in range(5)]
+        assert rows[0].ip_address == "203.0.113.7"
+        assert rows[0].user_agent == "curl/8.0"
+        assert rows[0].details == '{"path":"/api/v1/triage"}'
+        db.close()
+
+    def test_routine_events_are_sampled_past_watermark(self):
+        audit = AuditLogger(capacity=100, sample_watermark=0.5, sample_rate=0.0)
+        for _ in range(80):
+            audit.record("api_key.use", "api_key")
+
+        assert len(audit) == 50
+
+    def test_full_buffer_drops_routine_and_evicts_for_critical(self):
+        audit = AuditLogger(capacity=3, sample_watermark=1.0)
+        for i in range(3):
+            audit.record("api_key.use", "api_key", str(i))
+
+        audit.record("api_key.use", "api_key", "dropped")
+        audit.record("tickets.delete_old", "tickets", critical=True)
+
+        assert [event["resource_id"] for event in audit._buffer] == ["1", "2", None]
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues_in_order(self, session_factory):
+        def broken():
+            raise RuntimeError("database down")
+
+        audit = AuditLogger(session_factory=broken)
+        audit.record("a", "r", "1")
+        audit.record("a", "r", "2")
+
+        assert await audit.flush() == 0
+        assert [event["resource_id"] for event in audit._buffer] == ["1", "2"]
+
+        audit.session_factory = session_factory
+        assert await audit.flush() == 2
+
+    def test_disabled_logger_records_nothing(self):
+        audit = AuditLogger(enabled=False)
+        audit.record("a", "r")
+
+        assert len(audit) == 0
+
+
+class TestAuditQuery:
+    """Test cases for keyset pagination over (created_at, id)"""
+
+    def test_pages_cover_every_row_once_across_equal_timestamps(self, session_factory):
+        db = session_factory()
+        same_time = datetime(2026, 1, 1, 12, 0)
+        db.add_all([AuditLog(action="a", resource="r", resource_id=str(i), created_at=same_time) for i in range(5)])
+        db.add(AuditLog(action="b", resource="r", resource_id="newest", created_at=datetime(2026, 1, 2)))
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = list_audit_logs(db, limit=2, cursor=cursor)
+            seen.extend(row.resource_id for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == ["newest", "4", "3", "2", "1", "0"]
+        db.close()
+
+    def test_filters_and_invalid_cursor(self, session_factory):
+        db = session_factory()
+        db.add_all([AuditLog(action="a", resource="r"), AuditLog(action="b", resource="r")])
+        db.commit()
+
+        rows, cursor = list_audit_logs(db, action="b")
+        assert [row.action for row in rows] == ["b"]
+        assert cursor is None
+
+        with pytest.raises(ValueError):
+            list_audit_logs(db, cursor="not-a-cursor")
+        db.close()
+
+
+class TestAuditedApiKey:
+    """Test cases for the auditing API key dependency"""
+
+    def test_records_on_the_event_loop_thread(self, monkeypatch):
+        loops = []
+        monkeypatch.setattr(audit.audit_logger, "record", lambda *args, **kwargs: loops.append(asyncio.get_running_loop()))
+        app = FastAPI()
+        app.dependency_overrides[get_current_api_key] = lambda: "demo_key_123"
+
+        @app.get("/probe")
+        async def probe(api_key: str = Depends(audited_api_key)):
+            return {"api_key": api_key}
+
+        with TestClient(app) as client:
+            assert client.get("/probe").json() == {"api_key": "demo_key_123"}
+
+        # get_running_loop() raises in a threadpool worker, so reaching here means record() ran on the loop
+        assert len(loops) == 1
@@ -0,0 +1,179 @@
+import math
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Ticket
+from app.services.ai_service import AIService
+from app.services.cascade import Cascade, CascadeThresholds, fit_thresholds, load_reference_tickets
+from app.services.providers import Completion, Provider
+
+
+class TierProvider(Provider):
+    def __init__(self, name, model, output, input_tokens=100, output_tokens=10):
+        super().__init__(model, key=f"{name}:{model}")
+        self.name = name
+        self.complete = AsyncMock(return_value=Completion(output, input_tokens, output_tokens))
+
+
+def answer(label, confidence):
+    return f'{{"label": "{label}", "confidence": {confidence}, "summary": "x"}}'
+
+
+@pytest.fixture
+def service():
+    return AIService()
+
+
+class TestFitThresholds:
+    """Test cases for offline threshold calibration"""
+
+    def test_lowest_confidence_meeting_target_precision(self):
+        samples = [("bug", 0.9, "bug")] * 30 + [("bug", 0.6, "bug")] * 10 + [("bug", 0.5, "other")] * 10
+
+        thresholds, report = fit_thresholds(samples, target_precision=0.95, min_support=20)
+
+        assert thresholds.labels["bug"] == 0.6
+        assert report["bug"]["precision"] == 1.0
+        assert report["bug"]["coverage"] == 0.8
+
+    def test_label_never_reaching_target_always_escalates(self):
+        samples = [("other", 0.9, "bug")] * 25
+
+        thresholds, report = fit_thresholds(samples, target_precision=0.9, min_support=20)
+
+        assert thresholds.for_label("other") == math.inf
+        assert report["other"]["coverage"] == 0.0
+
+    def test_sparse_label_keeps_default(self):
+        thresholds, _ = fit_thresholds([("billing_issue", 0.99, "billing_issue")] * 5, min_support=20, default=0.8)
+
+        assert thresholds.for_label("billing_issue") == 0.8
+
+    def test_thresholds_round_trip(self, tmp_path):
+        path = tmp_path / "thresholds.json"
+        CascadeThresholds(default=0.7, labels={"bug": 0.55, "other": None}).save(path)
+
+        loaded = CascadeThresholds.load(str(path), default=0.9)
+
+        assert loaded.for_label("bug") == 0.55
+        assert loaded.for_label("other") == math.inf
+        assert loaded.for_label("feature_request") == 0.7
+
+
+class TestReferenceTickets:
+    """Test cases for choosing calibration ground truth"""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all([
+            Ticket(ticket_text="tier one", label="bug", confidence=0.9, provider="openai", model="gpt-4o-mini"),
+            Ticket(ticket_text="stronger", label="other", confidence=0.9, provider="openai", model="gpt-4o"),
+            Ticket(ticket_text="unknown model", label="bug", confidence=0.9, provider="openai"),
+            Ticket(ticket_text="fallback", label="other", confidence=0.5, provider="fallback", model="rules"),
+        ])
+        session.commit()
+        yield session
+        session.close()
+        engine.dispose()
+
+    def test_excludes_tickets_labelled_by_the_calibrated_model(self, db):
+        assert load_reference_tickets(db, 10, "gpt-4o-mini") == [("stronger", "other")]
+
+    def test_calibrated_model_cannot_be_its_own_reference(self, db):
+        with pytest.raises(ValueError):
+            load_reference_tickets(db, 10, "gpt-4o-mini", reference_model="gpt-4o-mini")
+
+
+class TestCascade:
+    """Test cases for confidence-gated escalation"""
+
+    def use_cascade(self, service, *tiers, labels=None):
+        service.cascade = Cascade(list(tiers), CascadeThresholds(default=0.8, labels=labels or {}))
+
+    @pytest.mark.asyncio
+    async def test_confident_first_tier_is_kept(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.9))
+        strong = TierProvider("openai", "gpt-4o", answer("bug", 0.99))
+        self.use_cascade(service, cheap, strong)
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["cascade_tier"] == 1
+        assert result["model"] == "gpt-4o-mini"
+        strong.complete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_escalates_and_sums_usage(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.6))
+        strong = TierProvider("openai", "gpt-4o", answer("billing_issue", 0.95), 120, 12)
+        self.use_cascade(service, cheap, strong)
+
+        result = await service.classify_ticket("I was charged twice", preprocess=False)
+
+        assert result["cascade_tier"] == 2
+        assert result["label"] == "billing_issue"
+        assert result["input_tokens"] == 220
+        assert result["output_tokens"] == 22
+
+    @pytest.mark.asyncio
+    async def test_per_label_threshold_gates_escalation(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.6))
+        strong = TierProvider("openai", "gpt-4o", answer("bug", 0.99))
+        self.use_cascade(service, cheap, strong, labels={"bug": 0.5})
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["cascade_tier"] == 1
+
+    @pytest.mark.asyncio
+    async def test_parse_failure_escalates(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", "not json")
+        strong = TierProvider("openai", "gpt-4o", answer("bug", 0.9))
+        self.use_cascade(service, cheap, strong)
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["cascade_tier"] == 2
+        # Both unparseable tier-1 calls (first try and repair) are paid for too
+        assert result["input_tokens"] == 300
+        assert result["output_tokens"] == 30
+
+    @pytest.mark.asyncio
+    async def test_last_answer_kept_when_no_tier_is_confident(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.4))
+        strong = TierProvider("openai", "gpt-4o", "not json")
+        self.use_cascade(service, cheap, strong)
+
+        result = await service.classify_ticket("The app crashes", preprocess=False)
+
+        assert result["cascade_tier"] == 1
+        assert result["confidence"] == 0.4
+
+    @pytest.mark.asyncio
+    async def test_pinned_key_skips_cascade(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.9))
+        self.use_cascade(service, cheap)
+        service.router.pins = {"key_a": "stub"}
+
+        result = await service.classify_ticket("The app crashes", preprocess=False, api_key="key_a")
+
+        assert "cascade_tier" not in result
+        cheap.complete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stream_escalates_after_first_tier(self, service):
+        cheap = TierProvider("openai", "gpt-4o-mini", answer("bug", 0.3))
+        strong = TierProvider("openai", "gpt-4o", answer("billing_issue", 0.9))
+        self.use_cascade(service, cheap, strong)
+
+        events = [event async for event in service.stream_classification("I was charged twice")]
+
+        assert events[0] == {"event": "label", "label": "bug", "elapsed": events[0]["elapsed"]}
+        assert events[-1]["label"] == "billing_issue"
+        assert events[-1]["cascade_tier"] == 2
@@ -0,0 +1,130 @@
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+from app import database
+from app.database import _make_engine
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def sample(name, role):
+    return REGISTRY.get_sample_value(name, {"role": role}) or 0.0
+
+
+@pytest.fixture
+def make_engine(monkeypatch):
+    engines = []
+
+    def make(role, url="sqlite://", **pool):
+        for key, value in pool.items():
+            monkeypatch.setattr(database.settings, key, value)
+        engine = _make_engine(url, role)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+class TestSlowQueryLog:
+    """Test cases for slow query logging"""
+
+    def test_slow_queries_are_logged_and_counted(self, make_engine, monkeypatch, caplog):
+        engine = make_engine("test_slow")
+        monkeypatch.setattr(database.settings, "db_slow_query_ms", 0)
+
+        with caplog.at_level(logging.WARNING, logger="app.database"), engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert "Slow query on test_slow" in caplog.text
+        assert "SELECT 1" in caplog.text
+        assert sample("db_slow_queries_total", "test_slow") == 1
+
+    def test_fast_queries_are_not_logged(self, make_engine, monkeypatch, caplog):
+        engine = make_engine("test_fast")
+        monkeypatch.setattr(database.settings, "db_slow_query_ms", 60000)
+
+        with caplog.at_level(logging.WARNING, logger="app.database"), engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert "Slow query" not in caplog.text
+        assert sample("db_slow_queries_total", "test_fast") == 0
+
+    def test_failed_statements_leave_no_start_time_behind(self, make_engine):
+        engine = make_engine("test_failed")
+
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM missing_table"))
+            connection.execute(text("SELECT 1"))
+
+            assert connection.info["query_start_time"] == []
+
+
+class TestInstrumentedPool:
+    """Test cases for connection pool metrics"""
+
+    def test_checkouts_are_timed_and_counted_in_use(self, make_engine):
+        engine = make_engine("test_pool")
+        waits = sample("db_pool_checkout_wait_seconds_count", "test_pool")
+
+        with engine.connect():
+            assert sample("db_pool_in_use", "test_pool") == 1
+
+        assert sample("db_pool_in_use", "test_pool") == 0
+        assert sample("db_pool_checkout_wait_seconds_count", "test_pool") == waits + 1
+
+    def test_exhausted_pool_counts_a_timeout(self, make_engine, caplog):
+        engine = make_engine(
+            "test_exhausted", "sqlite:///file::memory:?uri=true",
+            db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05
+        )
+
+        with engine.connect():
+            with caplog.at_level(logging.ERROR, logger="app.database"), pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+        assert sample("db_pool_timeouts_total", "test_exhausted") == 1
+        assert "Database pool (test_exhausted) exhausted" in caplog.text
+
+
+class TestReadReplicaRouting:
+    """Test cases for routing read-only sessions to DATABASE_REPLICA_URL"""
+
+    # Engines are created at import, so each case imports app.database in a fresh interpreter
+    PROBE = (
+        "from sqlalchemy import text\n"
+        "from app.database import engine, read_engine, get_db, get_read_db\n"
+        "tables = lambda session: [row[0] for row in session.execute("
+        "text(\"SELECT name FROM sqlite_master WHERE type = 'table'\"))]\n"
+        "print(read_engine is engine, tables(next(get_db())), tables(next(get_read_db())))\n"
+    )
+
+    def probe(self, tmp_path, replica: bool) -> str:
+        for name in ("primary", "replica"):
+            with sqlite3.connect(tmp_path / f"{name}.db") as connection:
+                connection.execute(f"CREATE TABLE on_{name} (id INTEGER)")
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'primary.db'}"}
+        env["DATABASE_REPLICA_URL"] = f"sqlite:///{tmp_path / 'replica.db'}" if replica else ""
+        result = subprocess.run(
+            [sys.executable, "-c", self.PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+
+    def test_reads_go_to_the_replica_when_configured(self, tmp_path):
+        assert self.probe(tmp_path, replica=True) == "False ['on_primary'] ['on_replica']"
+
+    def test_reads_use_the_primary_without_a_replica(self, tmp_path):
+        assert self.probe(tmp_path, replica=False) == "True ['on_primary'] ['on_primary']"
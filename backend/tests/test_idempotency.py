@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app import idempotency
+from app.idempotency import IdempotencyConflict, IdempotencyStore, request_fingerprint
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(ttl=60, lock_ttl=10, wait_timeout=1.0, use_redis=False)
+
+
+class TestIdempotencyStore:
+    """Test cases for Idempotency-Key single-flight and replay"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_run_once(self, store):
+        calls = 0
+
+        async def action():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"label": "bug"}
+
+        fingerprint = request_fingerprint("same body")
+        results = await asyncio.gather(*(store.execute("idem:k", fingerprint, action) for _ in range(5)))
+
+        assert calls == 1
+        assert [replayed for _, replayed in results].count(False) == 1
+        assert all(result == {"label": "bug"} for result, _ in results)
+
+    @pytest.mark.asyncio
+    async def test_completed_response_is_replayed(self, store):
+        async def action():
+            return {"label": "billing_issue"}
+
+        fingerprint = request_fingerprint("body")
+        await store.execute("idem:k", fingerprint, action)
+        result, replayed = await store.execute("idem:k", fingerprint, action)
+
+        assert replayed is True
+        assert result == {"label": "billing_issue"}
+
+    @pytest.mark.asyncio
+    async def test_reuse_with_different_body_conflicts(self, store):
+        async def action():
+            return {"label": "bug"}
+
+        await store.execute("idem:k", request_fingerprint("first"), action)
+
+        with pytest.raises(IdempotencyConflict):
+            await store.execute("idem:k", request_fingerprint("second"), action)
+
+    @pytest.mark.asyncio
+    async def test_failure_releases_key(self, store):
+        async def failing():
+            raise ValueError("Rate limit exceeded")
+
+        async def succeeding():
+            return {"label": "bug"}
+
+        fingerprint = request_fingerprint("body")
+        with pytest.raises(ValueError):
+            await store.execute("idem:k", fingerprint, failing)
+
+        result, replayed = await store.execute("idem:k", fingerprint, succeeding)
+        assert replayed is False
+
+
+class TestLocalEviction:
+    """Test cases for keeping the in-process store bounded"""
+
+    @pytest.mark.asyncio
+    async def test_expired_records_are_swept_on_write(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+        store = IdempotencyStore(ttl=60, lock_ttl=10, wait_timeout=1.0, use_redis=False)
+
+        async def action():
+            return {"label": "bug"}
+
+        for i in range(100):
+            await store.execute(f"idem:{i}", request_fingerprint("body"), action)
+        now[0] += 61
+        await store.execute("idem:new", request_fingerprint("body"), action)
+
+        assert list(store._local) == ["idem:new"]
+
+    @pytest.mark.asyncio
+    async def test_oldest_records_are_evicted_past_the_bound(self):
+        store = IdempotencyStore(ttl=60, lock_ttl=10, wait_timeout=1.0, use_redis=False, max_local_entries=3)
+
+        async def action():
+            return {"label": "bug"}
+
+        for i in range(5):
+            await store.execute(f"idem:{i}", request_fingerprint("body"), action)
+
+        assert list(store._local) == ["idem:2", "idem:3", "idem:4"]
+        # An evicted key runs again rather than replaying
+        assert await store.execute("idem:0", request_fingerprint("body"), action) == ({"label": "bug"}, False)
+
+
+class FailingRedis:
+    def pipeline(self, transaction=True):
+        raise RedisConnectionError("Connection refused")
+
+    async def get(self, key):
+        raise RedisConnectionError("Connection refused")
+
+    async def set(self, *args, **kwargs):
+        raise RedisConnectionError("Connection refused")
+
+    async def delete(self, key):
+        raise RedisConnectionError("Connection refused")
+
+
+class TestIdempotencyWithoutRedis:
+    """Test cases for degrading to the in-process store while Redis is down"""
+
+    @pytest.fixture
+    def redis_store(self, monkeypatch):
+        monkeypatch.setattr(idempotency, "get_redis", lambda: FailingRedis())
+        return IdempotencyStore(ttl=60, lock_ttl=10, wait_timeout=1.0, use_redis=True)
+
+    @pytest.mark.asyncio
+    async def test_requests_run_and_replay_locally(self, redis_store):
+        calls = 0
+
+        async def action():
+            nonlocal calls
+            calls += 1
+            return {"label": "bug"}
+
+        fingerprint = request_fingerprint("body")
+        first, first_replayed = await redis_store.execute("idem:k", fingerprint, action)
+        second, second_replayed = await redis_store.execute("idem:k", fingerprint, action)
+
+        assert calls == 1
+        assert (first, first_replayed) == ({"label": "bug"}, False)
+        assert (second, second_replayed) == ({"label": "bug"}, True)
+
+    @pytest.mark.asyncio
+    async def test_failure_still_releases_key(self, redis_store):
+        async def failing():
+            raise ValueError("Rate limit exceeded")
+
+        async def succeeding():
+            return {"label": "bug"}
+
+        fingerprint = request_fingerprint("body")
+        with pytest.raises(ValueError):
+            await redis_store.execute("idem:k", fingerprint, failing)
+
+        assert await redis_store.execute("idem:k", fingerprint, succeeding) == ({"label": "bug"}, False)
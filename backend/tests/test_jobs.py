@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ApiKey, AuditLog, SystemMetrics, Ticket, WebhookLog
+from app.services.jobs import CronSchedule, Job, JobScheduler, advisory_lock_key
+from app.services.maintenance import cleanup_logs, reset_daily_quotas, snapshot_system_metrics
+
+
+class FakeLeader:
+    def __init__(self, leader=True):
+        self.leader = leader
+
+    def acquire(self):
+        return self.leader
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestCronSchedule:
+    """Test cases for cron expression parsing and matching"""
+
+    @pytest.mark.parametrize("expression, now, expected", [
+        ("*/5 * * * *", datetime(2026, 3, 1, 10, 7, 30), datetime(2026, 3, 1, 10, 10)),
+        ("0 3 * * *", datetime(2026, 3, 1, 3, 0), datetime(2026, 3, 2, 3, 0)),
+        ("30 3 * * 1-5", datetime(2026, 3, 6, 4, 0), datetime(2026, 3, 9, 3, 30)),
+        ("0 0 1 * *", datetime(2026, 1, 31, 12, 0), datetime(2026, 2, 1, 0, 0)),
+        ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+        ("0 12 1 * 0", datetime(2026, 3, 1, 13, 0), datetime(2026, 3, 8, 12, 0)),
+    ])
+    def test_next_after(self, expression, now, expected):
+        assert CronSchedule(expression).next_after(now) == expected
+
+    @pytest.mark.parametrize("expression", ["* * * *", "61 * * * *", "0 0 30 2 *"])
+    def test_invalid_expressions_are_rejected(self, expression):
+        with pytest.raises(ValueError):
+            CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+    def test_lock_key_is_stable_signed_bigint(self):
+        key = advisory_lock_key("solutionai:periodic-jobs")
+
+        assert key == advisory_lock_key("solutionai:periodic-jobs")
+        assert -2 ** 63 <= key < 2 ** 63
+
+
+class TestJobScheduler:
+    """Test cases for leader-gated job runs"""
+
+    def job(self, func, now):
+        job = Job("test", CronSchedule("* * * * *"), func)
+        job.next_run = now
+        return job
+
+    @pytest.mark.asyncio
+    async def test_leader_runs_due_job_and_plans_next(self):
+        now = datetime(2026, 3, 1, 10, 0)
+        calls = []
+        job = self.job(lambda: calls.append(1), now)
+        scheduler = JobScheduler([job], FakeLeader())
+
+        delay = await scheduler.tick(now)
+        await asyncio.gather(*scheduler._running)
+
+        assert calls == [1]
+        assert job.next_run == datetime(2026, 3, 1, 10, 1)
+        assert delay == 30.0
+
+    @pytest.mark.asyncio
+    async def test_follower_skips_due_job(self):
+        now = datetime(2026, 3, 1, 10, 0)
+        calls = []
+        job = self.job(lambda: calls.append(1), now)
+        scheduler = JobScheduler([job], FakeLeader(leader=False))
+
+        await scheduler.tick(now)
+
+        assert calls == []
+        assert job.next_run > now
+
+    @pytest.mark.asyncio
+    async def test_overlapping_run_is_skipped(self):
+        now = datetime(2026, 3, 1, 10, 0)
+        job = self.job(lambda: None, now)
+        job.running = True
+        scheduler = JobScheduler([job], FakeLeader())
+
+        await scheduler.tick(now)
+
+        assert not scheduler._running
+
+    @pytest.mark.asyncio
+    async def test_failing_job_does_not_stop_scheduler(self):
+        now = datetime(2026, 3, 1, 10, 0)
+
+        def fail():
+            raise RuntimeError("boom")
+
+        job = self.job(fail, now)
+        scheduler = JobScheduler([job], FakeLeader())
+
+        await scheduler.tick(now)
+        await asyncio.gather(*scheduler._running)
+
+        assert not job.running
+
+
+class TestMaintenanceJobs:
+    """Test cases for the scheduled maintenance job bodies"""
+
+    def test_cleanup_expires_audit_logs_by_age_and_keeps_newest_webhook_logs(self, db):
+        now = datetime.utcnow()
+        db.add_all([
+            AuditLog(action="a", resource="r", created_at=now - timedelta(days=days)) for days in (1, 29, 31, 400)
+        ])
+        start = datetime(2026, 1, 1)
+        db.add_all([WebhookLog(provider="zendesk", created_at=start + timedelta(minutes=i)) for i in range(4)])
+        db.commit()
+
+        assert cleanup_logs(db, audit_retention=timedelta(days=30), webhook_keep=3) == (2, 1, 0)
+        assert min(log.created_at for log in db.query(AuditLog)) == now - timedelta(days=29)
+
+    def test_quota_reset_only_touches_stale_keys(self, db):
+        db.add_all([
+            ApiKey(key="stale", requests_today=50, last_reset=date.today() - timedelta(days=1)),
+            ApiKey(key="fresh", requests_today=5, last_reset=date.today()),
+        ])
+        db.commit()
+
+        assert reset_daily_quotas(db) == 1
+        assert dict(db.query(ApiKey.key, ApiKey.requests_today)) == {"stale": 0, "fresh": 5}
+
+    def test_metrics_snapshot_covers_window(self, db):
+        now = datetime.utcnow()
+        db.add_all([
+            Ticket(ticket_text="t", label="bug", confidence=0.8, provider="openai", processing_time=1.0, created_at=now),
+            Ticket(ticket_text="t", label="other", confidence=0.0, provider="fallback", processing_time=3.0, created_at=now),
+            Ticket(ticket_text="t", label="bug", confidence=0.9, provider="openai", created_at=now - timedelta(hours=1)),
+        ])
+        db.commit()
+
+        snapshot = snapshot_system_metrics(db, timedelta(minutes=5))
+
+        assert snapshot["tickets_processed"] == 2
+        assert snapshot["fallback_rate"] == 0.5
+        assert snapshot["avg_processing_time"] == 2.0
+        row = db.query(SystemMetrics).filter(SystemMetrics.metric_name == "tickets_processed").one()
+        assert json.loads(row.tags) == {"window_seconds": 300}
@@ -0,0 +1,99 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import middleware
+from app.middleware import request_id_var, setup_middleware
+from app.rate_limit import RateLimit, RateLimiter
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, calls):
+    monkeypatch.setattr(
+        middleware, "build_rate_limiter", lambda: RateLimiter(RateLimit(2, 60), {}, use_redis=False)
+    )
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.get("/api/v1/probe")
+    async def probe():
+        calls.append(request_id_var.get())
+        return {"request_id": request_id_var.get()}
+
+    @app.get("/health/")
+    async def health():
+        return {"status": "ok"}
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestRequestContext:
+    """Test cases for request IDs and the timing header"""
+
+    def test_request_id_is_generated(self, client):
+        response = client.get("/api/v1/probe")
+
+        request_id = response.headers["x-request-id"]
+        assert len(request_id) == 32
+        assert response.json() == {"request_id": request_id}
+
+    def test_request_id_is_propagated(self, client):
+        response = client.get("/api/v1/probe", headers={"X-Request-ID": "req-123"})
+
+        assert response.headers["x-request-id"] == "req-123"
+        assert response.json() == {"request_id": "req-123"}
+
+    def test_process_time_header(self, client):
+        response = client.get("/api/v1/probe")
+
+        assert float(response.headers["x-process-time"]) >= 0
+
+
+class TestRateLimiting:
+    """Test cases for the limiter's short-circuit"""
+
+    def test_over_limit_is_refused_before_the_app(self, client, calls):
+        allowed = [client.get("/api/v1/probe") for _ in range(2)]
+        refused = client.get("/api/v1/probe", headers={"X-Request-ID": "req-429"})
+
+        assert [response.headers["x-ratelimit-remaining"] for response in allowed] == ["1", "0"]
+        assert refused.status_code == 429
+        assert refused.json() == {"detail": "Rate limit exceeded"}
+        assert refused.headers["x-ratelimit-limit"] == "2"
+        assert refused.headers["x-ratelimit-remaining"] == "0"
+        assert 1 <= int(refused.headers["retry-after"]) <= 30
+        assert refused.headers["x-request-id"] == "req-429"
+        assert len(calls) == 2
+
+    def test_exempt_paths_are_not_limited(self, client):
+        responses = [client.get("/health/") for _ in range(5)]
+
+        assert {response.status_code for response in responses} == {200}
+        assert "x-ratelimit-limit" not in responses[0].headers
+
+
+class TestCORS:
+    """Test cases for CORS in front of the request context layer"""
+
+    def test_preflight_is_answered_without_using_the_rate_limit(self, client, calls):
+        headers = {"Origin": "https://app.example.com", "Access-Control-Request-Method": "GET"}
+
+        preflights = [client.options("/api/v1/probe", headers=headers) for _ in range(5)]
+
+        assert {response.status_code for response in preflights} == {200}
+        assert preflights[0].headers["access-control-allow-origin"] in ("*", "https://app.example.com")
+        assert "GET" in preflights[0].headers["access-control-allow-methods"]
+        assert not calls
+        assert client.get("/api/v1/probe", headers={"Origin": "https://app.example.com"}).status_code == 200
+
+    def test_simple_requests_get_cors_and_context_headers(self, client):
+        response = client.get("/api/v1/probe", headers={"Origin": "https://app.example.com"})
+
+        assert response.headers["access-control-allow-origin"] in ("*", "https://app.example.com")
+        assert "x-request-id" in response.headers
@@ -0,0 +1,49 @@
+import base64
+
+from app.services.prompt_preprocessor import PromptPreprocessor, TRUNCATION_MARKER
+
+
+class TestPromptPreprocessor:
+    """Test cases for ticket text preprocessing"""
+
+    def test_strips_quoted_reply_chain_and_signature(self):
+        text = (
+            "My invoice is wrong, please fix it.\n\n"
+            "Best regards,\nJane\n\n"
+            "On Mon, Mar 4, 2024 at 9:12 AM Support <support@example.com> wrote:\n"
+            "> Could you share the invoice number?\n"
+        )
+
+        result = PromptPreprocessor(max_tokens=1000).process(text)
+
+        assert result["text"] == "My invoice is wrong, please fix it."
+        assert result["prompt_tokens"] < result["original_tokens"]
+
+    def test_strips_html_and_base64(self):
+        blob = base64.b64encode(b"x" * 600).decode()
+        text = f"<p>Export <b>fails</b> with a 500 error</p><img src=\"data:image/png;base64,{blob}\"/>"
+
+        cleaned = PromptPreprocessor(max_tokens=1000).clean(text)
+
+        assert "<" not in cleaned
+        assert blob not in cleaned
+        assert "Export" in cleaned and "500 error" in cleaned
+
+    def test_head_tail_truncation_respects_budget(self):
+        preprocessor = PromptPreprocessor(max_tokens=50, head_ratio=0.5)
+        text = "start " + "filler words " * 200 + "end"
+
+        result = preprocessor.process(text)
+
+        assert TRUNCATION_MARKER in result["text"]
+        assert result["text"].startswith("start")
+        assert result["text"].endswith("end")
+        assert result["prompt_tokens"] <= 50 + preprocessor.count_tokens(TRUNCATION_MARKER)
+
+    def test_short_ticket_is_unchanged(self):
+        text = "The login page shows a blank screen on Firefox."
+
+        result = PromptPreprocessor(max_tokens=1000).process(text)
+
+        assert result["text"] == text
+        assert result["original_tokens"] == result["prompt_tokens"]
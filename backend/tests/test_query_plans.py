@@ -0,0 +1,133 @@
+"""
+Query-plan regression tests for the hot paths.
+
+Each hot query is captured as the service actually emits it and EXPLAINed
+with sequential scans disabled; a Seq Scan in the plan means no index can
+serve the query. Requires PostgreSQL (DATABASE_URL), as in CI.
+"""
+import json
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base
+from app.models import Ticket, ApiKey, WebhookLog
+from app.services.ticket_service import TicketService
+
+pytestmark = pytest.mark.skipif(
+    not settings.database_url.startswith("postgresql"),
+    reason="query plans are asserted against PostgreSQL"
+)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(settings.database_url)
+    try:
+        engine.connect().close()
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def connection(engine):
+    connection = engine.connect()
+    transaction = connection.begin()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def db(connection):
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    session.add(ApiKey(key="plan_key", customer_id="cus_plan", rate_limit=1000, is_active=True))
+    session.add(Ticket(ticket_text="Plan test ticket", label="bug", confidence=0.9, api_key="plan_key"))
+    session.add(WebhookLog(provider="zendesk", status_code=200, processing_time=0.1))
+    session.flush()
+    yield session
+    session.close()
+
+
+@contextmanager
+def captured_statements(connection):
+    """Collect the (statement, parameters) pairs executed inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def plan_node_types(plan):
+    yield plan["Node Type"]
+    for child in plan.get("Plans", []):
+        yield from plan_node_types(child)
+
+
+def assert_no_seq_scan(connection, statements):
+    assert statements, "no statements captured"
+    for statement, parameters in statements:
+        result = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+        assert "Seq Scan" not in set(plan_node_types(plan)), f"sequential scan in:\n{statement}"
+
+
+class TestHotQueryPlans:
+    """No hot query may fall back to a sequential scan"""
+
+    def test_recent_tickets(self, connection, db):
+        with captured_statements(connection) as statements:
+            TicketService(db).get_recent_ticket_rows("plan_key", 10)
+        assert_no_seq_scan(connection, statements)
+
+    def test_ticket_stats(self, connection, db):
+        with captured_statements(connection) as statements:
+            TicketService(db).get_ticket_stats("plan_key")
+        assert_no_seq_scan(connection, statements)
+
+    def test_retention_delete(self, connection, db):
+        with captured_statements(connection) as statements:
+            TicketService(db).delete_old_tickets(90)
+        assert_no_seq_scan(connection, statements)
+
+    @pytest.mark.asyncio
+    async def test_quota_reservation(self, connection, db):
+        with captured_statements(connection) as statements:
+            await TicketService(db)._check_rate_limit("plan_key")
+        assert_no_seq_scan(connection, statements)
+
+    def test_ticket_write_is_one_statement(self, connection, db):
+        service = TicketService(db)
+        ticket = service._build_ticket("Plan write", "plan_key", {"label": "bug", "confidence": 0.9, "summary": "x"})
+        with captured_statements(connection) as statements:
+            service._record_ticket(ticket)
+        assert len(statements) == 1
+        assert_no_seq_scan(connection, statements)
+
+    @pytest.mark.parametrize("match", ["fulltext", "substring"])
+    def test_ticket_search(self, connection, db, match):
+        with captured_statements(connection) as statements:
+            TicketService(db).search_ticket_rows("plan test", match, label="bug", limit=50)
+        assert_no_seq_scan(connection, statements)
+
+    def test_webhook_logs_by_provider(self, connection, db):
+        # Mirrors the /admin/webhook-logs?provider= query
+        with captured_statements(connection) as statements:
+            db.query(WebhookLog).filter(
+                WebhookLog.provider == "zendesk"
+            ).order_by(WebhookLog.created_at.desc()).limit(50).all()
+        assert_no_seq_scan(connection, statements)
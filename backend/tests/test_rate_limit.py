@@ -0,0 +1,96 @@
+from starlette.requests import Request
+
+from app.config import settings
+from app.rate_limit import RateLimit, RateLimiter, build_rate_limiter, parse_route_limits, request_identity
+
+
+def request_with(api_key=None, client_ip="203.0.113.7", forwarded_for=None, real_ip=None):
+    headers = [(b"x-api-key", api_key.encode())] if api_key else []
+    if forwarded_for:
+        headers.append((b"x-forwarded-for", forwarded_for.encode()))
+    if real_ip:
+        headers.append((b"x-real-ip", real_ip.encode()))
+    return Request({"type": "http", "method": "POST", "path": "/api/v1/triage",
+                    "headers": headers, "client": (client_ip, 5000)})
+
+
+class TestRateLimiter:
+    """Test cases for the GCRA rate limiter"""
+
+    def test_parse_route_limits(self):
+        limits = parse_route_limits("POST /api/v1/triage=60/60, GET /api/v1/stats=30/10")
+
+        assert limits["POST /api/v1/triage"] == RateLimit(60, 60)
+        assert limits["GET /api/v1/stats"] == RateLimit(30, 10)
+
+    def test_route_override_and_default(self):
+        limiter = RateLimiter(RateLimit(100, 86400), {"POST /api/v1/triage": RateLimit(5, 60)})
+
+        assert limiter.limit_for("POST", "/api/v1/triage") == ("POST /api/v1/triage", RateLimit(5, 60))
+        assert limiter.limit_for("GET", "/api/v1/recent") == ("default", RateLimit(100, 86400))
+
+    def test_prefix_route_covers_every_method_under_it(self):
+        limiter = RateLimiter(RateLimit(60, 60), parse_route_limits(
+            "POST /admin/maintenance/cleanup=1/3600,/admin/*=300/60,/admin/analytics/*=30/60"
+        ))
+
+        assert limiter.limit_for("GET", "/admin/tickets") == ("/admin/*", RateLimit(300, 60))
+        assert limiter.limit_for("POST", "/admin/api-keys/k/deactivate") == ("/admin/*", RateLimit(300, 60))
+        assert limiter.limit_for("GET", "/admin/analytics/usage") == ("/admin/analytics/*", RateLimit(30, 60))
+        assert limiter.limit_for("POST", "/admin/maintenance/cleanup") == (
+            "POST /admin/maintenance/cleanup", RateLimit(1, 3600)
+        )
+        assert limiter.limit_for("GET", "/api/v1/recent") == ("default", RateLimit(60, 60))
+
+    def test_default_limits_reads_per_minute_and_admin_separately(self):
+        limiter = build_rate_limiter()
+
+        assert limiter.limit_for("GET", "/api/v1/stats")[1].window == 60
+        assert limiter.limit_for("GET", "/admin/stats")[0] == "/admin/*"
+
+    def test_local_bucket_allows_burst_then_rejects(self):
+        limiter = RateLimiter(RateLimit(3, 60), {})
+        rate = limiter.default
+
+        results = [limiter._hit_local("rl:test", rate) for _ in range(4)]
+
+        assert [allowed for allowed, _, _ in results] == [1, 1, 1, 0]
+        assert [remaining for _, remaining, _ in results[:3]] == [2, 1, 0]
+        # Next slot frees after one emission interval (20s)
+        assert 0 < results[3][2] <= 20000
+
+    def test_known_api_key_gets_its_own_bucket(self, monkeypatch):
+        monkeypatch.setattr(settings, "allowed_api_keys", ["key_a"])
+
+        identity = request_identity(request_with("key_a"))
+
+        assert identity.startswith("key:")
+        assert "key_a" not in identity
+
+    def test_unknown_api_keys_share_the_client_ip_bucket(self, monkeypatch):
+        monkeypatch.setattr(settings, "allowed_api_keys", ["key_a"])
+
+        identities = {request_identity(request_with(f"made_up_{i}")) for i in range(3)}
+
+        assert identities == {request_identity(request_with())}
+        assert identities.pop().startswith("ip:")
+
+    def test_spoofed_forwarded_for_shares_one_bucket(self, monkeypatch):
+        monkeypatch.setattr(settings, "allowed_api_keys", ["key_a"])
+
+        # nginx appends the real peer to whatever X-Forwarded-For the client sent
+        identities = {
+            request_identity(request_with(forwarded_for=f"10.0.0.{i}, 198.51.100.4", client_ip="172.18.0.5"))
+            for i in range(3)
+        }
+
+        assert identities == {"ip:198.51.100.4"}
+
+    def test_real_ip_from_the_proxy_wins(self, monkeypatch):
+        monkeypatch.setattr(settings, "allowed_api_keys", ["key_a"])
+
+        identity = request_identity(request_with(
+            "made_up", forwarded_for="10.0.0.1, 198.51.100.4", real_ip="198.51.100.4", client_ip="172.18.0.5"
+        ))
+
+        assert identity == "ip:198.51.100.4"
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Ticket
+from app.services.reclassifier import Checkpoint, Reclassifier
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Ticket(ticket_text=f"ticket {i % 3}", label="other", confidence=0.1, summary="old")
+        for i in range(10)
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def classification(label="bug", provider="openai"):
+    return {"label": label, "confidence": 0.9, "summary": "new", "prompt_tokens": 10, "provider": provider}
+
+
+class TestReclassifier:
+    """Test cases for bulk re-classification"""
+
+    @pytest.mark.asyncio
+    async def test_updates_all_tickets_and_classifies_duplicates_once(self, db):
+        classify = AsyncMock(return_value=classification())
+        with patch("app.services.reclassifier.ai_service.classify_ticket", classify):
+            checkpoint = await Reclassifier(db, batch_size=4).run()
+
+        assert checkpoint.updated == 10
+        assert classify.await_count == 3
+        assert {t.label for t in db.query(Ticket).all()} == {"bug"}
+
+    @pytest.mark.asyncio
+    async def test_budget_stops_and_resumes_from_checkpoint(self, db, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        classify = AsyncMock(side_effect=lambda text: classification(label=text.replace(" ", "_")))
+
+        with patch("app.services.reclassifier.ai_service.classify_ticket", classify):
+            first = await Reclassifier(db, checkpoint_path=path, batch_size=10, concurrency=1, max_calls=2).run()
+            assert 0 < first.processed < 10
+            assert Checkpoint.load(path).last_id == first.last_id
+
+            second = await Reclassifier(db, checkpoint_path=path, batch_size=10).run()
+
+        assert second.processed == 10
+        assert db.query(Ticket).filter(Ticket.summary == "old").count() == 0
+
+    @pytest.mark.asyncio
+    async def test_fallback_results_are_not_written(self, db):
+        classify = AsyncMock(return_value=classification(provider="fallback"))
+        with patch("app.services.reclassifier.ai_service.classify_ticket", classify):
+            checkpoint = await Reclassifier(db).run()
+
+        assert checkpoint.failed == 10
+        assert checkpoint.updated == 0
+        assert {t.summary for t in db.query(Ticket).all()} == {"old"}
+
+    @pytest.mark.asyncio
+    async def test_new_model_replaces_usage_and_duplicates_are_not_charged_again(self, db):
+        db.query(Ticket).update({
+            "provider": "openai", "model": "gpt-4o-mini", "prompt_version": "v1", "original_tokens": 90,
+            "prompt_tokens": 80, "input_tokens": 100, "output_tokens": 20, "cost_usd": 0.5,
+            "provider_ttfb": 0.4, "provider_latency": 1.5
+        })
+        db.commit()
+        classify = AsyncMock(return_value={
+            **classification(provider="anthropic"), "model": "claude-3-haiku-20240307", "prompt_version": "v2",
+            "original_tokens": 12, "input_tokens": 40, "output_tokens": 8, "cost_usd": 0.02,
+            "provider_ttfb": 0.1, "provider_latency": 0.3
+        })
+        with patch("app.services.reclassifier.ai_service.classify_ticket", classify):
+            await Reclassifier(db, batch_size=10).run()
+
+        rows = db.query(
+            Ticket.ticket_text, Ticket.model, Ticket.prompt_version, Ticket.original_tokens, Ticket.prompt_tokens,
+            Ticket.input_tokens, Ticket.output_tokens, Ticket.cost_usd, Ticket.provider_ttfb, Ticket.provider_latency
+        ).order_by(Ticket.id).all()
+        assert {row[1:5] for row in rows} == {("claude-3-haiku-20240307", "v2", 12, 10)}
+        assert {row[8:] for row in rows} == {(0.1, 0.3)}
+        # Three distinct texts were classified; their duplicates add no tokens or cost
+        assert sum(row.input_tokens for row in rows) == 3 * 40
+        assert sum(row.output_tokens for row in rows) == 3 * 8
+        assert sum(row.cost_usd for row in rows) == pytest.approx(3 * 0.02)
@@ -0,0 +1,146 @@
+import pytest
+
+from app.services.providers import LocalModelProvider, Provider, ProviderRegistry, StubProvider, build_registry
+from app.services.routing import ProviderRouter, parse_pins
+
+
+class PricedProvider(Provider):
+    def __init__(self, name, price, enabled=True):
+        super().__init__(f"{name}-model")
+        self.name = name
+        self._price = price
+        self._enabled = enabled
+
+    @property
+    def price(self):
+        return self._price
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+
+@pytest.fixture
+def registry():
+    return ProviderRegistry([
+        PricedProvider("openai", (0.15, 0.60)),
+        PricedProvider("anthropic", (0.25, 1.25)),
+        PricedProvider("local", (0.0, 0.0)),
+    ])
+
+
+def names(providers):
+    return [provider.name for provider in providers]
+
+
+class TestRouting:
+    """Test cases for provider routing policies"""
+
+    def test_priority_keeps_configured_order(self, registry):
+        router = ProviderRouter(registry)
+
+        assert names(router.route()) == ["openai", "anthropic", "local"]
+
+    def test_disabled_providers_are_skipped(self):
+        router = ProviderRouter(ProviderRegistry([
+            PricedProvider("openai", (0.15, 0.60), enabled=False),
+            PricedProvider("anthropic", (0.25, 1.25)),
+        ]))
+
+        assert names(router.route()) == ["anthropic"]
+
+    def test_latency_prefers_lowest_p95(self, registry):
+        router = ProviderRouter(registry, policy="latency")
+        for _ in range(10):
+            router.observe(registry.get("openai"), 2.0)
+            router.observe(registry.get("anthropic"), 0.5)
+            router.observe(registry.get("local"), 1.0)
+
+        assert names(router.route()) == ["anthropic", "local", "openai"]
+
+    def test_latency_tries_unmeasured_providers_first(self, registry):
+        router = ProviderRouter(registry, policy="latency")
+        router.observe(registry.get("openai"), 0.2)
+        router.observe(registry.get("anthropic"), 0.1)
+
+        assert names(router.route())[0] == "local"
+
+    def test_cost_prefers_cheapest_meeting_confidence_bar(self, registry):
+        router = ProviderRouter(registry, policy="cost", confidence_bar=0.7, min_samples=5)
+        for _ in range(5):
+            router.observe(registry.get("local"), 0.01, 0.4)
+            router.observe(registry.get("openai"), 0.8, 0.9)
+
+        assert names(router.route()) == ["openai", "anthropic", "local"]
+
+    def test_cost_trusts_providers_until_measured(self, registry):
+        router = ProviderRouter(registry, policy="cost", min_samples=5)
+        router.observe(registry.get("local"), 0.01, 0.1)
+
+        assert names(router.route())[0] == "local"
+
+    def test_cost_remeasures_demoted_provider_once_stats_expire(self, registry):
+        now = [0.0]
+        router = ProviderRouter(
+            registry, policy="cost", min_samples=5, stats_max_age=600, clock=lambda: now[0]
+        )
+        for _ in range(5):
+            router.observe(registry.get("local"), 0.01, 0.1)
+
+        assert names(router.route())[0] == "openai"
+        now[0] = 601.0
+        assert names(router.route())[0] == "local"
+
+    def test_latency_remeasures_slow_provider_once_stats_expire(self, registry):
+        now = [0.0]
+        router = ProviderRouter(registry, policy="latency", stats_max_age=600, clock=lambda: now[0])
+        router.observe(registry.get("local"), 5.0)
+        now[0] = 300.0
+        router.observe(registry.get("openai"), 0.2)
+        router.observe(registry.get("anthropic"), 0.1)
+
+        assert names(router.route())[-1] == "local"
+        now[0] = 601.0
+        assert names(router.route())[0] == "local"
+
+    def test_pinned_key_starts_with_its_provider(self, registry):
+        router = ProviderRouter(registry, policy="cost", pins={"key_a": "anthropic"})
+
+        assert names(router.route("key_a")) == ["anthropic", "local", "openai"]
+        assert names(router.route("key_b"))[0] == "local"
+
+    def test_unknown_policy_is_rejected(self, registry):
+        with pytest.raises(ValueError):
+            ProviderRouter(registry, policy="random")
+
+    def test_parse_pins(self):
+        assert parse_pins("key_a=anthropic, key_b=local,") == {"key_a": "anthropic", "key_b": "local"}
+
+
+class TestProviders:
+    """Test cases for the offline providers and registry construction"""
+
+    @pytest.mark.asyncio
+    async def test_local_provider_classifies_ticket_from_prompt(self):
+        provider = LocalModelProvider("local-keyword")
+        prompt = "Classify this.\n\nTicket: I was charged twice, please refund\n\nCategories: bug"
+
+        completion = await provider.complete([{"role": "user", "content": prompt}], 200)
+
+        assert '"label":"billing_issue"' in completion.text
+        assert provider.cost(completion.input_tokens, completion.output_tokens) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_stub_provider_streams_one_chunk(self):
+        usage = {"input_tokens": 0, "output_tokens": 0}
+
+        chunks = [chunk async for chunk in StubProvider(label="bug").stream([], 200, usage)]
+
+        assert len(chunks) == 1
+        assert '"label":"bug"' in chunks[0]
+
+    def test_build_registry_rejects_unknown_provider(self, monkeypatch):
+        monkeypatch.setattr("app.services.providers.settings.llm_providers", "openai,mystery")
+
+        with pytest.raises(ValueError):
+            build_registry(lambda: None)
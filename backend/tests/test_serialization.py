@@ -0,0 +1,118 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.audit import audited_api_key
+from app.database import Base, get_db, get_read_db
+from app.models import Ticket
+from app.routes.admin import TICKET_LIST_FIELDS, router as admin_router
+from app.routes.tickets import RECENT_TICKET_FIELDS, router as tickets_router
+from app.schemas import RecentTicket, TicketListItem
+from app.serialization import rows_response
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    start = datetime(2026, 3, 1, 9, 30, 15, 123456)
+    db.add_all([
+        Ticket(ticket_text="Refund please " * (i * 4), label="billing_issue", confidence=0.5 + i / 10,
+               summary=None if i == 2 else f"summary {i}", api_key="key_a" if i < 4 else "key_b",
+               created_at=start + timedelta(hours=i), processing_time=None if i == 1 else i / 4)
+        for i in range(6)
+    ])
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    def session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(tickets_router)
+    app.include_router(admin_router)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_read_db] = session
+    app.dependency_overrides[audited_api_key] = lambda: "key_a"
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def tickets(session_factory):
+    db = session_factory()
+    try:
+        return db.query(Ticket).order_by(Ticket.id).all()
+    finally:
+        db.close()
+
+
+class TestRowsResponse:
+    """Test cases for serialising SQL tuples without response models"""
+
+    def test_maps_fields_in_order_and_encodes_datetimes(self):
+        response = rows_response([(1, datetime(2026, 3, 1, 9, 30), None)], ("id", "created_at", "summary"))
+
+        assert response.body == b'[{"id":1,"created_at":"2026-03-01T09:30:00","summary":null}]'
+
+    def test_field_tuples_match_the_documented_schemas(self):
+        assert RECENT_TICKET_FIELDS == tuple(RecentTicket.__fields__)
+        assert TICKET_LIST_FIELDS == tuple(TicketListItem.__fields__)
+
+
+class TestReadRoutes:
+    """Test cases for /recent and /admin/tickets returning what the ORM-based routes returned"""
+
+    def test_recent_matches_previous_output(self, client, session_factory):
+        # Previously built from ORM objects like this
+        expected = [
+            {
+                "ticket_text": t.ticket_text,
+                "label": t.label,
+                "confidence": t.confidence,
+                "summary": t.summary,
+                "timestamp": t.created_at.isoformat(),
+                "processing_time": t.processing_time
+            }
+            for t in sorted(tickets(session_factory), key=lambda t: t.created_at, reverse=True)
+            if t.api_key == "key_a"
+        ]
+
+        response = client.get("/api/v1/recent", params={"limit": 10})
+
+        assert response.status_code == 200
+        assert response.json() == expected
+
+    def test_admin_tickets_matches_previous_output(self, client, session_factory, monkeypatch):
+        monkeypatch.setattr("app.auth.settings.secret_key", "admin-secret")
+        expected = [
+            {
+                "id": t.id,
+                "ticket_text": t.ticket_text[:100] + "..." if len(t.ticket_text) > 100 else t.ticket_text,
+                "label": t.label,
+                "confidence": t.confidence,
+                "api_key": t.api_key,
+                "created_at": t.created_at.isoformat(),
+                "processing_time": t.processing_time
+            }
+            for t in tickets(session_factory)
+        ]
+
+        response = client.get("/admin/tickets", headers={"X-Admin-Key": "admin-secret"})
+
+        assert response.status_code == 200
+        assert response.json() == expected
@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.stream_parser import IncrementalJSONFields
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONFields()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+class TestIncrementalJSONFields:
+    """Test cases for incremental extraction of streamed classification fields"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+    def test_fields_complete_in_order(self, chunk_size):
+        text = '{"label": "bug", "confidence": 0.85, "summary": "Crash on save"}'
+
+        parser, events = feed_in_chunks(text, chunk_size)
+
+        assert events == [("label", "bug"), ("confidence", 0.85), ("summary", "Crash on save")]
+        assert parser.text == text
+
+    def test_label_is_reported_before_summary_arrives(self):
+        parser = IncrementalJSONFields()
+
+        assert parser.feed('{"label": "billing_issue", "confidence": 0.9') == [("label", "billing_issue")]
+        assert parser.feed(', "summ') == [("confidence", 0.9)]
+
+    def test_escapes_and_nested_values(self):
+        text = '{"meta": {"label": "x"}, "tags": ["a"], "summary": "Said \\"refund\\" \\u00e9", "label": "other"}'
+
+        _, events = feed_in_chunks(text, 2)
+
+        assert events == [("summary", 'Said "refund" é'), ("label", "other")]
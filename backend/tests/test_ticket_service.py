@@ -0,0 +1,347 @@
+import asyncio
+import pytest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ApiKey, Ticket
+from app.services.ticket_service import TicketService
+
+
+CLASSIFICATION = {"label": "bug", "confidence": 0.9, "summary": "Crash", "provider": "openai", "model": "gpt-4o-mini"}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add(ApiKey(key="key_a", rate_limit=2, requests_today=0, last_reset=date.today(), is_active=True))
+    session.commit()
+    yield session
+    session.close()
+
+
+@contextmanager
+def counted(engine):
+    """Count statements sent and transactions committed inside the block"""
+    counts = {"statements": [], "commits": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"].append(statement.lstrip().split(None, 1)[0].upper())
+
+    def commit(conn):
+        counts["commits"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "commit", commit)
+    try:
+        yield counts
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "commit", commit)
+
+
+async def process(db, api_key="key_a"):
+    with patch("app.services.ticket_service.ai_service.classify_ticket", AsyncMock(return_value=CLASSIFICATION)):
+        return await TicketService(db).process_ticket("The app crashes on save", api_key)
+
+
+class TestTriageWritePath:
+    """Test cases for the bounded triage write path"""
+
+    @pytest.mark.asyncio
+    async def test_reservation_and_insert_without_reads(self, engine, db):
+        with counted(engine) as counts:
+            ticket = await process(db)
+
+        assert counts["statements"] == ["UPDATE", "INSERT"]
+        assert counts["commits"] == 2
+        assert ticket.id == db.query(func.max(Ticket.id)).scalar()
+
+    @pytest.mark.asyncio
+    async def test_quota_counts_each_ticket_and_refuses_when_exhausted(self, db):
+        await process(db)
+        await process(db)
+
+        with pytest.raises(ValueError, match="Rate limit exceeded"):
+            await process(db)
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 2
+        assert db.query(Ticket).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_quota_is_reserved_before_the_provider_call(self, db):
+        async def classify(*args, **kwargs):
+            assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 1
+            return CLASSIFICATION
+
+        with patch("app.services.ticket_service.ai_service.classify_ticket", classify):
+            await TicketService(db).process_ticket("The app crashes on save", "key_a")
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_beyond_quota_never_reach_the_provider(self, db):
+        release = asyncio.Event()
+        calls = 0
+
+        async def classify(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return CLASSIFICATION
+
+        with patch("app.services.ticket_service.ai_service.classify_ticket", classify):
+            requests = [
+                asyncio.ensure_future(TicketService(db).process_ticket(f"Crash {i}", "key_a")) for i in range(5)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*requests, return_exceptions=True)
+
+        refused = [r for r in results if isinstance(r, ValueError)]
+        assert calls == 2
+        assert len(refused) == 3
+        assert all(str(e) == "Rate limit exceeded" for e in refused)
+        assert db.query(Ticket).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_provider_call_is_refunded(self, db):
+        classify = AsyncMock(side_effect=RuntimeError("provider down"))
+        with patch("app.services.ticket_service.ai_service.classify_ticket", classify):
+            with pytest.raises(RuntimeError):
+                await TicketService(db).process_ticket("The app crashes on save", "key_a")
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 0
+
+    @pytest.mark.asyncio
+    async def test_fallback_ticket_is_saved_but_not_counted(self, db):
+        fallback = {**CLASSIFICATION, "label": "other", "confidence": 0.0, "provider": "fallback", "model": None}
+        with patch("app.services.ticket_service.ai_service.classify_ticket", AsyncMock(return_value=fallback)):
+            await TicketService(db).process_ticket("The app crashes on save", "key_a")
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 0
+        assert db.query(Ticket).count() == 1
+
+    @pytest.mark.asyncio
+    async def test_counter_resets_on_a_new_day(self, db):
+        db.query(ApiKey).update({ApiKey.requests_today: 2, ApiKey.last_reset: date.today() - timedelta(days=1)})
+        db.commit()
+
+        await process(db)
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_refund_after_midnight_leaves_the_new_day_alone(self, db):
+        service = TicketService(db)
+        await service._check_rate_limit("key_a", date.today() - timedelta(days=1))
+        await service._check_rate_limit("key_a")
+
+        service._refund_quota("key_a", date.today() - timedelta(days=1))
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_key_is_rejected_before_classification(self, db):
+        with pytest.raises(ValueError, match="Invalid API key"):
+            await process(db, api_key="missing")
+
+
+class TestKeyDeactivation:
+    """Test cases for refusing deactivated keys"""
+
+    @pytest.mark.asyncio
+    async def test_deactivated_key_is_refused_as_invalid_before_any_provider_call(self, db):
+        await process(db)
+
+        assert TicketService(db).deactivate_api_key("key_a")
+        classify = AsyncMock(return_value=CLASSIFICATION)
+        with patch("app.services.ticket_service.ai_service.classify_ticket", classify):
+            with pytest.raises(ValueError, match="Invalid API key"):
+                await TicketService(db).process_ticket("The app crashes on save", "key_a")
+
+        classify.assert_not_called()
+        assert db.query(Ticket).count() == 1
+        assert not TicketService(db).deactivate_api_key("missing")
+
+    @pytest.mark.asyncio
+    async def test_deactivated_key_with_no_quota_left_is_still_invalid(self, db):
+        db.query(ApiKey).update({ApiKey.requests_today: 2, ApiKey.is_active: False})
+        db.commit()
+
+        with pytest.raises(ValueError, match="Invalid API key"):
+            await process(db)
+
+
+class TestTriageStream:
+    """Test cases for quota on the streaming path"""
+
+    @staticmethod
+    def stream_of(*events):
+        async def stream(ticket_text, api_key):
+            for event in events:
+                yield event
+        return stream
+
+    @pytest.mark.asyncio
+    async def test_exhausted_key_is_refused_before_streaming(self, db):
+        db.query(ApiKey).update({ApiKey.requests_today: 2})
+        db.commit()
+        stream = AsyncMock()
+
+        with patch("app.services.ticket_service.ai_service.stream_classification", stream):
+            with pytest.raises(ValueError, match="Rate limit exceeded"):
+                await TicketService(db).open_ticket_stream("The app crashes", "key_a")
+
+        stream.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_saved_stream_keeps_its_reservation(self, db):
+        stream = self.stream_of({"event": "label", "label": "bug"}, {"event": "result", **CLASSIFICATION})
+
+        with patch("app.services.ticket_service.ai_service.stream_classification", stream):
+            events = [event async for event in await TicketService(db).open_ticket_stream("The app crashes", "key_a")]
+
+        assert events[-1]["event"] == "result"
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_client_leaving_before_the_result_is_refunded(self, db):
+        stream = self.stream_of({"event": "label", "label": "bug"}, {"event": "result", **CLASSIFICATION})
+
+        with patch("app.services.ticket_service.ai_service.stream_classification", stream):
+            events = await TicketService(db).open_ticket_stream("The app crashes", "key_a")
+            assert (await events.__anext__())["event"] == "label"
+            await events.aclose()
+
+        assert db.query(ApiKey.requests_today).filter(ApiKey.key == "key_a").scalar() == 0
+        assert db.query(Ticket).count() == 0
+
+
+class TestTicketListing:
+    """Test cases for the column-projected admin listing and its SQL-side preview"""
+
+    TEXTS = [
+        "x" * 100,
+        "y" * 101,
+        "é" * 99 + "€✓",
+        "日本語のチケット" * 20,
+        "🚀" * 150,
+        "short",
+    ]
+
+    @pytest.fixture
+    def tickets(self, db):
+        db.add_all([
+            Ticket(ticket_text=text, label="bug", confidence=0.5, summary="s" * 500, api_key="key_a",
+                   created_at=datetime(2026, 3, 1), processing_time=0.25)
+            for text in self.TEXTS
+        ])
+        db.commit()
+
+    def test_rows_carry_only_the_listing_columns(self, engine, db, tickets):
+        with counted(engine) as counts:
+            rows = TicketService(db).get_ticket_listing_rows()
+
+        assert counts["statements"] == ["SELECT"]
+        assert rows[0]._fields == (
+            "id", "ticket_text", "label", "confidence", "api_key", "created_at", "processing_time"
+        )
+        assert tuple(rows[0])[2:] == ("bug", 0.5, "key_a", datetime(2026, 3, 1), 0.25)
+
+    def test_preview_truncates_characters_not_bytes(self, db, tickets):
+        rows = TicketService(db).get_ticket_listing_rows()
+
+        # Same rule the listing applied in Python before truncation moved into SQL
+        assert [row.ticket_text for row in rows] == [
+            text[:100] + "..." if len(text) > 100 else text for text in self.TEXTS
+        ]
+        assert rows[0].ticket_text == "x" * 100
+        assert rows[1].ticket_text == "y" * 100 + "..."
+        assert rows[3].ticket_text == ("日本語のチケット" * 20)[:100] + "..."
+        assert rows[4].ticket_text == "🚀" * 100 + "..."
+
+    def test_preview_length_and_paging(self, db, tickets):
+        rows = TicketService(db).get_ticket_listing_rows(skip=1, limit=2, preview_length=3)
+
+        assert [row.ticket_text for row in rows] == ["yyy...", "ééé..."]
+
+
+class TestTicketSearch:
+    """Test cases for ticket search filters and keyset pagination (substring matching on SQLite)"""
+
+    @pytest.fixture
+    def tickets(self, db):
+        start = datetime(2026, 3, 1)
+        db.add_all([
+            Ticket(ticket_text="Please refund my last invoice", label="billing_issue", confidence=0.9,
+                   api_key="key_a", created_at=start),
+            Ticket(ticket_text="Charged twice", summary="Customer wants a REFUND", label="billing_issue",
+                   confidence=0.6, api_key="key_a", created_at=start + timedelta(days=1)),
+            Ticket(ticket_text="App crashes on refund screen", label="bug", confidence=0.95,
+                   api_key="key_b", created_at=start + timedelta(days=2)),
+            Ticket(ticket_text="Add dark mode", label="feature_request", confidence=0.8,
+                   api_key="key_a", created_at=start + timedelta(days=3)),
+            Ticket(ticket_text="Error 100%_done shown", label="bug", confidence=0.7,
+                   api_key="key_a", created_at=start + timedelta(days=4)),
+        ])
+        db.commit()
+        return start
+
+    def test_matches_text_and_summary_newest_first(self, db, tickets):
+        rows, cursor, match = TicketService(db).search_ticket_rows("refund")
+
+        assert match == "substring"
+        assert [row.ticket_text for row in rows] == [
+            "App crashes on refund screen", "Charged twice", "Please refund my last invoice"
+        ]
+        assert cursor is None
+
+    def test_filters_combine_with_the_search(self, db, tickets):
+        service = TicketService(db)
+
+        rows, _, _ = service.search_ticket_rows(
+            "refund", label="billing_issue", api_key="key_a", min_confidence=0.8,
+            since=tickets, until=tickets + timedelta(days=7)
+        )
+
+        assert [row.ticket_text for row in rows] == ["Please refund my last invoice"]
+
+    def test_pages_follow_the_cursor(self, db, tickets):
+        service = TicketService(db)
+
+        first, cursor, _ = service.search_ticket_rows("refund", limit=2)
+        second, last_cursor, _ = service.search_ticket_rows("refund", cursor=cursor, limit=2)
+
+        assert len(first) == 2
+        assert cursor.startswith("substring:")
+        assert [row.ticket_text for row in second] == ["Please refund my last invoice"]
+        assert last_cursor is None
+
+    def test_wildcards_in_the_query_are_literal(self, db, tickets):
+        rows, _, _ = TicketService(db).search_ticket_rows("0%_d")
+
+        assert [row.ticket_text for row in rows] == ["Error 100%_done shown"]
+
+    @pytest.mark.parametrize("kwargs", [
+        {"q": "  "},
+        {"q": "refund", "match": "regex"},
+        {"q": "ab"},
+        {"q": "refund", "min_confidence": 0.9, "max_confidence": 0.5},
+        {"q": "refund", "cursor": "nope:abc"},
+        {"q": "refund", "cursor": "substring:not-base64"},
+    ])
+    def test_invalid_arguments_raise(self, db, kwargs):
+        with pytest.raises(ValueError):
+            TicketService(db).search_ticket_rows(**kwargs)
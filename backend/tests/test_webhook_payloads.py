@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import WebhookLog, WebhookPayload
+from app.services.maintenance import cleanup_logs
+from app.services.webhook_payloads import (
+    delete_orphaned_payloads, load_webhook_bodies, record_webhook, store_payload
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestWebhookPayloadStore:
+    """Test cases for compressed, content-addressed webhook bodies"""
+
+    def test_identical_bodies_are_stored_once_and_compressed(self, db):
+        body = '{"ticket": {"id": 1, "description": "' + "printer on fire " * 200 + '"}}'
+        first = record_webhook(db, "zendesk", body, '{"ok": true}', 200, 0.1)
+        second = record_webhook(db, "zendesk", body, '{"ok": true}', 200, 0.1)
+
+        assert first.payload_hash == second.payload_hash
+        assert db.query(func.count(WebhookPayload.hash)).scalar() == 2
+        stored = db.get(WebhookPayload, first.payload_hash)
+        assert stored.size == len(body)
+        assert len(stored.data) < stored.size // 10
+
+    def test_bodies_are_loaded_per_log(self, db):
+        log = record_webhook(db, "jira", '{"issue": 7}', None, 202, 0.2)
+
+        assert load_webhook_bodies(db, log.id) == {"id": log.id, "payload": '{"issue": 7}', "response": None}
+        assert load_webhook_bodies(db, log.id + 1) is None
+
+    def test_duplicate_write_refreshes_last_seen(self, db):
+        digest = store_payload(db, "body")
+        db.query(WebhookPayload).update({WebhookPayload.last_seen_at: datetime(2020, 1, 1)})
+        db.commit()
+
+        store_payload(db, "body")
+        db.commit()
+
+        assert db.get(WebhookPayload, digest).last_seen_at > datetime(2020, 1, 1)
+
+    def test_only_stale_unreferenced_bodies_are_collected(self, db):
+        record_webhook(db, "zendesk", "referenced", None, 200, 0.1)
+        store_payload(db, "orphan")
+        db.query(WebhookPayload).update({WebhookPayload.last_seen_at: datetime.utcnow() - timedelta(days=2)})
+        store_payload(db, "recent orphan")
+        db.commit()
+
+        assert delete_orphaned_payloads(db, timedelta(hours=24)) == 1
+        db.commit()
+        assert db.query(func.count(WebhookPayload.hash)).scalar() == 2
+
+    def test_cleanup_collects_bodies_of_trimmed_logs(self, db):
+        for i in range(3):
+            record_webhook(db, "zendesk", f"payload {i}", None, 200, 0.1)
+
+        assert cleanup_logs(db, webhook_keep=1, payload_grace=timedelta(0)) == (0, 2, 2)
+        remaining = db.query(WebhookLog).one()
+        assert load_webhook_bodies(db, remaining.id)["payload"] == "payload 2"